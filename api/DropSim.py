@@ -1,6 +1,14 @@
+import bisect
+import functools
+import itertools
+import math
+import os
 import random
 import numpy as np
-from collections import defaultdict
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 
 # ------------------------------
 # 1.  Configuration
@@ -13,70 +21,128 @@ ALL_GEAR_SLOTS = WEAPON_SLOTS + ARMOR_SLOTS
 
 # Gear System
 class GearTracker:
-    def __init__(self):
+    """Character gear state: one level per slot plus running drop/upgrade counters.
+
+    Slot levels live in a compact array and the level sum is kept up to date, so
+    character level and summaries never rescan past drops. The per-drop history
+    of (slot, drop_level, was_upgrade) is opt-in via track_history; history_limit
+    keeps only the most recent drops in a ring buffer. Pass a random.Random as
+    rng for reproducible drops; the global random module is used otherwise.
+    The starting level, default drop ranges and slot rules come from `config` (a SimConfig).
+    With config.tiers, each slot also keeps the best gear tier it has
+    received (starting gear is T1) and drops are counted per tier.
+    """
+    __slots__ = ("_levels", "_drops", "_level_sum", "total_upgrades", "total_drops", "drop_history", "_rng",
+                 "_drop_ranges", "_slot_rules", "_config", "_tiers", "_drop_tiers")
+
+    def __init__(self, track_history=False, history_limit=None, rng=None, config=None):
+        if config is None:
+            config = default_config()
         # Track current gear level for each slot (starts at configurable level)
-        self.gear_levels = {slot: STARTING_GEAR_LEVEL for slot in ALL_GEAR_SLOTS}
+        self._levels = array("H", [config.starting_gear_level] * len(ALL_GEAR_SLOTS))
         # Track total drops received for each slot
-        self.drops_received = {slot: 0 for slot in ALL_GEAR_SLOTS}
-        # Track drop history (slot, drop_level, was_upgrade)
-        self.drop_history = []
+        self._drops = array("I", [0] * len(ALL_GEAR_SLOTS))
+        self._level_sum = config.starting_gear_level * len(ALL_GEAR_SLOTS)
+        self._drop_ranges = config.drop_range_map
+        self._slot_rules = config.slot_rule_map
+        self._config = config
+        # Best tier per slot and drops per tier, only when tiers are tracked
+        self._tiers = array("B", [1] * len(ALL_GEAR_SLOTS)) if config.tiers else None
+        self._drop_tiers = array("I", [0] * NUM_TIERS) if config.tiers else None
+        self.total_upgrades = 0
+        self.total_drops = 0
+        # Track drop history (slot, drop_level, was_upgrade) only when requested
+        self.drop_history = deque(maxlen=history_limit) if track_history else None
+        self._rng = random if rng is None else rng
+
+    @property
+    def gear_levels(self):
+        """Current gear level for each slot, keyed by slot name"""
+        return dict(zip(ALL_GEAR_SLOTS, self._levels))
+
+    @property
+    def drops_received(self):
+        """Total drops received for each slot, keyed by slot name"""
+        return dict(zip(ALL_GEAR_SLOTS, self._drops))
+
+    @property
+    def gear_tiers(self):
+        """Best gear tier received for each slot, keyed by slot name; None when tiers are not tracked"""
+        return None if self._tiers is None else dict(zip(ALL_GEAR_SLOTS, self._tiers))
+
+    @property
+    def drop_tiers(self):
+        """Drops received of each tier, keyed "T1".."T5"; None when tiers are not tracked"""
+        return None if self._drop_tiers is None else {f"T{tier}": count for tier, count in enumerate(self._drop_tiers, 1)}
     
     def get_character_level(self):
         """Calculate character level as average gear score rounded down, capped at 450"""
-        if not self.gear_levels:
-            return STARTING_GEAR_LEVEL
-        average_level = sum(self.gear_levels.values()) / len(self.gear_levels)
-        return min(450, int(average_level))  # Round down and cap at 450
+        return min(450, self._level_sum // len(self._levels))  # Round down and cap at 450
     
-    def apply_drop(self, activity_type="solo", drop_ranges=None):
-        """Apply a gear drop: random slot, check if it's an upgrade"""
-        slot = random.choice(ALL_GEAR_SLOTS)
+    def apply_drop(self, activity_type="solo", drop_ranges=None, focus_row=None):
+        """Apply a gear drop: random slot, check if it's an upgrade.
+
+        The slot follows the config's slot rules for `activity_type`;
+        focus_row is the session's SlotSampler table row (its focus slot).
+        """
+        sampler = slot_sampler(self._slot_rules.get(activity_type)) if self._slot_rules else None
+        if sampler is None:
+            slot_index = self._rng.randrange(len(ALL_GEAR_SLOTS))
+        else:
+            slot_index = sampler.pick_one(self._rng, sampler.fixed_row if focus_row is None else focus_row,
+                                          self._levels)
         character_level = self.get_character_level()
         
-        # Use configurable drop ranges if provided, otherwise use global defaults
-        if drop_ranges and activity_type in drop_ranges:
-            min_bonus, max_bonus = drop_ranges[activity_type]
-        else:
-            min_bonus, max_bonus = DROP_LEVEL_RANGES.get(activity_type, (1, 3))
+        # Use configurable drop ranges if provided, otherwise the config's, otherwise global defaults
+        min_bonus, max_bonus = get_drop_bonus_range(activity_type, drop_ranges or self._drop_ranges)
         
         # Generate drop level: current char level + configurable range
-        drop_level = character_level + random.randint(min_bonus, max_bonus)
+        drop_level = character_level + self._rng.randint(min_bonus, max_bonus)
         drop_level = min(450, drop_level)  # Cap at 450
+        if self._tiers is not None:
+            tier = self._config.tier_table(activity_type).draw_one(character_level, self._rng.random())
+            self._drop_tiers[tier - 1] += 1
+            self._tiers[slot_index] = max(self._tiers[slot_index], tier)
         
         # Check if this is an upgrade
-        was_upgrade = drop_level > self.gear_levels[slot]
+        current_level = self._levels[slot_index]
+        was_upgrade = drop_level > current_level
         
         # Update slot if it's higher
         if was_upgrade:
-            self.gear_levels[slot] = drop_level
+            self._levels[slot_index] = drop_level
+            self._level_sum += drop_level - current_level
+            self.total_upgrades += 1
         
-        self.drops_received[slot] += 1
-        self.drop_history.append((slot, drop_level, was_upgrade))
+        self._drops[slot_index] += 1
+        self.total_drops += 1
+        slot = ALL_GEAR_SLOTS[slot_index]
+        if self.drop_history is not None:
+            self.drop_history.append((slot, drop_level, was_upgrade))
         
         return slot, drop_level, was_upgrade
     
     def get_total_power(self):
         """Get total power level across all gear"""
-        return sum(self.gear_levels.values())
+        return self._level_sum
     
     def get_summary(self):
         """Get a summary of current gear state"""
-        weapons = {slot: self.gear_levels[slot] for slot in WEAPON_SLOTS}
-        armor = {slot: self.gear_levels[slot] for slot in ARMOR_SLOTS}
-        
-        # Count actual upgrades vs total drops
-        total_upgrades = sum(1 for _, _, was_upgrade in self.drop_history if was_upgrade)
-        total_drops = len(self.drop_history)
+        gear_levels = self.gear_levels
+        weapons = {slot: gear_levels[slot] for slot in WEAPON_SLOTS}
+        armor = {slot: gear_levels[slot] for slot in ARMOR_SLOTS}
         
         return {
             "weapons": weapons,
             "armor": armor,
             "total_power": self.get_total_power(),
             "character_level": self.get_character_level(),
-            "drops_received": dict(self.drops_received),
-            "total_upgrades": total_upgrades,
-            "total_drops": total_drops,
-            "upgrade_rate": total_upgrades / total_drops if total_drops > 0 else 0
+            "drops_received": self.drops_received,
+            "total_upgrades": self.total_upgrades,
+            "total_drops": self.total_drops,
+            "upgrade_rate": self.total_upgrades / self.total_drops if self.total_drops > 0 else 0,
+            "gear_tiers": self.gear_tiers,
+            "drop_tiers": self.drop_tiers,
         }
 OPERATION_TIMES = {
     "solo": (3, 5),      # solo ops take 3-5 minutes
@@ -119,8 +185,342 @@ DEFAULT_SYSTEMS = {
     },
 }
 
-def calculate_max_achievable_streak(system_name, session_hours):
+def _freeze_mapping(mapping, freeze_value):
+    """Sorted tuple of (key, frozen value) pairs from a dict or an already frozen tuple"""
+    if mapping is None:
+        return None
+    items = mapping.items() if isinstance(mapping, dict) else mapping
+    return tuple(sorted((key, freeze_value(value)) for key, value in items))
+
+def _freeze_streak_levels(levels):
+    items = levels.items() if isinstance(levels, dict) else levels
+    return tuple(sorted((int(level), int(drops)) for level, drops in items))
+
+def _freeze_drop_range(drop_range):
+    min_bonus, max_bonus = drop_range
+    return int(min_bonus), int(max_bonus)
+
+# Slot selection
+ROTATING_FOCUS = "rotating"          # focus_slot value: a random focus slot each session
+TABLE_CACHE_SIZE = 256               # slot samplers and tier tables kept for distinct rules
+
+@dataclass(frozen=True)
+class SlotRules:
+    """How one activity picks the slot of each drop.
+
+    weights ({slot: weight}, missing slots weigh 1, or one weight per slot
+    in ALL_GEAR_SLOTS order) sets the relative odds of each slot; None is
+    uniform. focus_slot gets focus_weight added to its weight: a slot name,
+    ROTATING_FOCUS for a focus slot drawn at random each session, or None.
+    With lowest_slot_chance, that share of drops goes to the lowest-level
+    slot (the first one on ties) instead: bad-luck protection.
+    """
+    weights: tuple = None
+    focus_slot: str = None
+    focus_weight: float = 0.0
+    lowest_slot_chance: float = 0.0
+
+    def __post_init__(self):
+        weights = self.weights
+        if weights is not None:
+            if isinstance(weights, dict):
+                unknown = set(weights) - set(ALL_GEAR_SLOTS)
+                if unknown:
+                    raise ValueError(f"Unknown gear slot(s) in slot weights: {', '.join(sorted(unknown))}")
+                weights = [weights.get(slot, 1.0) for slot in ALL_GEAR_SLOTS]
+            weights = tuple(float(weight) for weight in weights)
+            if len(weights) != len(ALL_GEAR_SLOTS):
+                raise ValueError(f"Slot weights need one weight per slot ({len(ALL_GEAR_SLOTS)})")
+            if min(weights) < 0 or not sum(weights) > 0:
+                raise ValueError("Slot weights must be non-negative with a positive total")
+        if self.focus_slot is not None and self.focus_slot != ROTATING_FOCUS and self.focus_slot not in ALL_GEAR_SLOTS:
+            raise ValueError(f"Unknown focus slot '{self.focus_slot}'")
+        focus_weight = float(self.focus_weight)
+        if focus_weight < 0:
+            raise ValueError("focus_weight must be non-negative")
+        lowest_slot_chance = float(self.lowest_slot_chance)
+        if not 0 <= lowest_slot_chance <= 1:
+            raise ValueError("lowest_slot_chance must be between 0 and 1")
+        object.__setattr__(self, "weights", weights)
+        object.__setattr__(self, "focus_weight", focus_weight)
+        object.__setattr__(self, "lowest_slot_chance", lowest_slot_chance)
+
+    @property
+    def uniform(self):
+        """Whether every drop picks each slot with equal odds, as without rules"""
+        return ((self.weights is None or len(set(self.weights)) == 1)
+                and (self.focus_slot is None or self.focus_weight == 0)
+                and self.lowest_slot_chance == 0)
+
+    def to_dict(self):
+        return {
+            "weights": None if self.weights is None else dict(zip(ALL_GEAR_SLOTS, self.weights)),
+            "focus_slot": self.focus_slot,
+            "focus_weight": self.focus_weight,
+            "lowest_slot_chance": self.lowest_slot_chance,
+        }
+
+def _freeze_slot_rules(rules):
+    return rules if isinstance(rules, SlotRules) else SlotRules(**rules)
+
+def _alias_table(probabilities):
+    """Walker's alias table (Vose's construction) of a discrete distribution.
+
+    Column i is kept with probability prob[i] and otherwise replaced by
+    alias[i], so a pick is one uniform column plus one acceptance test.
+    """
+    size = len(probabilities)
+    scaled = np.asarray(probabilities, dtype=np.float64) * size
+    prob = np.ones(size)
+    alias = np.arange(size)
+    small = [i for i in range(size) if scaled[i] < 1]
+    large = [i for i in range(size) if scaled[i] >= 1]
+    while small and large:
+        low, high = small.pop(), large.pop()
+        prob[low], alias[low] = scaled[low], high
+        scaled[high] -= 1 - scaled[low]
+        (small if scaled[high] < 1 else large).append(high)
+    # Leftovers are 1 up to rounding and keep their own column
+    return prob, alias
+
+class SlotSampler:
+    """Precomputed alias tables for one SlotRules: O(1) weighted slot picks.
+
+    Table row f is the slot distribution with the focus bonus on slot f and
+    the last row the one without focus, so every trial of a batch can pick
+    from its own session's distribution at the cost of a uniform pick. A
+    pick takes a single uniform u: u * slots splits into the column and the
+    acceptance fraction.
+    """
+
+    def __init__(self, rules):
+        num_slots = len(ALL_GEAR_SLOTS)
+        weights = np.array(rules.weights if rules.weights is not None else [1.0] * num_slots)
+        distributions = np.tile(weights, (num_slots + 1, 1))
+        distributions[np.arange(num_slots), np.arange(num_slots)] += rules.focus_weight
+        tables = [_alias_table(row / row.sum()) for row in distributions]
+        self.rules = rules
+        self.num_slots = num_slots
+        self.prob = np.array([prob for prob, _ in tables])
+        self.alias = np.array([alias for _, alias in tables])
+        self.rotating = rules.focus_slot == ROTATING_FOCUS
+        self.fixed_row = ALL_GEAR_SLOTS.index(rules.focus_slot) if rules.focus_slot in ALL_GEAR_SLOTS else num_slots
+        self.lowest_slot_chance = rules.lowest_slot_chance
+        self._prob_cells = self.prob.ravel()
+        self._alias_cells = self.alias.ravel()
+        # Plain lists for GearTracker's one-drop-at-a-time picks
+        self._prob_rows = self.prob.tolist()
+        self._alias_rows = self.alias.tolist()
+
+    def session_rows(self, count, rng=None, uniforms=None):
+        """Table row of each of `count` trials for one session: a drawn focus slot when rotating.
+
+        None when every trial uses fixed_row.
+        """
+        if not self.rotating:
+            return None
+        if uniforms is None:
+            uniforms = rng.random(count)
+        return (uniforms * self.num_slots).astype(np.int64)
+
+    def pick(self, uniforms, table_rows=None):
+        """Slot index for each uniform draw, from each draw's table row (fixed_row when None)"""
+        scaled = uniforms * self.num_slots
+        columns = scaled.astype(np.int64)
+        cells = columns + (self.fixed_row * self.num_slots if table_rows is None else table_rows * self.num_slots)
+        return np.where(scaled - columns < self._prob_cells.take(cells), columns, self._alias_cells.take(cells))
+
+    def pick_one(self, rng, table_row, levels):
+        """One slot index for a random.Random-style `rng` and the current slot `levels`"""
+        scaled = rng.random() * self.num_slots
+        column = int(scaled)
+        slot_index = column if scaled - column < self._prob_rows[table_row][column] else self._alias_rows[table_row][column]
+        if self.lowest_slot_chance and rng.random() < self.lowest_slot_chance:
+            slot_index = min(range(self.num_slots), key=levels.__getitem__)
+        return slot_index
+
+@functools.lru_cache(maxsize=TABLE_CACHE_SIZE)
+def slot_sampler(rules):
+    """The SlotSampler of `rules`, shared by every plan and tracker; None for uniform picks"""
+    return None if rules is None or rules.uniform else SlotSampler(rules)
+
+# Gear tiers
+NUM_TIERS = 5                        # drops and slots range from T1 to T5
+
+# Tier odds of a drop by the character level band it drops in: {band start level: {tier: probability}}
+LEVEL_BAND_TIER_ODDS = {
+    0: {1: 0.67, 2: 0.33},
+    200: {2: 0.67, 3: 0.33},
+    300: {3: 0.67, 4: 0.33},         # LL 300 = T3 with a 33% chance for T4
+    400: {4: 0.75, 5: 0.25},         # LL 400 = T4 with a 25% chance for T5
+}
+
+# Tier odds for each activity type
+DROP_TIER_ODDS = {
+    "solo": LEVEL_BAND_TIER_ODDS,
+    "fireteam": LEVEL_BAND_TIER_ODDS,
+    "pinnacle": LEVEL_BAND_TIER_ODDS,
+}
+
+def _freeze_tier_odds(odds):
+    """Relative odds of T1..T5 as a tuple, from {tier: odds} or one value per tier"""
+    if isinstance(odds, dict):
+        odds = {int(tier): value for tier, value in odds.items()}
+        unknown = set(odds) - set(range(1, NUM_TIERS + 1))
+        if unknown:
+            raise ValueError(f"Unknown tier(s) {', '.join(map(str, sorted(unknown)))}; tiers are 1 to {NUM_TIERS}")
+        odds = [odds.get(tier, 0) for tier in range(1, NUM_TIERS + 1)]
+    odds = tuple(float(value) for value in odds)
+    if len(odds) != NUM_TIERS:
+        raise ValueError(f"Tier odds need one value per tier ({NUM_TIERS})")
+    if min(odds) < 0 or not sum(odds) > 0:
+        raise ValueError("Tier odds must be non-negative with a positive total")
+    return odds
+
+def _freeze_tier_bands(bands):
+    items = bands.items() if isinstance(bands, dict) else bands
+    bands = tuple(sorted((int(start), _freeze_tier_odds(odds)) for start, odds in items))
+    if not bands:
+        raise ValueError("Tier odds need at least one level band")
+    return bands
+
+def get_tier_odds(activity_type, tier_odds=None):
+    """Level bands of tier odds for a drop: ((band start level, odds of T1..T5), ...)"""
+    if tier_odds and activity_type in tier_odds:
+        return _freeze_tier_bands(tier_odds[activity_type])
+    return _freeze_tier_bands(DROP_TIER_ODDS.get(activity_type, LEVEL_BAND_TIER_ODDS))
+
+class TierTable:
+    """Categorical lookup table of drop tiers by character level, for one activity.
+
+    The level bands are expanded once into one cumulative distribution row
+    per character level (levels below the first band use it), so a batch of
+    drops looks up its bounds directly and compares one uniform per drop with
+    them; no band search happens per drop.
+    """
+
+    def __init__(self, bands):
+        starts = np.array([start for start, _ in bands])
+        odds = np.array([tier_odds for _, tier_odds in bands])
+        band_of_level = np.maximum(np.searchsorted(starts, np.arange(451), side="right") - 1, 0)
+        cdf = np.cumsum(odds / odds.sum(axis=1, keepdims=True), axis=1)[band_of_level]
+        self.bands = bands
+        # A uniform at or above bounds[level, t - 1] is a tier above t
+        self.bounds = cdf[:, :-1]
+        # One contiguous array per bound: a 1-D take per tier beats a 2-D row gather
+        self._bound_columns = [np.ascontiguousarray(column) for column in self.bounds.T]
+        self._bound_rows = self.bounds.tolist()
+
+    def draw(self, character_levels, uniforms):
+        """Tier (1..NUM_TIERS, int8) of each drop from its character level and a uniform draw"""
+        tiers = np.ones(uniforms.size, dtype=np.int8)
+        for column in self._bound_columns:
+            tiers += uniforms >= column.take(character_levels)
+        return tiers
+
+    def draw_one(self, character_level, uniform):
+        return 1 + bisect.bisect_right(self._bound_rows[character_level], uniform)
+
+@functools.lru_cache(maxsize=TABLE_CACHE_SIZE)
+def tier_table(activity_type, tier_odds=None):
+    """The TierTable of `activity_type` under a SimConfig's frozen tier_odds, shared by every plan and tracker"""
+    return TierTable(get_tier_odds(activity_type, None if tier_odds is None else dict(tier_odds)))
+
+@dataclass(frozen=True)
+class SimConfig:
+    """Immutable session settings shared by every engine.
+
+    streak_bonuses ({system: {streak_level: drops}}) and drop_ranges
+    ({activity: (min_bonus, max_bonus)}) may be given as dicts; they are
+    stored as sorted tuples, so a config is hashable and safe to share
+    between threads and worker processes. slot_rules ({activity: SlotRules
+    or its fields as a dict}) changes how drops pick their slot. With
+    tiers, every drop also gets a gear tier from tier_odds ({activity:
+    {band start level: {tier: odds}}}) and each slot keeps the best tier it
+    has received. None means the module defaults. starting_gear_level must
+    lie in 0..450, the range gear levels are stored in.
+    """
+    total_time_hours: float = TOTAL_TIME_HOURS
+    starting_gear_level: int = STARTING_GEAR_LEVEL
+    streak_bonuses: tuple = None
+    drop_ranges: tuple = None
+    slot_rules: tuple = None
+    tiers: bool = False
+    tier_odds: tuple = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "total_time_hours", float(self.total_time_hours))
+        object.__setattr__(self, "starting_gear_level", int(self.starting_gear_level))
+        if not 0 <= self.starting_gear_level <= 450:
+            raise ValueError("starting_gear_level must be between 0 and 450")
+        object.__setattr__(self, "streak_bonuses", _freeze_mapping(self.streak_bonuses, _freeze_streak_levels))
+        object.__setattr__(self, "drop_ranges", _freeze_mapping(self.drop_ranges, _freeze_drop_range))
+        object.__setattr__(self, "slot_rules", _freeze_mapping(self.slot_rules, _freeze_slot_rules))
+        object.__setattr__(self, "tiers", bool(self.tiers))
+        object.__setattr__(self, "tier_odds", _freeze_mapping(self.tier_odds, _freeze_tier_bands))
+
+    @property
+    def streak_bonus_map(self):
+        """streak_bonuses as {system: {streak_level: drops}}, or None"""
+        if self.streak_bonuses is None:
+            return None
+        return {system: dict(levels) for system, levels in self.streak_bonuses}
+
+    @property
+    def drop_range_map(self):
+        """drop_ranges as {activity: (min_bonus, max_bonus)}, or None"""
+        return None if self.drop_ranges is None else dict(self.drop_ranges)
+
+    @property
+    def slot_rule_map(self):
+        """slot_rules as {activity: SlotRules}, or None"""
+        return None if self.slot_rules is None else dict(self.slot_rules)
+
+    def slot_sampler(self, activity_type):
+        """The SlotSampler of `activity_type`'s drops, or None when they pick slots uniformly"""
+        return slot_sampler(dict(self.slot_rules).get(activity_type)) if self.slot_rules else None
+
+    @property
+    def tier_odds_map(self):
+        """tier_odds as {activity: level bands}, or None"""
+        return None if self.tier_odds is None else dict(self.tier_odds)
+
+    def tier_table(self, activity_type):
+        """The TierTable of `activity_type`'s drops, or None when tiers are not tracked"""
+        return tier_table(activity_type, self.tier_odds) if self.tiers else None
+
+    def to_dict(self):
+        """JSON-friendly form, e.g. for cache keys and API responses"""
+        return {
+            "total_time_hours": self.total_time_hours,
+            "starting_gear_level": self.starting_gear_level,
+            "streak_bonuses": self.streak_bonus_map,
+            "drop_ranges": None if self.drop_ranges is None else {activity: list(bonus_range)
+                                                                   for activity, bonus_range in self.drop_ranges},
+            "slot_rules": None if self.slot_rules is None else {activity: rules.to_dict()
+                                                                 for activity, rules in self.slot_rules},
+            "tiers": self.tiers,
+            "tier_odds": None if self.tier_odds is None else {
+                activity: {start: {tier: value for tier, value in enumerate(odds, 1) if value}
+                           for start, odds in bands}
+                for activity, bands in self.tier_odds},
+        }
+
+def default_config():
+    """SimConfig built from the current module-level defaults"""
+    return SimConfig(TOTAL_TIME_HOURS, STARTING_GEAR_LEVEL)
+
+def resolve_config(config=None, **overrides):
+    """`config` (or the module defaults) with every non-None override applied"""
+    if config is None:
+        config = default_config()
+    overrides = {name: value for name, value in overrides.items() if value is not None}
+    return replace(config, **overrides) if overrides else config
+
+def calculate_max_achievable_streak(system_name, session_hours=None, config=None):
     """Calculate the maximum achievable streak based on session length and activity times"""
+    if session_hours is None:
+        session_hours = (config or default_config()).total_time_hours
     if system_name == "pinnacle":
         # For pinnacle, all activities are exotic missions (10-20 min avg = 14.5 min)
         avg_activity_time = 14.5
@@ -164,163 +564,1210 @@ def create_systems_from_config(streak_bonuses=None):
     
     return systems
 
+def get_drop_bonus_range(activity_type, drop_ranges=None):
+    """Return the (min_bonus, max_bonus) added to character level for a drop"""
+    if drop_ranges and activity_type in drop_ranges:
+        min_bonus, max_bonus = drop_ranges[activity_type]
+    else:
+        min_bonus, max_bonus = DROP_LEVEL_RANGES.get(activity_type, (1, 3))
+    return min_bonus, max_bonus
+
+def get_activity_time_params(system_name):
+    """Return (base_minutes_per_activity, min_efficiency, max_efficiency) for a system"""
+    if system_name == "pinnacle":
+        # Pinnacle ops: 10-15 min each, ±10% efficiency variation
+        return 12.5, 0.9, 1.1
+    # Solo/Fireteam ops: average of time range, ±15% variation for player skill/luck
+    time_range = OPERATION_TIMES[system_name]
+    return (time_range[0] + time_range[1]) / 2, 0.85, 1.15
+
+# Compiled simulation plans
+PLAN_CACHE_SIZE = 256                # (system, SimConfig) plans kept by compile_plan
+
+@dataclass(frozen=True, eq=False)
+class SimPlan:
+    """One system's session rules under one SimConfig, derived once.
+
+    activity_drops[a] is the base drop count of the a-th activity of a
+    session (index 0 is unused) up to the max achievable streak; later
+    activities drop as many as the last entry, so the array does not grow
+    with session length. max_activities is the most activities any
+    efficiency draw allows. Plans are shared by every trial, engine and
+    thread that uses the same config, so treat them as read-only.
+    """
+    system_name: str
+    config: SimConfig
+    max_achievable_streak: int
+    max_activities: int
+    activity_drops: array
+    min_bonus: int
+    max_bonus: int
+    base_time_per_activity: float
+    min_efficiency: float
+    max_efficiency: float
+    slot_sampler: SlotSampler = None
+    tier_table: TierTable = None
+
+    @property
+    def drop_variation(self):
+        """Whether each activity's drop count varies by ±1 (pinnacle)"""
+        return self.system_name == "pinnacle"
+
+    def base_drops(self, activity_num):
+        """Base drop count of the activity_num-th activity of a session"""
+        return self.activity_drops[min(activity_num, len(self.activity_drops) - 1)]
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile_plan(system_name, config):
+    rules = create_systems_from_config(config.streak_bonus_map)[system_name]
+    max_achievable_streak = calculate_max_achievable_streak(system_name, config.total_time_hours)
+    min_bonus, max_bonus = get_drop_bonus_range(system_name, config.drop_range_map)
+    base_time_per_activity, min_efficiency, max_efficiency = get_activity_time_params(system_name)
+    # The slowest efficiency draw gives the longest session
+    max_activities = int(config.total_time_hours * 60 / (base_time_per_activity * min_efficiency))
+    activity_drops = array("i", [0] + [rules[streak_level]() for streak_level in range(1, max_achievable_streak + 1)])
+    return SimPlan(system_name, config, max_achievable_streak, max_activities, activity_drops, min_bonus, max_bonus,
+                   base_time_per_activity, min_efficiency, max_efficiency, config.slot_sampler(system_name),
+                   config.tier_table(system_name))
+
+def compile_plan(system_name, config=None):
+    """The SimPlan for `system_name` under `config`, memoized by config.
+
+    SimConfig is hashable and equal configs compare equal, so the config
+    itself is the cache fingerprint: every trial, chunk and request with the
+    same settings reuses one plan instead of rebuilding the rules.
+    """
+    return _compile_plan(system_name, config if config is not None else default_config())
+
+def plan_cache_info():
+    """Hit/miss counters of the compiled-plan cache"""
+    return _compile_plan.cache_info()._asdict()
+
 # ------------------------------
 # 2.  Single simulation run
 # ------------------------------
-def run_sim(system_name, streak_bonuses=None, drop_ranges=None):
-    systems = create_systems_from_config(streak_bonuses)
-    rules = systems[system_name]
-    time_range = OPERATION_TIMES[system_name]
-    total_time_min = TOTAL_TIME_HOURS * 60
+def run_sim(system_name, streak_bonuses=None, drop_ranges=None, track_history=False, rng=None, config=None):
+    if rng is None:
+        rng = random
+    # Settings come from `config`; explicit streak_bonuses/drop_ranges take precedence
+    config = resolve_config(config, streak_bonuses=streak_bonuses, drop_ranges=drop_ranges)
+    plan = compile_plan(system_name, config)
+    total_time_min = config.total_time_hours * 60
     
-    # Calculate dynamic max streak based on session length
-    max_achievable_streak = calculate_max_achievable_streak(system_name, TOTAL_TIME_HOURS)
+    # Dynamic max streak based on session length, from the compiled plan
+    max_achievable_streak = plan.max_achievable_streak
     
     # DIRECT CALCULATION APPROACH:
     # 1. Calculate total activities that can be completed in the given time
     # 2. Calculate drops based on activities completed and streak progression
     
     # Calculate total activities with slight variation for realism
-    if system_name == "pinnacle":
-        # Pinnacle ops: 10-15 min each, use random efficiency factor
-        base_time_per_activity = 12.5  # Average time
-        efficiency_factor = random.uniform(0.9, 1.1)  # ±10% variation
-        avg_activity_time = base_time_per_activity * efficiency_factor
-    else:
-        # Solo/Fireteam ops: use time range with efficiency variation
-        base_time_per_activity = (time_range[0] + time_range[1]) / 2
-        efficiency_factor = random.uniform(0.85, 1.15)  # ±15% variation for player skill/luck
-        avg_activity_time = base_time_per_activity * efficiency_factor
+    efficiency_factor = rng.uniform(plan.min_efficiency, plan.max_efficiency)
+    avg_activity_time = plan.base_time_per_activity * efficiency_factor
     
     # Calculate total activities possible in the session
     total_activities = int(total_time_min / avg_activity_time)
+
+    # Weighted slot picks use this session's focus slot
+    focus_row = None
+    if plan.slot_sampler is not None and plan.slot_sampler.rotating:
+        focus_row = rng.randrange(len(ALL_GEAR_SLOTS))
     
     # DIRECT CALCULATION: Calculate total drops based on activities and streak progression
     # This approach provides predictable results based on time investment and streak bonuses
     drops = 0
-    gear_tracker = GearTracker()
+    gear_tracker = GearTracker(track_history=track_history, rng=rng, config=config)
     
     # Process each activity in the session, building up streak bonuses
     for activity_num in range(1, total_activities + 1):
-        # Current streak level builds from 1 to max_achievable_streak based on activity number
-        current_streak = min(activity_num, max_achievable_streak)
-        
-        # Calculate drops for this activity based on system type and current streak
-        if system_name == "pinnacle":
+        # Streak level builds from 1 to max_achievable_streak; the plan holds each activity's drops
+        if plan.drop_variation:
             # Pinnacle ops: use streak-based drop rules with slight variation
-            base_drops = rules[current_streak]()
-            variation = random.randint(-1, 1)  # ±1 drop variation
+            base_drops = plan.base_drops(activity_num)
+            variation = rng.randint(-1, 1)  # ±1 drop variation
             num_drops = max(0, base_drops + variation)
         else:
             # Solo/Fireteam ops: use streak-based drop rules
-            num_drops = rules[current_streak]()
+            num_drops = plan.base_drops(activity_num)
         
         drops += num_drops
         
         # Apply gear drops for progression tracking
         for _ in range(num_drops):
-            gear_tracker.apply_drop(system_name, drop_ranges)
+            gear_tracker.apply_drop(system_name, focus_row=focus_row)
     
     # Maximum streak reached is the final streak level
     max_streak = min(total_activities, max_achievable_streak) if total_activities > 0 else 1
     
-    # Include dynamic streak information
-    streak_info = {
+    streak_info = get_streak_info(system_name, config.total_time_hours, max_achievable_streak)
+    return drops, total_activities, gear_tracker, max_streak, streak_info
+
+def get_streak_info(system_name, session_hours, max_achievable_streak=None):
+    """Dynamic streak information reported alongside every run"""
+    if max_achievable_streak is None:
+        max_achievable_streak = calculate_max_achievable_streak(system_name, session_hours)
+    return {
         'max_achievable_streak': max_achievable_streak,
-        'session_hours': TOTAL_TIME_HOURS,
+        'session_hours': session_hours,
         'streak_reset_policy': 'session_only',  # Streaks only reset between play sessions
         'calculation_method': 'direct'  # New field to indicate calculation method
     }
-    
-    return drops, total_activities, gear_tracker, max_streak, streak_info
 
 # ------------------------------
-# 3.  Monte-Carlo envelope
+# 3.  Vectorized batch engine
 # ------------------------------
-def monte_carlo(system_name, trials=50_000, streak_bonuses=None, drop_ranges=None):
-    results = [run_sim(system_name, streak_bonuses, drop_ranges) for _ in range(trials)]
-    drops = np.array([r[0] for r in results])
-    activities = np.array([r[1] for r in results])
-    gear_trackers = [r[2] for r in results]
-    max_streaks = np.array([r[3] for r in results])
-    # Note: streak_info (r[4]) is the same for all runs, so we can ignore it in aggregation
-    
-    # Calculate gear statistics
-    total_powers = np.array([gt.get_total_power() for gt in gear_trackers])
-    character_levels = np.array([gt.get_character_level() for gt in gear_trackers])
-    character_level_gains = character_levels - STARTING_GEAR_LEVEL  # Calculate level gains from starting point
-    
-    # Calculate per-slot statistics
-    slot_stats = {}
-    for slot in ALL_GEAR_SLOTS:
-        slot_levels = np.array([gt.gear_levels[slot] for gt in gear_trackers])
-        slot_drops = np.array([gt.drops_received[slot] for gt in gear_trackers])
-        
-        slot_stats[slot] = {
-            "avg_level": slot_levels.mean(),
-            "max_level": slot_levels.max(),
-            "min_level": slot_levels.min(),
-            "avg_drops": slot_drops.mean(),
-            "95%_level": np.percentile(slot_levels, 95)
+def _apply_batch_drops(gear_levels, level_sums, rows, rng, min_bonus, max_bonus,
+                       drops_received=None, total_upgrades=None, draws=None, drop_index=None,
+                       slot_sampler=None, focus_rows=None, tier_table=None, gear_tiers=None, drop_tiers=None):
+    """Apply one drop to each trial in `rows`: GearTracker.apply_drop across a batch.
+
+    With `draws` (CommonRandomNumbers), slot and bonus come from each trial's
+    drop number `drop_index` instead of the next values of `rng`. With a
+    `slot_sampler`, slots are weighted picks from each trial's table row in
+    `focus_rows` (one entry per batch trial, or None for the fixed row) instead of uniform ones.
+    With a `tier_table`, each drop also draws a tier: `gear_tiers` (trials x
+    slots) keeps each slot's best tier and `drop_tiers` counts drops per tier.
+    """
+    num_slots = gear_levels.shape[1]
+    table_rows = None if focus_rows is None else focus_rows[rows]
+    if draws is None:
+        if slot_sampler is None:
+            slots = rng.integers(0, num_slots, rows.size)
+        else:
+            slots = slot_sampler.pick(rng.random(rows.size), table_rows)
+    else:
+        slot_draws, bonus_draws = draws.drop_uniforms(rows, drop_index)
+        if slot_sampler is None:
+            slots = (slot_draws * num_slots).astype(np.int64)
+        else:
+            slots = slot_sampler.pick(slot_draws, table_rows)
+        bonuses = min_bonus + (bonus_draws * (max_bonus - min_bonus + 1)).astype(np.int64)
+    if slot_sampler is not None and slot_sampler.lowest_slot_chance:
+        protection_draws = rng.random(rows.size) if draws is None else draws.protection_uniforms(rows, drop_index)
+        protected = np.flatnonzero(protection_draws < slot_sampler.lowest_slot_chance)
+        slots[protected] = gear_levels[rows[protected]].argmin(axis=1)
+    character_levels = np.minimum(450, level_sums[rows] // num_slots)
+    if draws is None:
+        bonuses = rng.integers(min_bonus, max_bonus + 1, rows.size)
+    drop_levels = np.minimum(450, character_levels + bonuses)
+    current_levels = gear_levels[rows, slots]
+    gains = np.maximum(drop_levels - current_levels, 0)
+    if tier_table is not None:
+        tier_draws = rng.random(rows.size) if draws is None else draws.tier_uniforms(rows, drop_index)
+        tiers = tier_table.draw(character_levels, tier_draws)
+        gear_tiers[rows, slots] = np.maximum(gear_tiers[rows, slots], tiers)
+        drop_tiers += np.bincount(tiers, minlength=NUM_TIERS + 1)[1:]
+
+    gear_levels[rows, slots] = current_levels + gains
+    level_sums[rows] += gains
+    if total_upgrades is not None:
+        total_upgrades[rows] += gains > 0
+    if drops_received is not None:
+        drops_received[rows, slots] += 1
+
+def _checkpoint_activities(checkpoints, checkpoint_unit, activities, efficiency_factors, plan):
+    """Activities each trial has completed at each checkpoint: a trials x checkpoints matrix.
+
+    "hours" checkpoints count the activities finished within that much
+    session time, "activities" checkpoints are activity counts; either way a
+    trial that has already finished its session stays at its last activity.
+    """
+    checkpoints = np.asarray(checkpoints)
+    if checkpoint_unit == "hours":
+        # Same formula as the session's activity count, so the session length maps to its last activity
+        completed = (checkpoints[None, :] * 60
+                     / (plan.base_time_per_activity * efficiency_factors)[:, None]).astype(np.int64)
+    elif checkpoint_unit == "activities":
+        completed = np.broadcast_to(checkpoints.astype(np.int64), (activities.size, checkpoints.size))
+    else:
+        raise ValueError(f"Unknown checkpoint unit {checkpoint_unit!r}; expected 'hours' or 'activities'")
+    return np.minimum(completed, activities[:, None])
+
+class _TrajectoryRecorder:
+    """Character level of every trial at each checkpoint, written as the batch plays.
+
+    Each trial keeps the activity count of its next checkpoint, so recording
+    after an activity is one comparison over the trials; memory is the
+    trials x checkpoints uint16 matrix, whatever the number of drops.
+    """
+    def __init__(self, checkpoint_activities):
+        trials, num_checkpoints = checkpoint_activities.shape
+        # A sentinel column past the last checkpoint is never due
+        self.checkpoint_activities = np.empty((trials, num_checkpoints + 1), dtype=np.int64)
+        self.checkpoint_activities[:, :num_checkpoints] = checkpoint_activities
+        self.checkpoint_activities[:, num_checkpoints] = np.iinfo(np.int64).max
+        self.next_checkpoint = np.zeros(trials, dtype=np.int64)
+        self.next_due = self.checkpoint_activities[:, 0].copy()
+        self.levels = np.empty((trials, num_checkpoints), dtype=np.uint16)
+
+    def record(self, activity_num, level_sums, num_slots):
+        """Write the levels of trials whose checkpoints fall at `activity_num` completed activities"""
+        due = np.flatnonzero(self.next_due <= activity_num)
+        # Several checkpoints can share one activity when they are closer together than an activity
+        while due.size:
+            self.levels[due, self.next_checkpoint[due]] = np.minimum(450, level_sums[due] // num_slots)
+            self.next_checkpoint[due] += 1
+            self.next_due[due] = self.checkpoint_activities[due, self.next_checkpoint[due]]
+            due = due[self.next_due[due] <= activity_num]
+
+def simulate_batch(system_name, trials, streak_bonuses=None, drop_ranges=None, rng=None,
+                   total_time_hours=None, starting_gear_level=None, draws=None, config=None,
+                   checkpoints=None, checkpoint_unit="hours", initial_gear_levels=None, initial_gear_tiers=None):
+    """Simulate a whole block of sessions at once using NumPy arrays.
+
+    Follows the same rules as run_sim(), but every random quantity (efficiency
+    factors, pinnacle drop variation, focus slots, slot picks and drop bonuses) is drawn for
+    all trials in one call and gear is held as a trials x slots integer matrix.
+    Pass `draws` (CommonRandomNumbers) to take those quantities from shared
+    per-trial draws instead of `rng`. Settings come from `config`, with any
+    explicit keyword settings taking precedence. Returns a dict of per-trial arrays.
+
+    With `checkpoints` (session hours, or activity counts with
+    checkpoint_unit="activities"), "trajectory" holds each trial's character
+    level at every checkpoint as a trials x checkpoints uint16 matrix.
+    Recording draws no random numbers, so the other results are unchanged.
+
+    `initial_gear_levels` (trials x slots) continues each trial from earlier
+    gear instead of starting every slot at starting_gear_level; streaks still
+    start over, as they do between sessions.
+
+    With config.tiers, "gear_tiers" (trials x slots int8, continuing from
+    `initial_gear_tiers` or T1) holds each slot's best tier and "drop_tiers"
+    the batch's drops of each tier; both are None otherwise.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    config = resolve_config(config, streak_bonuses=streak_bonuses, drop_ranges=drop_ranges,
+                            total_time_hours=total_time_hours, starting_gear_level=starting_gear_level)
+    total_time_hours = config.total_time_hours
+    starting_gear_level = config.starting_gear_level
+
+    plan = compile_plan(system_name, config)
+    max_achievable_streak = plan.max_achievable_streak
+    min_bonus, max_bonus = plan.min_bonus, plan.max_bonus
+    base_time_per_activity, min_efficiency, max_efficiency = (plan.base_time_per_activity, plan.min_efficiency,
+                                                              plan.max_efficiency)
+    num_slots = len(ALL_GEAR_SLOTS)
+
+    # Activities completed per trial (same formula as run_sim)
+    if draws is None:
+        efficiency_factors = rng.uniform(min_efficiency, max_efficiency, trials)
+    else:
+        efficiency_factors = min_efficiency + (max_efficiency - min_efficiency) * draws.efficiency
+    activities = (total_time_hours * 60 / (base_time_per_activity * efficiency_factors)).astype(np.int64)
+    slot_sampler = plan.slot_sampler
+    focus_rows = None if slot_sampler is None else slot_sampler.session_rows(
+        trials, rng, None if draws is None else draws.focus)
+
+    if initial_gear_levels is None:
+        gear_levels = np.full((trials, num_slots), starting_gear_level, dtype=np.int16)
+        level_sums = np.full(trials, starting_gear_level * num_slots, dtype=np.int64)
+    else:
+        gear_levels = np.array(initial_gear_levels, dtype=np.int16)
+        level_sums = gear_levels.sum(axis=1, dtype=np.int64)
+    drops_received = np.zeros((trials, num_slots), dtype=np.int32)
+    total_upgrades = np.zeros(trials, dtype=np.int32)
+    drops = np.zeros(trials, dtype=np.int64)
+    tier_table = plan.tier_table
+    gear_tiers = drop_tiers = None
+    if tier_table is not None:
+        gear_tiers = (np.ones((trials, num_slots), dtype=np.int8) if initial_gear_tiers is None
+                      else np.array(initial_gear_tiers, dtype=np.int8))
+        drop_tiers = np.zeros(NUM_TIERS, dtype=np.int64)
+
+    recorder = None
+    if checkpoints is not None:
+        recorder = _TrajectoryRecorder(_checkpoint_activities(checkpoints, checkpoint_unit, activities,
+                                                              efficiency_factors, plan))
+        recorder.record(0, level_sums, num_slots)
+
+    max_activities = int(activities.max()) if trials > 0 else 0
+    for activity_num in range(1, max_activities + 1):
+        base_drops = plan.base_drops(activity_num)
+        if plan.drop_variation:
+            variation = rng.integers(-1, 2, trials) if draws is None else draws.variation(activity_num)
+            num_drops = np.maximum(0, base_drops + variation)
+        else:
+            num_drops = np.full(trials, base_drops, dtype=np.int64)
+        num_drops[activities < activity_num] = 0
+        drops_before = drops.copy() if draws is not None else None
+        drops += num_drops
+
+        # Drops within one activity are applied one at a time, across all trials
+        for drop_num in range(int(num_drops.max())):
+            rows = np.flatnonzero(num_drops > drop_num)
+            _apply_batch_drops(gear_levels, level_sums, rows, rng, min_bonus, max_bonus,
+                               drops_received, total_upgrades, draws,
+                               None if draws is None else drops_before[rows] + drop_num,
+                               slot_sampler, focus_rows, tier_table, gear_tiers, drop_tiers)
+        if recorder is not None:
+            recorder.record(activity_num, level_sums, num_slots)
+
+    max_streaks = np.where(activities > 0, np.minimum(activities, max_achievable_streak), 1)
+
+    return {
+        "drops": drops,
+        "activities": activities,
+        "max_streaks": max_streaks,
+        "gear_levels": gear_levels,
+        "drops_received": drops_received,
+        "total_upgrades": total_upgrades,
+        "total_powers": level_sums,
+        "character_levels": np.minimum(450, level_sums // num_slots),
+        "starting_gear_level": starting_gear_level,
+        "trajectory": recorder.levels if recorder is not None else None,
+        "gear_tiers": gear_tiers,
+        "drop_tiers": drop_tiers,
+    }
+
+# ------------------------------
+# 4.  Monte-Carlo envelope
+# ------------------------------
+MONTE_CARLO_CHUNK_SIZE = 10_000      # trials simulated per batch; bounds peak memory
+UPGRADE_RATE_RESOLUTION = 10_000     # histogram bins per unit of upgrade rate
+ADAPTIVE_CHUNK_SIZE = 500            # trials between precision checks in adaptive runs
+SUMMARY_PERCENTILES = (5, 25, 50, 75, 95, 99)   # percentiles reported for every metric
+HISTOGRAM_MAX_BINS = 200             # summary histograms merge bins to stay within this many
+TRAJECTORY_PERCENTILES = (10, 50, 90)    # bands of the character level trajectory
+TRAJECTORY_POINTS = 12               # default checkpoints per session after the start
+
+ADAPTIVE_MAX_TRIALS = 100_000       # trial cap for precision-driven runs from the menu
+
+# Relative 95% confidence half-widths that precision-driven runs stop at
+DEFAULT_PRECISION_TARGETS = {"character_level_gains": 0.01, "upgrade_rate": 0.01}
+FULL_ANALYSIS_PRECISION_TARGETS = {"character_level_gains": 0.002, "upgrade_rate": 0.002}
+
+class MetricAccumulator:
+    """Streaming summary of one per-trial metric: running count, sum, min and max
+    plus a histogram of values * scale rounded to integer bins.
+
+    Integer metrics (scale=1) keep exact counts, so their percentiles match
+    np.percentile on the full array. Accumulators merge by adding histograms.
+    """
+    __slots__ = ("scale", "count", "total", "minimum", "maximum", "offset", "counts")
+
+    def __init__(self, scale=1):
+        self.scale = scale
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, values):
+        """Add a block of per-trial values"""
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.total += values.sum()
+        self._update_range(values.min(), values.max())
+        if self.scale == 1:
+            bins = values.astype(np.int64)
+        else:
+            bins = np.rint(values * self.scale).astype(np.int64)
+        low = int(bins.min())
+        self._add_histogram(low, np.bincount(bins - low))
+
+    def merge(self, other):
+        """Fold another accumulator for the same metric into this one"""
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.total += other.total
+        self._update_range(other.minimum, other.maximum)
+        self._add_histogram(other.offset, other.counts)
+
+    def _update_range(self, minimum, maximum):
+        self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+        self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+
+    def _add_histogram(self, offset, counts):
+        if self.counts.size == 0:
+            self.offset, self.counts = offset, counts.astype(np.int64)
+            return
+        low = min(self.offset, offset)
+        high = max(self.offset + self.counts.size, offset + counts.size)
+        merged = np.zeros(high - low, dtype=np.int64)
+        merged[self.offset - low:self.offset - low + self.counts.size] += self.counts
+        merged[offset - low:offset - low + counts.size] += counts
+        self.offset, self.counts = low, merged
+
+    def percentiles(self, qs, cumulative=None):
+        """Linearly interpolated percentiles, as np.percentile computes them, from one pass over the histogram.
+
+        `cumulative` is np.cumsum(self.counts) when the caller already has it.
+        """
+        if cumulative is None:
+            cumulative = self.counts.cumsum()
+        ranks, fractions = _percentile_ranks(self.count, tuple(qs))
+        lower_values, upper_values = cumulative.searchsorted(ranks, side="right").tolist()
+        # A handful of values: plain float arithmetic beats NumPy's per-call overhead
+        return [(self.offset + (lower + fraction * (upper - lower))) / self.scale
+                for lower, upper, fraction in zip(lower_values, upper_values, fractions)]
+
+    def percentile(self, q):
+        """Linearly interpolated percentile, as np.percentile computes it"""
+        return self.percentiles([q])[0]
+
+    def histogram(self, max_bins=HISTOGRAM_MAX_BINS, cumulative=None):
+        """Compact histogram: {"start", "width", "counts"}, bins merged to at most max_bins"""
+        return compact_histogram(self.offset, self.counts, self.scale, max_bins, cumulative)
+
+    def mean(self):
+        return self.total / self.count
+
+    def std(self):
+        """Sample standard deviation, computed from the histogram"""
+        if self.count < 2:
+            return 0.0
+        values = (self.offset + np.arange(self.counts.size)) / self.scale
+        mean = np.dot(self.counts, values) / self.count
+        return float(np.sqrt(np.dot(self.counts, (values - mean) ** 2) / (self.count - 1)))
+
+    def confidence_half_width(self, z=1.96):
+        """Half-width of the normal-approximation confidence interval for the mean (95% by default)"""
+        return z * self.std() / np.sqrt(self.count)
+
+    def summary(self):
+        # One cumulative sum serves every percentile and the merged histogram bins
+        cumulative = self.counts.cumsum()
+        percentiles = self.percentiles(SUMMARY_PERCENTILES, cumulative)
+        return {
+            "average": self.mean(),
+            "95%_tile": percentiles[SUMMARY_PERCENTILES.index(95)],
+            "min": self.minimum,
+            "max": self.maximum,
+            "percentiles": {f"p{q}": value for q, value in zip(SUMMARY_PERCENTILES, percentiles)},
+            "histogram": self.histogram(cumulative=cumulative),
         }
-    
-    # Calculate upgrade statistics
-    upgrade_rates = np.array([gt.get_summary()["upgrade_rate"] for gt in gear_trackers])
-    total_upgrades = np.array([gt.get_summary()["total_upgrades"] for gt in gear_trackers])
-    
+
+@functools.lru_cache(maxsize=64)
+def _percentile_ranks(count, qs):
+    """Sorted ranks bracketing each percentile of `count` values and the weight of the upper one.
+
+    Every metric of a Monte Carlo run has the same count, so this is shared by all of them.
+    """
+    position = (count - 1) * np.asarray(qs, dtype=np.float64) / 100
+    lower = np.floor(position).astype(np.int64)
+    return np.stack([lower, np.minimum(lower + 1, count - 1)]), (position - lower).tolist()
+
+def compact_histogram(offset, counts, scale=1, max_bins=HISTOGRAM_MAX_BINS, cumulative=None):
+    """Histogram of integer bins offset..offset+len(counts)-1 (values * scale) as
+    {"start", "width", "counts"}, merging neighbouring bins by 1, 2, 5, 10, 20, ...
+    until at most max_bins remain. Bin i covers [start + i*width, start + (i+1)*width).
+    Merged bins are differences of `cumulative` (np.cumsum(counts)) at their edges.
+    """
+    if counts.size <= max_bins:
+        start, factor, merged = offset, 1, counts
+    else:
+        widths = (step * 10 ** exponent for exponent in itertools.count() for step in (1, 2, 5))
+        factor = next(width for width in widths if (offset + counts.size - 1) // width - offset // width < max_bins)
+        start = offset // factor * factor
+        if cumulative is None:
+            cumulative = np.cumsum(counts)
+        num_bins = -(-(offset - start + counts.size) // factor)
+        ends = np.minimum(np.arange(1, num_bins + 1) * factor + (start - offset), counts.size)
+        totals = cumulative[ends - 1]
+        merged = totals - np.concatenate(([0], totals[:-1]))
     return {
-        "drops": {
-            "average": drops.mean(),
-            "95%_tile": np.percentile(drops, 95),
-            "min": drops.min(),
-            "max": drops.max(),
-        },
-        "activities": {
-            "average": activities.mean(),
-            "95%_tile": np.percentile(activities, 95),
-            "min": activities.min(),
-            "max": activities.max(),
-        },
-        "max_streak": {
-            "average": max_streaks.mean(),
-            "95%_tile": np.percentile(max_streaks, 95),
-            "min": max_streaks.min(),
-            "max": max_streaks.max(),
-        },
-        "gear": {
-            "total_power": {
-                "average": total_powers.mean(),
-                "95%_tile": np.percentile(total_powers, 95),
-                "min": total_powers.min(),
-                "max": total_powers.max(),
-            },
-            "character_level": {
-                "average": character_levels.mean(),
-                "95%_tile": np.percentile(character_levels, 95),
-                "min": character_levels.min(),
-                "max": character_levels.max(),
-            },
-            "character_level_gains": {
-                "average": character_level_gains.mean(),
-                "95%_tile": np.percentile(character_level_gains, 95),
-                "min": character_level_gains.min(),
-                "max": character_level_gains.max(),
-            },
-            "upgrade_rate": {
-                "average": upgrade_rates.mean(),
-                "95%_tile": np.percentile(upgrade_rates, 95),
-                "min": upgrade_rates.min(),
-                "max": upgrade_rates.max(),
-            },
-            "total_upgrades": {
-                "average": total_upgrades.mean(),
-                "95%_tile": np.percentile(total_upgrades, 95),
-                "min": total_upgrades.min(),
-                "max": total_upgrades.max(),
+        "start": start / scale if scale != 1 else start,
+        "width": factor / scale if scale != 1 else factor,
+        "counts": merged.tolist(),
+    }
+
+def session_checkpoints(total_time_hours, points=TRAJECTORY_POINTS):
+    """Evenly spaced checkpoint hours from the start to the end of a session"""
+    return tuple(np.linspace(0, total_time_hours, points + 1).tolist())
+
+class TrajectoryAccumulator:
+    """Mergeable character level distribution at each checkpoint of a session.
+
+    simulate_batch() trajectories are folded into one checkpoints x levels
+    count matrix, so memory depends on the checkpoint count only.
+    """
+    __slots__ = ("checkpoints", "unit", "count", "counts")
+
+    def __init__(self, checkpoints, unit="hours"):
+        self.checkpoints = tuple(checkpoints)
+        self.unit = unit
+        self.count = 0
+        self.counts = np.zeros((len(self.checkpoints), 451), dtype=np.int64)
+
+    def update(self, trajectory):
+        """Add a trials x checkpoints block of character levels"""
+        num_checkpoints, num_levels = self.counts.shape
+        # One bincount over every checkpoint: cell = checkpoint * levels + level
+        cells = trajectory + np.arange(0, num_checkpoints * num_levels, num_levels)
+        self.counts += np.bincount(cells.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+        self.count += trajectory.shape[0]
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.count += other.count
+
+    def percentiles(self, qs):
+        """Linearly interpolated percentiles of the level at every checkpoint: one list per q"""
+        ranks, fractions = _percentile_ranks(self.count, tuple(qs))
+        bands = [[] for _ in qs]
+        for cumulative in self.counts.cumsum(axis=1):
+            lower_values, upper_values = cumulative.searchsorted(ranks, side="right").tolist()
+            for band, lower, upper, fraction in zip(bands, lower_values, upper_values, fractions):
+                band.append(lower + fraction * (upper - lower))
+        return bands
+
+    def summary(self):
+        """Checkpoints with the average and percentile bands of character level at each"""
+        bands = self.percentiles(TRAJECTORY_PERCENTILES)
+        return {
+            "unit": self.unit,
+            "checkpoints": list(self.checkpoints),
+            "average": (self.counts @ np.arange(self.counts.shape[1]) / self.count).tolist(),
+            **{f"p{q}": band for q, band in zip(TRAJECTORY_PERCENTILES, bands)},
+        }
+
+class TierAccumulator:
+    """Mergeable gear tier counts: drops per tier, slots per tier and full-set tiers.
+
+    A trial's set tier is its lowest slot tier: the tier its whole set has reached.
+    """
+    __slots__ = ("trials", "drop_counts", "slot_counts", "set_counts")
+
+    def __init__(self):
+        self.trials = 0
+        self.drop_counts = np.zeros(NUM_TIERS, dtype=np.int64)
+        self.slot_counts = np.zeros((len(ALL_GEAR_SLOTS), NUM_TIERS), dtype=np.int64)
+        self.set_counts = np.zeros(NUM_TIERS, dtype=np.int64)
+
+    def update(self, gear_tiers, drop_tiers):
+        """Add a trials x slots block of slot tiers and the drops of each tier behind them"""
+        num_slots = gear_tiers.shape[1]
+        self.drop_counts += drop_tiers
+        # One bincount over every slot: cell = slot * tiers + tier - 1
+        cells = gear_tiers + np.arange(-1, num_slots * NUM_TIERS - 1, NUM_TIERS)
+        self.slot_counts += np.bincount(cells.ravel(), minlength=self.slot_counts.size).reshape(self.slot_counts.shape)
+        self.set_counts += np.bincount(gear_tiers.min(axis=1) - 1, minlength=NUM_TIERS)
+        self.trials += gear_tiers.shape[0]
+
+    def merge(self, other):
+        self.drop_counts += other.drop_counts
+        self.slot_counts += other.slot_counts
+        self.set_counts += other.set_counts
+        self.trials += other.trials
+
+    def summary(self):
+        """Shares of drops, slots and full sets at each tier, plus average tiers"""
+        tiers = np.arange(1, NUM_TIERS + 1)
+
+        def shares(counts):
+            total = counts.sum()
+            return {f"T{tier}": float(count / total) if total else 0.0 for tier, count in zip(tiers, counts)}
+
+        def average(counts):
+            total = counts.sum()
+            return float(counts @ tiers / total) if total else None
+
+        slot_totals = self.slot_counts.sum(axis=0)
+        return {
+            "drop_shares": shares(self.drop_counts),
+            "slot_shares": shares(slot_totals),
+            "set_tier": shares(self.set_counts),
+            "average_drop_tier": average(self.drop_counts),
+            "average_slot_tier": average(slot_totals),
+            "slots": {slot: average(counts) for slot, counts in zip(ALL_GEAR_SLOTS, self.slot_counts)},
+        }
+
+def trial_metrics(batch, starting_gear_level):
+    """Per-trial arrays of every MonteCarloAccumulator metric for a simulate_batch() result"""
+    drops = batch["drops"]
+    total_upgrades = batch["total_upgrades"]
+    character_levels = batch["character_levels"]
+    return {
+        "drops": drops,
+        "activities": batch["activities"],
+        "max_streak": batch["max_streaks"],
+        "total_power": batch["total_powers"],
+        "character_level": character_levels,
+        "character_level_gains": character_levels - starting_gear_level,
+        "upgrade_rate": np.divide(total_upgrades, drops, out=np.zeros(drops.shape), where=drops > 0),
+        "total_upgrades": total_upgrades,
+    }
+
+class MonteCarloAccumulator:
+    """Mergeable Monte Carlo statistics built up from simulate_batch() chunks.
+
+    Memory depends only on the spread of each metric, not on the trial count.
+    """
+    METRICS = ("drops", "activities", "max_streak", "total_power", "character_level",
+               "character_level_gains", "upgrade_rate", "total_upgrades")
+
+    def __init__(self, starting_gear_level, checkpoints=None, checkpoint_unit="hours", tiers=False):
+        self.starting_gear_level = starting_gear_level
+        self.trials = 0
+        # Character level bands over the session, when the batches record trajectories
+        self.trajectory = TrajectoryAccumulator(checkpoints, checkpoint_unit) if checkpoints is not None else None
+        # Gear tier shares, when the batches track tiers
+        self.tiers = TierAccumulator() if tiers else None
+        self.metrics = {
+            name: MetricAccumulator(UPGRADE_RATE_RESOLUTION if name == "upgrade_rate" else 1)
+            for name in self.METRICS
+        }
+        self.slot_levels = [MetricAccumulator() for _ in ALL_GEAR_SLOTS]
+        self.slot_drop_totals = np.zeros(len(ALL_GEAR_SLOTS), dtype=np.int64)
+
+    def update(self, batch):
+        """Add the per-trial arrays of one simulate_batch() result"""
+        values = trial_metrics(batch, self.starting_gear_level)
+        for name, accumulator in self.metrics.items():
+            accumulator.update(values[name])
+        for slot_index, accumulator in enumerate(self.slot_levels):
+            accumulator.update(batch["gear_levels"][:, slot_index])
+        self.slot_drop_totals += batch["drops_received"].sum(axis=0)
+        if self.trajectory is not None:
+            self.trajectory.update(batch["trajectory"])
+        if self.tiers is not None:
+            self.tiers.update(batch["gear_tiers"], batch["drop_tiers"])
+        self.trials += batch["drops"].size
+
+    def merge(self, other):
+        """Fold the statistics of another accumulator into this one"""
+        for name, accumulator in self.metrics.items():
+            accumulator.merge(other.metrics[name])
+        for accumulator, other_accumulator in zip(self.slot_levels, other.slot_levels):
+            accumulator.merge(other_accumulator)
+        self.slot_drop_totals += other.slot_drop_totals
+        if self.trajectory is not None:
+            self.trajectory.merge(other.trajectory)
+        if self.tiers is not None:
+            self.tiers.merge(other.tiers)
+        self.trials += other.trials
+
+    def relative_half_width(self, name, z=1.96):
+        """Confidence half-width of a metric's average relative to that average"""
+        accumulator = self.metrics[name]
+        half_width = accumulator.confidence_half_width(z)
+        mean = abs(accumulator.mean())
+        if mean == 0:
+            return 0.0 if half_width == 0 else float("inf")
+        return half_width / mean
+
+    def precision_report(self, targets):
+        """Target, achieved relative half-width and met flag for each targeted metric"""
+        report = {}
+        for name, target in targets.items():
+            achieved = float(self.relative_half_width(name))
+            report[name] = {"target": target, "achieved": achieved, "met": achieved <= target}
+        return report
+
+    def precision_met(self, targets):
+        return all(entry["met"] for entry in self.precision_report(targets).values())
+
+    def summary(self, slots=True):
+        """Statistics dict in the format returned by monte_carlo(); slots=False leaves out the per-slot statistics"""
+        slot_stats = {}
+        for slot_index, slot in enumerate(ALL_GEAR_SLOTS if slots else ()):
+            levels = self.slot_levels[slot_index].summary()
+            slot_stats[slot] = {
+                "avg_level": levels["average"],
+                "max_level": levels["max"],
+                "min_level": levels["min"],
+                "avg_drops": self.slot_drop_totals[slot_index] / self.trials,
+                "95%_level": levels["95%_tile"],
+                "percentiles": levels["percentiles"],
+                "histogram": levels["histogram"],
+            }
+
+        metrics = {name: accumulator.summary() for name, accumulator in self.metrics.items()}
+        return {
+            "trials": self.trials,
+            "drops": metrics["drops"],
+            "activities": metrics["activities"],
+            "max_streak": metrics["max_streak"],
+            "gear": {
+                "total_power": metrics["total_power"],
+                "character_level": metrics["character_level"],
+                "character_level_gains": metrics["character_level_gains"],
+                "upgrade_rate": metrics["upgrade_rate"],
+                "total_upgrades": metrics["total_upgrades"],
+                "slots": slot_stats if slots else None
             },
-            "slots": slot_stats
+            "trajectory": self.trajectory.summary() if self.trajectory is not None else None,
+            "tiers": self.tiers.summary() if self.tiers is not None else None,
         }
+
+# Optional phase timers (e.g. the API's metrics.Metrics): an object with
+# phase(name) -> context manager and count(name, value, **labels). None skips them.
+instrumentation = None
+
+def _simulate_chunk(task):
+    """Simulate one chunk of trials and reduce it to a MonteCarloAccumulator.
+
+    Module-level so it can run in a worker process; everything it needs,
+    including the SimConfig, travels in `task`.
+    """
+    system_name, chunk_trials, config, chunk_seed, checkpoints, checkpoint_unit = task
+    rng = np.random.default_rng(chunk_seed)
+    accumulator = MonteCarloAccumulator(config.starting_gear_level, checkpoints, checkpoint_unit, config.tiers)
+    if instrumentation is None:
+        accumulator.update(simulate_batch(system_name, chunk_trials, rng=rng, config=config,
+                                          checkpoints=checkpoints, checkpoint_unit=checkpoint_unit))
+        return accumulator
+
+    with instrumentation.phase("simulate"):
+        batch = simulate_batch(system_name, chunk_trials, rng=rng, config=config,
+                               checkpoints=checkpoints, checkpoint_unit=checkpoint_unit)
+    with instrumentation.phase("aggregate"):
+        accumulator.update(batch)
+    return accumulator
+
+def _count_chunk(system_name, chunk_accumulator):
+    """Count a finished chunk's trials and drops.
+
+    Called where chunks are merged rather than in _simulate_chunk, whose
+    counts would stay in the worker process that ran it.
+    """
+    if instrumentation is None:
+        return
+    instrumentation.count("trials", chunk_accumulator.trials, system=system_name)
+    instrumentation.count("drops_simulated", int(chunk_accumulator.metrics["drops"].total), system=system_name)
+
+def _validate_targets(targets):
+    unknown = set(targets) - set(MonteCarloAccumulator.METRICS)
+    if unknown:
+        raise ValueError(f"Unknown precision metric(s): {', '.join(sorted(unknown))}; "
+                         f"expected one of {', '.join(MonteCarloAccumulator.METRICS)}")
+    for name, target in targets.items():
+        if not target > 0:
+            raise ValueError(f"Precision target for {name} must be positive")
+
+def iter_monte_carlo(system_name, trials=50_000, streak_bonuses=None, drop_ranges=None, seed=None,
+                     chunk_size=None, workers=1, total_time_hours=None,
+                     starting_gear_level=None, targets=None, config=None, checkpoints=None,
+                     checkpoint_unit="hours"):
+    """Simulate trials in chunks, yielding the running MonteCarloAccumulator after each one.
+
+    Chunk i draws from its own stream spawned from `seed` and chunks are merged
+    in order, so a given seed and chunk size produce bit-identical results for
+    any number of worker processes. workers=None uses every CPU.
+
+    With `targets` ({metric: relative 95% CI half-width}), `trials` is a cap:
+    iteration stops after the first chunk at which every target is met.
+    With `checkpoints`, the accumulator also keeps character level bands at
+    each checkpoint (see simulate_batch()).
+    """
+    if targets:
+        _validate_targets(targets)
+    if chunk_size is None:
+        chunk_size = ADAPTIVE_CHUNK_SIZE if targets else MONTE_CARLO_CHUNK_SIZE
+    config = resolve_config(config, streak_bonuses=streak_bonuses, drop_ranges=drop_ranges,
+                            total_time_hours=total_time_hours, starting_gear_level=starting_gear_level)
+    num_chunks = -(-trials // chunk_size)
+    chunk_seeds = np.random.SeedSequence(seed).spawn(num_chunks)
+    tasks = [
+        (system_name, min(chunk_size, trials - chunk_index * chunk_size), config, chunk_seed,
+         checkpoints, checkpoint_unit)
+        for chunk_index, chunk_seed in enumerate(chunk_seeds)
+    ]
+
+    accumulator = MonteCarloAccumulator(config.starting_gear_level, checkpoints, checkpoint_unit, config.tiers)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or num_chunks <= 1:
+        for task in tasks:
+            chunk_accumulator = _simulate_chunk(task)
+            _count_chunk(system_name, chunk_accumulator)
+            accumulator.merge(chunk_accumulator)
+            yield accumulator
+            if targets and accumulator.precision_met(targets):
+                return
+        return
+
+    pool = ProcessPoolExecutor(max_workers=min(workers, num_chunks))
+    try:
+        for chunk_accumulator in pool.map(_simulate_chunk, tasks):
+            _count_chunk(system_name, chunk_accumulator)
+            accumulator.merge(chunk_accumulator)
+            yield accumulator
+            if targets and accumulator.precision_met(targets):
+                return
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def monte_carlo(system_name, trials=50_000, streak_bonuses=None, drop_ranges=None, seed=None,
+                chunk_size=None, workers=1, total_time_hours=None,
+                starting_gear_level=None, targets=None, config=None, checkpoints=None,
+                checkpoint_unit="hours"):
+    """Run `trials` sessions through the batch engine and return summary statistics.
+
+    Trials are aggregated chunk by chunk, so memory stays flat for any trial
+    count; workers > 1 shards the chunks across a process pool. With
+    `targets`, trials run until every metric's relative 95% CI half-width is
+    within its target or `trials` is reached; the result's "trials" is the
+    number used and "precision" reports each target. With `checkpoints`
+    (session hours, or activity counts with checkpoint_unit="activities"),
+    "trajectory" holds the average and 10th/50th/90th percentile character
+    level at each checkpoint.
+    """
+    config = resolve_config(config, streak_bonuses=streak_bonuses, drop_ranges=drop_ranges,
+                            total_time_hours=total_time_hours, starting_gear_level=starting_gear_level)
+    accumulator = MonteCarloAccumulator(config.starting_gear_level, checkpoints, checkpoint_unit, config.tiers)
+    for accumulator in iter_monte_carlo(system_name, trials, seed=seed, chunk_size=chunk_size, workers=workers,
+                                        targets=targets, config=config, checkpoints=checkpoints,
+                                        checkpoint_unit=checkpoint_unit):
+        pass
+    summary = accumulator.summary()
+    if targets:
+        summary["precision"] = accumulator.precision_report(targets)
+    return summary
+
+# ------------------------------
+# 5.  Progression to max level
+# ------------------------------
+MAX_PROGRESSION_HOURS = 2000         # give up on trials that have not reached 450 by then
+
+def progression_sessions(total_time_hours, max_hours=MAX_PROGRESSION_HOURS):
+    """Session numbers (from 1) that start within max_hours of back-to-back play.
+
+    Sessions that cannot last (total_time_hours <= 0) never reach max, so
+    there are none, and the count is always bounded.
+    """
+    if not total_time_hours > 0:
+        return range(1, 1)
+    return range(1, math.ceil(max_hours / total_time_hours) + 1)
+
+def simulate_until_max(system_name, trials, streak_bonuses=None, drop_ranges=None, rng=None,
+                       total_time_hours=None, starting_gear_level=None, max_hours=MAX_PROGRESSION_HOURS,
+                       config=None):
+    """Play back-to-back sessions until each trial reaches character level 450.
+
+    Every session follows run_sim() (fresh efficiency factor, streaks reset
+    between sessions) while gear carries over. Trials leave the active batch
+    as soon as they reach 450, so long horizons stay cheap. Returns per-trial
+    arrays of hours, activities, drops and sessions to max; trials still
+    short of 450 after max_hours have reached_max False and NaN hours, as
+    do all trials when total_time_hours is not positive.
+    Gear tiers do not affect levels and are not tracked here.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    config = resolve_config(config, streak_bonuses=streak_bonuses, drop_ranges=drop_ranges,
+                            total_time_hours=total_time_hours, starting_gear_level=starting_gear_level)
+    total_time_hours = config.total_time_hours
+    starting_gear_level = config.starting_gear_level
+
+    plan = compile_plan(system_name, config)
+    min_bonus, max_bonus = plan.min_bonus, plan.max_bonus
+    base_time_per_activity, min_efficiency, max_efficiency = (plan.base_time_per_activity, plan.min_efficiency,
+                                                              plan.max_efficiency)
+    num_slots = len(ALL_GEAR_SLOTS)
+
+    hours_to_max = np.full(trials, np.nan)
+    activities_to_max = np.zeros(trials, dtype=np.int64)
+    drops_to_max = np.zeros(trials, dtype=np.int64)
+    sessions_to_max = np.zeros(trials, dtype=np.int64)
+
+    # State of the trials still playing, compacted whenever some reach max
+    trial_ids = np.arange(trials)
+    gear_levels = np.full((trials, num_slots), starting_gear_level, dtype=np.int16)
+    level_sums = np.full(trials, starting_gear_level * num_slots, dtype=np.int64)
+    activities_done = np.zeros(trials, dtype=np.int64)
+    drops_done = np.zeros(trials, dtype=np.int64)
+
+    if starting_gear_level >= 450:
+        hours_to_max[:] = 0
+        trial_ids = trial_ids[:0]
+
+    for session in progression_sessions(total_time_hours, max_hours):
+        if not trial_ids.size:
+            break
+        avg_activity_times = base_time_per_activity * rng.uniform(min_efficiency, max_efficiency, trial_ids.size)
+        session_activities = (total_time_hours * 60 / avg_activity_times).astype(np.int64)
+        focus_rows = None if plan.slot_sampler is None else plan.slot_sampler.session_rows(trial_ids.size, rng)
+        # Drop count at which each trial reached 450 during this activity
+        reached_at = np.zeros(trial_ids.size, dtype=np.int64)
+
+        for activity_num in range(1, int(session_activities.max(initial=0)) + 1):
+            base_drops = plan.base_drops(activity_num)
+            if plan.drop_variation:
+                num_drops = np.maximum(0, base_drops + rng.integers(-1, 2, trial_ids.size))
+            else:
+                num_drops = np.full(trial_ids.size, base_drops, dtype=np.int64)
+            num_drops[session_activities < activity_num] = 0
+
+            for drop_num in range(int(num_drops.max(initial=0))):
+                rows = np.flatnonzero(num_drops > drop_num)
+                _apply_batch_drops(gear_levels, level_sums, rows, rng, min_bonus, max_bonus,
+                                   slot_sampler=plan.slot_sampler, focus_rows=focus_rows)
+                newly_maxed = rows[(level_sums[rows] // num_slots >= 450) & (reached_at[rows] == 0)]
+                reached_at[newly_maxed] = drops_done[newly_maxed] + drop_num + 1
+
+            activities_done += session_activities >= activity_num
+            drops_done += num_drops
+            finished = reached_at > 0
+            if finished.any():
+                finished_ids = trial_ids[finished]
+                hours_to_max[finished_ids] = ((session - 1) * total_time_hours
+                                              + activity_num * avg_activity_times[finished] / 60)
+                activities_to_max[finished_ids] = activities_done[finished]
+                drops_to_max[finished_ids] = reached_at[finished]
+                sessions_to_max[finished_ids] = session
+
+                playing = ~finished
+                trial_ids = trial_ids[playing]
+                gear_levels = gear_levels[playing]
+                level_sums = level_sums[playing]
+                activities_done = activities_done[playing]
+                drops_done = drops_done[playing]
+                avg_activity_times = avg_activity_times[playing]
+                session_activities = session_activities[playing]
+                reached_at = reached_at[playing]
+                if focus_rows is not None:
+                    focus_rows = focus_rows[playing]
+                if not trial_ids.size:
+                    break
+
+    return {
+        "hours": hours_to_max,
+        "activities": activities_to_max,
+        "drops": drops_to_max,
+        "sessions": sessions_to_max,
+        "reached_max": ~np.isnan(hours_to_max),
+    }
+
+TIME_TO_MAX_HOURS_RESOLUTION = 10   # histogram bins per hour of time to max
+
+def _distribution_stats(values, scale=1):
+    """Average, percentiles, range and compact histogram of a per-trial metric.
+
+    Histogram bins are values * scale rounded down to integers.
+    """
+    percentiles = np.percentile(values, SUMMARY_PERCENTILES)
+    bins = np.floor(values * scale).astype(np.int64)
+    low = int(bins.min())
+    return {
+        "average": values.mean(),
+        "95%_tile": percentiles[SUMMARY_PERCENTILES.index(95)],
+        "min": values.min(),
+        "max": values.max(),
+        "percentiles": {f"p{q}": value for q, value in zip(SUMMARY_PERCENTILES, percentiles.tolist())},
+        "histogram": compact_histogram(low, np.bincount(bins - low), scale),
+    }
+
+def time_to_max(system_name, trials=1000, streak_bonuses=None, drop_ranges=None, seed=None,
+                total_time_hours=None, starting_gear_level=None, max_hours=MAX_PROGRESSION_HOURS, config=None):
+    """Distribution of hours, activities, drops and sessions needed to reach level 450.
+
+    Statistics cover the trials that reached max within max_hours; they are
+    None when no trial did.
+    """
+    result = simulate_until_max(system_name, trials, streak_bonuses, drop_ranges,
+                                rng=np.random.default_rng(seed),
+                                total_time_hours=total_time_hours,
+                                starting_gear_level=starting_gear_level,
+                                max_hours=max_hours, config=config)
+    reached = result["reached_max"]
+    summary = {
+        metric: _distribution_stats(result[metric][reached], TIME_TO_MAX_HOURS_RESOLUTION if metric == "hours" else 1)
+        if reached.any() else None
+        for metric in ("hours", "activities", "drops", "sessions")
     }
+    summary["trials"] = trials
+    summary["reached_max"] = int(reached.sum())
+    return summary
+
+# ------------------------------
+# 6.  Common random numbers
+# ------------------------------
+PAIRED_METRICS = ("drops", "activities", "character_level", "character_level_gains",
+                  "upgrade_rate", "total_upgrades")
+
+class _DrawColumns:
+    """`depth` rows of uniform draws per trial and column, generated lazily in fixed blocks"""
+    BLOCK = 64
+
+    def __init__(self, seed, trials, depth):
+        self._rng = np.random.default_rng(seed)
+        self.trials = trials
+        # Draws of the first `columns` columns; capacity doubles as needed
+        self.columns = 0
+        self.values = np.empty((depth, trials, 0))
+
+    def ensure(self, needed):
+        """Generate columns until the first `needed` exist; returns the draws"""
+        while self.columns < needed:
+            if self.columns == self.values.shape[2]:
+                grown = np.empty(self.values.shape[:2] + (max(2 * self.columns, self.BLOCK),))
+                grown[:, :, :self.columns] = self.values
+                self.values = grown
+            block = self._rng.random(self.values.shape[:2] + (self.BLOCK,))
+            self.values[:, :, self.columns:self.columns + self.BLOCK] = block
+            self.columns += self.BLOCK
+        return self.values
+
+class CommonRandomNumbers:
+    """Per-trial random draws addressed by purpose rather than by draw order.
+
+    Trial i's efficiency factor, its pinnacle variation on activity a, its
+    focus slot and the slot, bonus, bad-luck protection and tier draws of its
+    k-th drop are fixed values, whatever configuration consumes them. Simulating
+    two configs with the same draws therefore couples their trials, and
+    per-trial differences carry only the effect of the config change. Draw
+    columns are generated lazily in fixed blocks.
+    """
+
+    def __init__(self, trials, seed=None):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        efficiency_seed, variation_seed, drop_seed, protection_seed, focus_seed, tier_seed = seed.spawn(6)
+        self.trials = trials
+        self.efficiency = np.random.default_rng(efficiency_seed).random(trials)
+        self._variation_rng = np.random.default_rng(variation_seed)
+        self._variations = []
+        self._drops = _DrawColumns(drop_seed, trials, 2)
+        self._protection = _DrawColumns(protection_seed, trials, 1)
+        self._tiers = _DrawColumns(tier_seed, trials, 1)
+        self._focus_seed = focus_seed
+        self._focus = None
+
+    @property
+    def focus(self):
+        """Uniform draw of every trial's rotating focus slot"""
+        if self._focus is None:
+            self._focus = np.random.default_rng(self._focus_seed).random(self.trials)
+        return self._focus
+
+    def variation(self, activity_num):
+        """Pinnacle drop variation (-1, 0 or +1) of every trial on activity `activity_num`"""
+        while len(self._variations) < activity_num:
+            self._variations.append(self._variation_rng.integers(-1, 2, self.trials))
+        return self._variations[activity_num - 1]
+
+    def drop_uniforms(self, rows, drop_index):
+        """Slot and level bonus uniforms of drop number `drop_index` (per row) for trials `rows`"""
+        draws = self._drops.ensure(int(drop_index.max(initial=-1)) + 1)
+        return draws[0, rows, drop_index], draws[1, rows, drop_index]
+
+    def protection_uniforms(self, rows, drop_index):
+        """Bad-luck protection uniforms of drop number `drop_index` (per row) for trials `rows`"""
+        return self._protection.ensure(int(drop_index.max(initial=-1)) + 1)[0, rows, drop_index]
+
+    def tier_uniforms(self, rows, drop_index):
+        """Gear tier uniforms of drop number `drop_index` (per row) for trials `rows`"""
+        return self._tiers.ensure(int(drop_index.max(initial=-1)) + 1)[0, rows, drop_index]
+
+class RunningMoments:
+    """Mergeable count, mean and sum of squared deviations of a stream of values"""
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        count, mean = values.size, values.mean()
+        m2 = float(((values - mean) ** 2).sum())
+        # Chan et al. parallel combination of two sets of moments
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def confidence_half_width(self, z=1.96):
+        return z * np.sqrt(self.variance() / self.count) if self.count else float("inf")
+
+def _paired_config(config):
+    """Fill a paired-comparison config with defaults and build its SimConfig"""
+    config = dict(config)
+    config.setdefault("system_name", "solo")
+    config.setdefault("label", config["system_name"])
+    if config["system_name"] not in DEFAULT_SYSTEMS:
+        raise ValueError(f"Unknown system '{config['system_name']}'")
+    config["sim_config"] = resolve_config(
+        config.get("sim_config"),
+        **{name: config.get(name) for name in ("total_time_hours", "starting_gear_level", "streak_bonuses",
+                                               "drop_ranges", "slot_rules", "tiers", "tier_odds")})
+    return config
+
+def paired_comparison(configs, trials=10_000, seed=None, chunk_size=MONTE_CARLO_CHUNK_SIZE, metrics=PAIRED_METRICS):
+    """Compare two or more configs on common random numbers.
+
+    Each config is a dict of system_name, streak_bonuses, drop_ranges,
+    slot_rules, total_time_hours, starting_gear_level (or a SimConfig as sim_config) and
+    an optional label. Every chunk
+    of trials is simulated once per config from the same CommonRandomNumbers,
+    so trial i sees the same efficiency, slot picks and drop bonuses under
+    every config. Returns per-config means and, for every pair (a, b), the
+    mean difference b - a with its 95% CI half-width, the half-width
+    independent runs of the same size would give, and the variance reduction.
+    """
+    configs = [_paired_config(config) for config in configs]
+    if len(configs) < 2:
+        raise ValueError("A paired comparison needs at least two configs")
+    pairs = [(a, b) for a in range(len(configs)) for b in range(a + 1, len(configs))]
+    config_moments = [{metric: RunningMoments() for metric in metrics} for _ in configs]
+    difference_moments = {pair: {metric: RunningMoments() for metric in metrics} for pair in pairs}
+
+    num_chunks = -(-trials // chunk_size)
+    for chunk_index, chunk_seed in enumerate(np.random.SeedSequence(seed).spawn(num_chunks)):
+        chunk_trials = min(chunk_size, trials - chunk_index * chunk_size)
+        draws = CommonRandomNumbers(chunk_trials, chunk_seed)
+        values = []
+        for config, moments in zip(configs, config_moments):
+            batch = simulate_batch(config["system_name"], chunk_trials, draws=draws, config=config["sim_config"])
+            config_values = trial_metrics(batch, config["sim_config"].starting_gear_level)
+            for metric in metrics:
+                moments[metric].update(config_values[metric])
+            values.append(config_values)
+        for a, b in pairs:
+            for metric in metrics:
+                difference_moments[(a, b)][metric].update(values[b][metric] - values[a][metric])
+
+    comparisons = []
+    for a, b in pairs:
+        differences = {}
+        for metric in metrics:
+            moments = difference_moments[(a, b)][metric]
+            independent_variance = config_moments[a][metric].variance() + config_moments[b][metric].variance()
+            paired_variance = moments.variance()
+            differences[metric] = {
+                "mean_difference": float(moments.mean),
+                "ci_half_width": float(moments.confidence_half_width()),
+                "independent_ci_half_width": float(1.96 * np.sqrt(independent_variance / trials)),
+                # None when the paired difference is constant (e.g. identical activity counts)
+                "variance_reduction": float(independent_variance / paired_variance) if paired_variance > 0 else None,
+            }
+        comparisons.append({"a": configs[a]["label"], "b": configs[b]["label"], "differences": differences})
+
+    return {
+        "trials": trials,
+        "configs": [
+            {"label": config["label"],
+             "means": {metric: float(moments[metric].mean) for metric in metrics},
+             "ci_half_widths": {metric: float(moments[metric].confidence_half_width()) for metric in metrics}}
+            for config, moments in zip(configs, config_moments)
+        ],
+        "comparisons": comparisons,
+    }
+
+def print_paired_comparison(result):
+    """Print the per-pair differences returned by paired_comparison()"""
+    print(f"=== PAIRED COMPARISON ({result['trials']} common-random-number trials) ===")
+    for comparison in result["comparisons"]:
+        print(f"\n{comparison['b']} - {comparison['a']}:")
+        for metric, difference in comparison["differences"].items():
+            reduction = difference['variance_reduction']
+            reduction = "exact" if reduction is None else f"x{reduction:.1f}"
+            print(f"  {metric:22s} {difference['mean_difference']:+9.4f} ± {difference['ci_half_width']:.4f}"
+                  f"   (independent runs: ± {difference['independent_ci_half_width']:.4f}, "
+                  f"variance reduction {reduction})")
 
 def print_single_run_results(system_name, streak_bonuses=None):
     """Run and display results for a single simulation"""
@@ -389,27 +1836,20 @@ def print_single_run_results(system_name, streak_bonuses=None):
     levels = list(gear_tracker.gear_levels.values())
     print(f"\nGear Level Range: {min(levels)} - {max(levels)} (spread: {max(levels) - min(levels)})")
 
-def print_average_results(system_name, trials=100, streak_bonuses=None):
-    """Run multiple simulations and show average results"""
+def print_average_results(system_name, trials=100, streak_bonuses=None, targets=None):
+    """Run multiple simulations and show average results.
+
+    With precision `targets`, `trials` is a cap and runs stop once every target is met.
+    """
+    stats = monte_carlo(system_name, trials=trials, streak_bonuses=streak_bonuses, targets=targets)
+    trials = stats['trials']
     print(f"=== AVERAGE {system_name.upper()} RESULTS ({trials} runs) ===")
-    stats = monte_carlo(system_name, trials=trials, streak_bonuses=streak_bonuses)
+    if targets:
+        print_precision(stats['precision'])
     drops = stats['drops']
     activities = stats['activities']
     gear = stats['gear']
     
-    # Calculate time to max level ranges based on progression rates from 4-hour sessions
-    time_estimates = []
-    for _ in range(min(500, trials)):  # Sample runs to get progression rate variability
-        test_drops, test_activities, test_gear_tracker, test_max_streak, test_streak_info = run_sim(system_name, streak_bonuses, None)
-        current_level = test_gear_tracker.get_character_level()
-        levels_gained = current_level - STARTING_GEAR_LEVEL
-        
-        if levels_gained > 0:  # Only calculate if there was progression
-            levels_per_hour = levels_gained / TOTAL_TIME_HOURS
-            levels_needed = 450 - current_level
-            hours_to_max = levels_needed / levels_per_hour
-            time_estimates.append(hours_to_max)
-    
     # Basic averages
     print(f"Average Drops: {drops['average']:.1f}")
     print(f"Average Activities: {activities['average']:.1f}")
@@ -428,7 +1868,7 @@ def print_average_results(system_name, trials=100, streak_bonuses=None):
         print(f"Average levels gained per hour: {levels_per_hour:.2f}")
         print(f"Average levels gained per activity: {levels_per_activity:.3f}")
         
-        # Calculate time to max level (450) at this pace
+        # Simulate back-to-back sessions until level 450 instead of extrapolating this one
         current_avg_level = gear['character_level']['average']
         levels_needed = 450 - current_avg_level
         
@@ -436,29 +1876,7 @@ def print_average_results(system_name, trials=100, streak_bonuses=None):
         if levels_needed <= 0:
             print(f"🎉 MAX LEVEL REACHED! Average character already at/above cap!")
         else:
-            hours_to_max = levels_needed / levels_per_hour if levels_per_hour > 0 else float('inf')
-            
-            if hours_to_max < float('inf'):
-                if hours_to_max < 1000:  # Only show if reasonable
-                    print(f"Levels still needed: {levels_needed:.1f}")
-                    print(f"Estimated time: {hours_to_max:.1f} hours ({hours_to_max/24:.1f} days)")
-                    
-                    # Show range information based on progression rate variability
-                    if time_estimates:
-                        avg_time_estimate = sum(time_estimates) / len(time_estimates)
-                        min_time_estimate = min(time_estimates)
-                        max_time_estimate = max(time_estimates)
-                        print(f"Time range based on progression variability (from {len(time_estimates)} sessions): "
-                              f"avg={avg_time_estimate:.1f}h range=({min_time_estimate:.1f}-{max_time_estimate:.1f}h)")
-                    
-                    # Calculate activities needed based on average activities per hour
-                    activities_per_hour = activities['average'] / TOTAL_TIME_HOURS
-                    activities_to_max = hours_to_max * activities_per_hour
-                    print(f"Estimated activities: ~{activities_to_max:.0f}")
-                else:
-                    print(f"Estimated time: {hours_to_max:.0f}+ hours (very slow progression)")
-            else:
-                print("Unable to calculate - no progression detected")
+            print_time_to_max(time_to_max(system_name, trials=trials, streak_bonuses=streak_bonuses))
     
     # Range information
     print(f"\nRANGES ACROSS {trials} RUNS:")
@@ -468,59 +1886,36 @@ def print_average_results(system_name, trials=100, streak_bonuses=None):
     print(f"Character Level: {gear['character_level']['min']}-{gear['character_level']['max']}")
     print(f"Character Level Gains: {gear['character_level_gains']['min']:.1f}-{gear['character_level_gains']['max']:.1f}")
 
+def print_precision(precision):
+    """Print the precision report of an adaptive monte_carlo() run"""
+    for name, entry in precision.items():
+        status = "met" if entry['met'] else "NOT met (trial cap reached)"
+        print(f"Precision {name}: ±{entry['achieved']:.2%} of the average (target ±{entry['target']:.2%}) - {status}")
+
+def print_time_to_max(stats):
+    """Print the simulated time-to-max distribution returned by time_to_max()"""
+    trials = stats['trials']
+    print(f"Runs that hit max level (450): {stats['reached_max']}/{trials} ({stats['reached_max']/trials:.1%}) "
+          f"within {MAX_PROGRESSION_HOURS} hours")
+    if stats['hours'] is None:
+        print("Unable to calculate - no run reached max level")
+        return
+    
+    hours = stats['hours']
+    print(f"Time:       avg={hours['average']:.1f} hours ({hours['average']/24:.1f} days)  "
+          f"95%≤{hours['95%_tile']:.1f}  range=({hours['min']:.1f}-{hours['max']:.1f})")
+    for label, key in (("Sessions", "sessions"), ("Activities", "activities"), ("Drops", "drops")):
+        metric = stats[key]
+        print(f"{label + ':':11s} avg={metric['average']:.1f}  95%≤{metric['95%_tile']:.1f}  "
+              f"range=({metric['min']}-{metric['max']})")
+
 def analyze_time_to_max_level(system_name, trials=1000, streak_bonuses=None):
-    """Analyze how long it takes to reach maximum level (450)"""
+    """Analyze how long it takes to reach maximum level (450) over back-to-back sessions"""
     print(f"=== TIME TO MAX LEVEL ANALYSIS ({system_name.upper()}) ===")
-    
-    results = []
-    max_level_reached = []
-    time_estimates = []  # Track time estimates based on progression rates
-    
-    for _ in range(trials):
-        drops, activities, gear_tracker, max_streak, streak_info = run_sim(system_name, streak_bonuses, None)
-        final_level = gear_tracker.get_character_level()
-        max_level_reached.append(final_level)
-        levels_gained = final_level - STARTING_GEAR_LEVEL
-        
-        if levels_gained > 0:  # Calculate time estimate based on progression rate
-            levels_per_hour = levels_gained / TOTAL_TIME_HOURS
-            levels_needed = 450 - final_level
-            hours_to_max = levels_needed / levels_per_hour
-            time_estimates.append(hours_to_max)
-        
-        if final_level == 450:
-            results.append((drops, activities))
-    
-    max_reached = max(max_level_reached)
-    avg_reached = sum(max_level_reached) / len(max_level_reached)
-    
-    print(f"Results from {trials} simulations:")
-    print(f"Highest level reached: {max_reached}")
-    print(f"Average level reached: {avg_reached:.1f}")
-    print(f"Runs that hit max level (450): {len(results)}/{trials} ({len(results)/trials:.1%})")
-    
-    # Calculate time statistics based on progression rate estimates
-    if time_estimates:
-        avg_time_hours = sum(time_estimates) / len(time_estimates)
-        min_time_hours = min(time_estimates)
-        max_time_hours = max(time_estimates)
-        
-        print(f"\nTO REACH MAX LEVEL (450):")
-        print(f"Estimated time based on progression rates: {avg_time_hours:.1f} hours (range: {min_time_hours:.1f}-{max_time_hours:.1f})")
-        
-        if results:  # If any runs actually reached max level, show drop/activity stats too
-            avg_drops = sum(r[0] for r in results) / len(results)
-            avg_activities = sum(r[1] for r in results) / len(results)
-            min_drops = min(r[0] for r in results)
-            max_drops = max(r[0] for r in results)
-            min_activities = min(r[1] for r in results)
-            max_activities = max(r[1] for r in results)
-            print(f"Average drops needed: {avg_drops:.1f} (range: {min_drops}-{max_drops})")
-            print(f"Average activities needed: {avg_activities:.1f} (range: {min_activities}-{max_activities})")
-    else:
-        print(f"\nNOTE: No progression detected in any runs to calculate time estimates.")
-        if not results:
-            print(f"No runs reached max level in {TOTAL_TIME_HOURS} hours - estimates based on longer progression needed.")
+    print(f"Results from {trials} simulations of back-to-back {TOTAL_TIME_HOURS}-hour sessions "
+          f"starting at level {STARTING_GEAR_LEVEL}:")
+    print(f"\nTO REACH MAX LEVEL (450):")
+    print_time_to_max(time_to_max(system_name, trials=trials, streak_bonuses=streak_bonuses))
 
 def show_menu():
     """Display menu options"""
@@ -530,14 +1925,15 @@ def show_menu():
     print("1. Single run (Solo)")
     print("2. Single run (Fireteam)")
     print("3. Single run (Pinnacle Ops)")
-    print("4. Average of 100 runs (Solo)")
-    print("5. Average of 100 runs (Fireteam)")
-    print("6. Average of 100 runs (Pinnacle Ops)")
+    print("4. Average results, runs until ±1% precise (Solo)")
+    print("5. Average results, runs until ±1% precise (Fireteam)")
+    print("6. Average results, runs until ±1% precise (Pinnacle Ops)")
     print("7. Time to max level analysis (Solo)")
     print("8. Time to max level analysis (Fireteam)")
     print("9. Time to max level analysis (Pinnacle Ops)")
     print("10. Full statistical analysis (Original)")
-    print("11. Exit")
+    print("11. Paired comparison of all systems (common random numbers)")
+    print("12. Exit")
     print("="*60)
 
 if __name__ == "__main__":
@@ -550,15 +1946,15 @@ if __name__ == "__main__":
         # Interactive menu
         while True:
             show_menu()
-            choice = input("Select option (1-11): ").strip()
+            choice = input("Select option (1-12): ").strip()
             
-            if choice == "11":
+            if choice == "12":
                 print("Goodbye!")
                 sys.exit(0)
-            elif choice in ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10"]:
+            elif choice in ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11"]:
                 break
             else:
-                print("Invalid choice. Please select 1-11.\n")
+                print("Invalid choice. Please select 1-12.\n")
     
     # Execute based on choice
     if choice == "1":
@@ -568,11 +1964,11 @@ if __name__ == "__main__":
     elif choice == "3":
         print_single_run_results("pinnacle")
     elif choice == "4":
-        print_average_results("solo", 100)
+        print_average_results("solo", ADAPTIVE_MAX_TRIALS, targets=DEFAULT_PRECISION_TARGETS)
     elif choice == "5":
-        print_average_results("fireteam", 100)
+        print_average_results("fireteam", ADAPTIVE_MAX_TRIALS, targets=DEFAULT_PRECISION_TARGETS)
     elif choice == "6":
-        print_average_results("pinnacle", 100)
+        print_average_results("pinnacle", ADAPTIVE_MAX_TRIALS, targets=DEFAULT_PRECISION_TARGETS)
     elif choice == "7":
         analyze_time_to_max_level("solo", 1000)
     elif choice == "8":
@@ -582,26 +1978,14 @@ if __name__ == "__main__":
     elif choice == "10":
         # Original full analysis
         for name in ["solo", "fireteam", "pinnacle"]:
-            print(f"=== {name.upper()} OPERATIONS (FULL ANALYSIS) ===")
-            stats = monte_carlo(name, trials=10000)
+            stats = monte_carlo(name, trials=ADAPTIVE_MAX_TRIALS, targets=FULL_ANALYSIS_PRECISION_TARGETS)
+            print(f"=== {name.upper()} OPERATIONS (FULL ANALYSIS, {stats['trials']} runs) ===")
+            print_precision(stats['precision'])
             drops = stats['drops']
             activities = stats['activities']
             max_streak = stats['max_streak']
             gear = stats['gear']
             
-            # Calculate time to max level ranges based on progression rates from 4-hour sessions
-            time_estimates = []
-            for _ in range(1000):  # Sample runs to get progression rate variability
-                test_drops, test_activities, test_gear_tracker, test_max_streak, test_streak_info = run_sim(name, None, None)
-                current_level = test_gear_tracker.get_character_level()
-                levels_gained = current_level - STARTING_GEAR_LEVEL
-                
-                if levels_gained > 0:  # Only calculate if there was progression
-                    levels_per_hour = levels_gained / TOTAL_TIME_HOURS
-                    levels_needed = 450 - current_level
-                    hours_to_max = levels_needed / levels_per_hour
-                    time_estimates.append(hours_to_max)
-            
             # Basic drop and activity stats
             print(f"Drops:      avg={drops['average']:.1f}  95%≤{drops['95%_tile']:.1f} "
                   f"range=({drops['min']}, {drops['max']})")
@@ -625,35 +2009,12 @@ if __name__ == "__main__":
                 levels_per_hour = char_level_gains['average'] / TOTAL_TIME_HOURS
                 print(f"Progression: {levels_per_hour:.2f} levels/hour average")
                 
-                # Calculate time to max level (450) at this pace
-                current_avg_level = char_level['average']
-                levels_needed = 450 - current_avg_level
-                
-                if levels_needed <= 0:
+                # Simulate back-to-back sessions until level 450 instead of extrapolating this one
+                if char_level['average'] >= 450:
                     print(f"🎉 MAX LEVEL REACHED! Average character already at/above cap!")
                 else:
-                    hours_to_max = levels_needed / levels_per_hour if levels_per_hour > 0 else float('inf')
-                    
-                    if hours_to_max < float('inf'):
-                        if hours_to_max < 1000:  # Only show if reasonable
-                            print(f"Time to max level (450): {hours_to_max:.1f} hours ({hours_to_max/24:.1f} days)")
-                            
-                            # Show range information based on progression rate variability
-                            if time_estimates:
-                                avg_time_estimate = sum(time_estimates) / len(time_estimates)
-                                min_time_estimate = min(time_estimates)
-                                max_time_estimate = max(time_estimates)
-                                print(f"Time range based on progression variability (from {len(time_estimates)} sessions): "
-                                      f"avg={avg_time_estimate:.1f}h range=({min_time_estimate:.1f}-{max_time_estimate:.1f}h)")
-                            
-                            # Calculate activities needed based on average activities per hour
-                            activities_per_hour = activities['average'] / TOTAL_TIME_HOURS
-                            activities_to_max = hours_to_max * activities_per_hour
-                            print(f"Activities needed: ~{activities_to_max:.0f}")
-                        else:
-                            print(f"Time to max level: {hours_to_max:.0f}+ hours (very slow progression)")
-                    else:
-                        print("Unable to calculate max level time - no progression detected")
+                    print("Time to max level (450), simulated over back-to-back sessions:")
+                    print_time_to_max(time_to_max(name, trials=1000))
             
             # Upgrade statistics
             upgrade_rate = gear['upgrade_rate']
@@ -664,6 +2025,9 @@ if __name__ == "__main__":
                   f"range=({total_upgrades['min']}, {total_upgrades['max']})")    
             
             print("\n" + "="*70 + "\n")
+    elif choice == "11":
+        print_paired_comparison(paired_comparison(
+            [{"system_name": name} for name in ["solo", "fireteam", "pinnacle"]], trials=10_000))
     else:
         print(f"Unknown option: {choice}")
         show_menu()
\ No newline at end of file
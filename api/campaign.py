@@ -0,0 +1,288 @@
+"""Campaigns: schedules of play sessions with gear carried from one session to the next.
+
+A campaign plays a schedule of steps, e.g.
+
+    [{"system_name": "fireteam", "total_time_hours": 2, "until_level": 350},
+     {"system_name": "pinnacle", "total_time_hours": 1.5, "sessions": 10}]
+
+for a block of trials at once. Each session follows run_sim() rules (streaks
+start over every session) while every trial keeps its gear, drop counts
+and hours played. A step plays `sessions` sessions (default 1); with
+`until_level`, trials below that character level keep playing sessions and
+the others sit out, so every trial leaves the step at the level (or hits
+the session cap).
+
+The per-trial state, random stream included, is a CampaignState. It can be
+saved to a compact snapshot file and resumed later with the same results as
+an uninterrupted run, or branched into several continuations ("what if they
+switch to pinnacle at level 350?") that all start from the same gear and
+the same random draws, without replaying the shared prefix.
+
+Usage:
+    python campaign.py --schedule '[{"system_name": "fireteam", "total_time_hours": 2, "until_level": 350}]' \
+        --trials 2000 --seed 1 --save fireteam_350.npz
+    python campaign.py --resume fireteam_350.npz \
+        --schedule '[{"system_name": "pinnacle", "total_time_hours": 2, "until_level": 450}]'
+"""
+import json
+import math
+from dataclasses import replace
+
+import numpy as np
+
+import DropSim
+
+SNAPSHOT_VERSION = 1
+STEP_FIELDS = ("system_name", "total_time_hours", "sessions", "until_level")
+# Sessions one step may play; until_level steps of very short sessions would otherwise loop for hours
+MAX_STEP_SESSIONS = 10_000
+
+
+def normalize_step(step, config):
+    """A schedule step with every field filled in and checked.
+
+    total_time_hours defaults to the campaign config's session length.
+    sessions defaults to 1, or with until_level to as many sessions as fit
+    in DropSim.MAX_PROGRESSION_HOURS. Steps of more than MAX_STEP_SESSIONS
+    sessions raise ValueError.
+    """
+    unknown = set(step) - set(STEP_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown campaign step field(s): {', '.join(sorted(unknown))}; "
+                         f"expected {', '.join(STEP_FIELDS)}")
+    system_name = step.get("system_name")
+    if system_name not in DropSim.DEFAULT_SYSTEMS:
+        raise ValueError(f"Unknown system '{system_name}'")
+    total_time_hours = float(step.get("total_time_hours", config.total_time_hours))
+    if not total_time_hours > 0:
+        raise ValueError("Campaign session length must be positive")
+    until_level = step.get("until_level")
+    if until_level is not None:
+        until_level = int(until_level)
+    sessions = step.get("sessions")
+    if sessions is None:
+        sessions = math.ceil(DropSim.MAX_PROGRESSION_HOURS / total_time_hours) if until_level is not None else 1
+    sessions = int(sessions)
+    if sessions < 1:
+        raise ValueError("A campaign step needs at least one session")
+    if sessions > MAX_STEP_SESSIONS:
+        raise ValueError(f"A campaign step plays at most {MAX_STEP_SESSIONS} sessions, not {sessions}; "
+                         "use longer sessions or set fewer")
+    return {"system_name": system_name, "total_time_hours": total_time_hours, "sessions": sessions,
+            "until_level": until_level}
+
+
+class CampaignState:
+    """Per-trial state of a campaign between sessions.
+
+    Gear is a trials x slots int16 matrix like simulate_batch()'s; counters
+    (drops, activities, upgrades, sessions, hours) accumulate over every
+    session played. `rng` draws every session, so a state carries all it
+    needs to continue exactly where it stopped. `history` lists the steps played.
+    With config.tiers, gear_tiers (trials x slots) and drop_tiers (drops per
+    tier over every trial) carry the gear tiers along too.
+    """
+    ARRAYS = ("gear_levels", "drops_received", "drops", "activities", "total_upgrades", "sessions", "hours")
+    TIER_ARRAYS = ("gear_tiers", "drop_tiers")
+
+    def __init__(self, trials, config=None, seed=None):
+        self.config = config if config is not None else DropSim.default_config()
+        self.rng = np.random.default_rng(seed)
+        num_slots = len(DropSim.ALL_GEAR_SLOTS)
+        self.gear_levels = np.full((trials, num_slots), self.config.starting_gear_level, dtype=np.int16)
+        self.drops_received = np.zeros((trials, num_slots), dtype=np.int32)
+        self.drops = np.zeros(trials, dtype=np.int64)
+        self.activities = np.zeros(trials, dtype=np.int64)
+        self.total_upgrades = np.zeros(trials, dtype=np.int64)
+        self.sessions = np.zeros(trials, dtype=np.int32)
+        self.hours = np.zeros(trials, dtype=np.float64)
+        if self.config.tiers:
+            self.gear_tiers = np.ones((trials, num_slots), dtype=np.int8)
+            self.drop_tiers = np.zeros(DropSim.NUM_TIERS, dtype=np.int64)
+        self.history = []
+
+    @property
+    def arrays(self):
+        """Names of the per-trial state arrays this state keeps"""
+        return self.ARRAYS + self.TIER_ARRAYS if self.config.tiers else self.ARRAYS
+
+    @property
+    def trials(self):
+        return self.gear_levels.shape[0]
+
+    @property
+    def character_levels(self):
+        return np.minimum(450, self.gear_levels.sum(axis=1, dtype=np.int64) // self.gear_levels.shape[1])
+
+    def play_session(self, system_name, total_time_hours, rows=None):
+        """Play one session of `system_name` for the trials in `rows` (every trial by default)"""
+        if rows is None:
+            rows = np.arange(self.trials)
+        config = replace(self.config, total_time_hours=total_time_hours)
+        batch = DropSim.simulate_batch(system_name, rows.size, rng=self.rng, config=config,
+                                       initial_gear_levels=self.gear_levels[rows],
+                                       initial_gear_tiers=self.gear_tiers[rows] if config.tiers else None)
+        self.gear_levels[rows] = batch["gear_levels"]
+        if config.tiers:
+            self.gear_tiers[rows] = batch["gear_tiers"]
+            self.drop_tiers += batch["drop_tiers"]
+        self.drops_received[rows] += batch["drops_received"]
+        self.drops[rows] += batch["drops"]
+        self.activities[rows] += batch["activities"]
+        self.total_upgrades[rows] += batch["total_upgrades"]
+        self.sessions[rows] += 1
+        self.hours[rows] += total_time_hours
+
+    def play_step(self, step):
+        """Play one schedule step (see normalize_step) and add it to the history"""
+        step = normalize_step(step, self.config)
+        for _ in range(step["sessions"]):
+            rows = None
+            if step["until_level"] is not None:
+                rows = np.flatnonzero(self.character_levels < step["until_level"])
+                if not rows.size:
+                    break
+            self.play_session(step["system_name"], step["total_time_hours"], rows)
+        self.history.append(step)
+
+    def branch(self):
+        """An independent copy that continues with the same gear and the same random draws"""
+        state = CampaignState.__new__(CampaignState)
+        state.config = self.config
+        state.rng = _generator(self.rng.bit_generator.state)
+        for name in self.arrays:
+            setattr(state, name, getattr(self, name).copy())
+        state.history = list(self.history)
+        return state
+
+    def save(self, path):
+        """Write the state to a compressed .npz snapshot"""
+        metadata = {
+            "version": SNAPSHOT_VERSION,
+            "config": self.config.to_dict(),
+            "history": self.history,
+            "rng": self.rng.bit_generator.state,
+        }
+        np.savez_compressed(path, metadata=np.array(json.dumps(metadata)),
+                            **{name: getattr(self, name) for name in self.arrays})
+
+    @classmethod
+    def load(cls, path):
+        """Read a snapshot written by save()"""
+        with np.load(path) as data:
+            metadata = json.loads(str(data["metadata"]))
+            if metadata["version"] != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported campaign snapshot version {metadata['version']}")
+            state = cls.__new__(cls)
+            state.config = DropSim.SimConfig(**metadata["config"])
+            for name in state.arrays:
+                setattr(state, name, data[name])
+        state.rng = _generator(metadata["rng"])
+        state.history = metadata["history"]
+        return state
+
+    def summary(self):
+        """Statistics of the campaign so far, in the style of monte_carlo()'s"""
+        character_levels = self.character_levels
+        upgrade_rates = np.divide(self.total_upgrades, self.drops, out=np.zeros(self.trials), where=self.drops > 0)
+        metrics = {
+            "character_level": (character_levels, 1),
+            "character_level_gains": (character_levels - self.config.starting_gear_level, 1),
+            "drops": (self.drops, 1),
+            "activities": (self.activities, 1),
+            "sessions": (self.sessions, 1),
+            "total_upgrades": (self.total_upgrades, 1),
+            "upgrade_rate": (upgrade_rates, DropSim.UPGRADE_RATE_RESOLUTION),
+        }
+        stats = {}
+        for name, (values, scale) in metrics.items():
+            accumulator = DropSim.MetricAccumulator(scale)
+            accumulator.update(values)
+            stats[name] = accumulator.summary()
+        stats["hours"] = DropSim._distribution_stats(self.hours, DropSim.TIME_TO_MAX_HOURS_RESOLUTION)
+        stats["trials"] = self.trials
+        stats["reached_max"] = int((character_levels >= 450).sum())
+        stats["tiers"] = None
+        if self.config.tiers:
+            tiers = DropSim.TierAccumulator()
+            tiers.update(self.gear_tiers, self.drop_tiers)
+            stats["tiers"] = tiers.summary()
+        stats["history"] = self.history
+        return stats
+
+
+def _generator(bit_generator_state):
+    """A NumPy Generator restored from a bit generator state dict"""
+    bit_generator = getattr(np.random, bit_generator_state["bit_generator"])()
+    bit_generator.state = bit_generator_state
+    return np.random.Generator(bit_generator)
+
+
+def schedule_hours(schedule, config=None):
+    """Most session hours a trial can play in `schedule`, counting until_level steps at their session cap"""
+    config = config if config is not None else DropSim.default_config()
+    steps = [normalize_step(step, config) for step in schedule]
+    return sum(step["sessions"] * step["total_time_hours"] for step in steps)
+
+
+def run_campaign(schedule, trials=1000, seed=None, config=None, state=None, progress=None):
+    """Play `schedule` (a list of steps) for `trials` fresh trials, or continue `state`.
+
+    `progress(steps_done, steps)` is called after every step; an exception
+    raised by it stops the campaign. Returns the CampaignState after the last step.
+    """
+    if state is None:
+        state = CampaignState(trials, config, seed)
+    for steps_done, step in enumerate(schedule, 1):
+        state.play_step(step)
+        if progress is not None:
+            progress(steps_done, len(schedule))
+    return state
+
+
+def run_branches(state, branches, progress=None):
+    """Continue `state` with each of `branches` ({name: schedule}).
+
+    Every branch starts from its own copy of the same state, so the branches
+    see the same random draws and differ only by their schedules. `state`
+    itself is left as it was. `progress(name, steps_done, steps)` follows
+    every step. Returns {name: CampaignState}.
+    """
+    return {
+        name: run_campaign(schedule, state=state.branch(),
+                           progress=None if progress is None else
+                           lambda steps_done, steps, name=name: progress(name, steps_done, steps))
+        for name, schedule in branches.items()
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Play a DropSim campaign: a schedule of sessions with gear carried over.")
+    parser.add_argument("--schedule", type=json.loads, default=[], help="JSON list of steps")
+    parser.add_argument("--branches", type=json.loads,
+                        help='JSON object of named schedules to try after --schedule, e.g. \'{"pinnacle": [...]}\'')
+    parser.add_argument("--trials", type=int, default=1000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--resume", help="snapshot to continue instead of starting fresh trials")
+    parser.add_argument("--save", help="write the state after --schedule to this snapshot")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    state = CampaignState.load(args.resume) if args.resume else None
+    state = run_campaign(args.schedule, trials=args.trials, seed=args.seed, state=state)
+    if args.save:
+        state.save(args.save)
+    results = {"campaign": state.summary()}
+    if args.branches:
+        results.update({name: branch.summary() for name, branch in run_branches(state, args.branches).items()})
+    print(f"Played {state.trials} trials in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    for name, stats in results.items():
+        level, hours = stats["character_level"], stats["hours"]
+        print(f"{name}: level avg={level['average']:.1f} p50={level['percentiles']['p50']:.0f} "
+              f"95%<={level['95%_tile']:.0f}  hours avg={hours['average']:.1f}  "
+              f"sessions avg={stats['sessions']['average']:.1f}  at max {stats['reached_max']}/{stats['trials']}")
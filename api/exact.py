@@ -0,0 +1,385 @@
+"""Exact (sampling-free) solver for the DropSim gear progression.
+
+The gear dynamics in GearTracker.apply_drop form a finite Markov chain: each
+drop picks a uniform slot and lands at character level + U(min_bonus,
+max_bonus), capped at 450. Slots are interchangeable, so a state is the sorted
+multiset of slot offsets relative to character level, and each state carries a
+probability vector over character level. The state distribution is propagated
+drop by drop and mixed over the exact distribution of drops per session.
+Weighted slot rules break that symmetry, and gear tiers are not part of the
+state, so configs with either are refused.
+"""
+import numpy as np
+
+import DropSim
+from DropSim import ALL_GEAR_SLOTS
+
+MAX_LEVEL = 450
+DEFAULT_TOLERANCE = 1e-12    # states less likely than this are pruned
+PERCENTILE_METHOD = "inverse_cdf"   # percentiles are the smallest values whose CDF reaches p / 100
+
+
+def activity_count_pmf(system_name, total_time_hours):
+    """Exact distribution of activities completed in one session.
+
+    run_sim draws efficiency ~ U(lo, hi) and completes int(minutes / (base * efficiency))
+    activities, so P(A = a) is the share of [lo, hi] mapping to a.
+    """
+    base_time_per_activity, min_efficiency, max_efficiency = DropSim.get_activity_time_params(system_name)
+    scaled_time = total_time_hours * 60 / base_time_per_activity
+    max_activities = int(scaled_time / min_efficiency)
+    pmf = np.zeros(max_activities + 1)
+    for activities in range(max_activities + 1):
+        low = scaled_time / (activities + 1)
+        high = scaled_time / activities if activities > 0 else np.inf
+        pmf[activities] = max(0.0, min(max_efficiency, high) - max(min_efficiency, low))
+    return pmf / (max_efficiency - min_efficiency)
+
+
+def drop_count_pmf(system_name, total_time_hours, streak_bonuses=None):
+    """Exact distribution of drops per session, mixed over the activity count"""
+    plan = DropSim.compile_plan(system_name, DropSim.SimConfig(total_time_hours, streak_bonuses=streak_bonuses))
+    activities_pmf = activity_count_pmf(system_name, total_time_hours)
+
+    drops_pmf = np.zeros(1)
+    drops_given_activities = np.ones(1)  # drop distribution after the first `activities` activities
+    drops_pmf[0] = activities_pmf[0]
+    for activities in range(1, activities_pmf.size):
+        base_drops = plan.base_drops(activities)
+        activity_pmf = np.zeros(base_drops + 2)
+        if plan.drop_variation:
+            # ±1 drop variation, floored at 0
+            for variation in (-1, 0, 1):
+                activity_pmf[max(0, base_drops + variation)] += 1 / 3
+        else:
+            activity_pmf[base_drops] = 1.0
+        drops_given_activities = np.convolve(drops_given_activities, activity_pmf)
+        if activities_pmf[activities] > 0:
+            if drops_pmf.size < drops_given_activities.size:
+                drops_pmf = np.pad(drops_pmf, (0, drops_given_activities.size - drops_pmf.size))
+            drops_pmf[:drops_given_activities.size] += activities_pmf[activities] * drops_given_activities
+    return np.trim_zeros(drops_pmf, "b"), activities_pmf
+
+
+def _pmf_stats(pmf, offset=0, tolerance=DEFAULT_TOLERANCE):
+    """Mean, percentiles (inverse CDF) and range of a distribution.
+
+    The p-th percentile is the smallest value whose CDF reaches p / 100, so
+    it is always a value the metric can take; Monte Carlo summaries
+    interpolate linearly between samples like np.percentile instead, so
+    results carry "percentile_method". min/max ignore values less likely
+    than `tolerance`. There is no sampled histogram; the distribution
+    itself is exact.
+    """
+    values = np.arange(pmf.size) + offset
+    total = pmf.sum()
+    support = np.flatnonzero(pmf > tolerance)
+    cdf = np.cumsum(pmf) / total
+    quantiles = np.asarray(DropSim.SUMMARY_PERCENTILES) / 100
+    percentiles = values[np.minimum(np.searchsorted(cdf, quantiles), pmf.size - 1)].tolist()
+    return {
+        "average": float((values * pmf).sum() / total),
+        "95%_tile": int(values[min(np.searchsorted(cdf, 0.95), pmf.size - 1)]),
+        "min": int(values[support[0]]),
+        "max": int(values[support[-1]]),
+        "percentiles": {f"p{q}": value for q, value in zip(DropSim.SUMMARY_PERCENTILES, percentiles)},
+        "histogram": None,
+    }
+
+
+def _shift_add(target, offset, values):
+    """target[offset:offset + len(values)] += values, growing target as needed"""
+    end = offset + values.size
+    if end > target.size:
+        target = np.pad(target, (0, end - target.size))
+    target[offset:end] += values
+    return target
+
+
+class _TransitionTable:
+    """Cached transitions for one bonus set, grouped by character-level shift.
+
+    Rows are (source state, destination state, level shift, weight); the
+    upgrade vector holds each state's total weight of upgrading transitions.
+    """
+
+    def __init__(self, bonuses):
+        self.bonuses = bonuses
+        self.covered = 0
+        self.rows = [np.zeros(0, dtype=np.int64)] * 3 + [np.zeros(0)]
+        self.upgrade_weights = np.zeros(0)
+        self.groups = []
+
+    def extend(self, sources, destinations, shifts, weights, upgrade_weights):
+        """Add transitions for newly covered states and rebuild the groups"""
+        # Different slots or bonuses often lead to the same state: merge them
+        transitions, merged = np.unique(np.stack([sources, destinations, shifts]), axis=1, return_inverse=True)
+        sources, destinations, shifts = transitions
+        weights = np.bincount(merged.ravel(), weights=weights)
+        self.rows = [np.concatenate([old, new]) for old, new in
+                     zip(self.rows, (sources, destinations, shifts, weights))]
+        self.upgrade_weights = np.concatenate([self.upgrade_weights, upgrade_weights])
+        sources, destinations, shifts, weights = self.rows
+        order = np.lexsort((destinations, shifts))
+        self.groups = []
+        for shift in np.unique(shifts):
+            selected = order[shifts[order] == shift]
+            group_destinations, starts = np.unique(destinations[selected], return_index=True)
+            self.groups.append((int(shift), sources[selected], weights[selected, None], group_destinations, starts))
+
+
+class _GearChain:
+    """Distribution over gear states after a number of drops.
+
+    `offsets` holds one sorted row of slot-level offsets from character level
+    per known state; `probs[i, c]` is the probability of state i at character
+    level starting_gear_level + first_column + c. Cells below `tolerance` are
+    pruned. Away from the 450 cap the chain is translation invariant, so the
+    transitions of each state are computed once and reused on every drop.
+    """
+
+    def __init__(self, starting_gear_level, min_bonus, max_bonus, tolerance):
+        self.starting_gear_level = starting_gear_level
+        self.bonuses = np.arange(min_bonus, max_bonus + 1)
+        self.tolerance = tolerance
+        self.offsets = np.zeros((1, len(ALL_GEAR_SLOTS)), dtype=np.int16)
+        self.state_ids = {self.offsets[0].tobytes(): 0}
+        self.probs = np.ones((1, 1))
+        self.first_column = 0
+        self.truncated = 0.0
+        self.tables = {}
+
+    def _bonus_weights(self):
+        """Weight of each effective bonus per character-level column, or None
+        when no column is close enough to 450 for the cap to matter.
+
+        Near 450 the bonus is clipped to 450 - level, which folds several
+        bonuses together.
+        """
+        highest_level = self.starting_gear_level + self.first_column + self.probs.shape[1] - 1
+        if highest_level + self.bonuses[-1] <= MAX_LEVEL:
+            return None
+        levels = self.starting_gear_level + self.first_column + np.arange(self.probs.shape[1])
+        effective = np.minimum(self.bonuses[:, None], MAX_LEVEL - levels[None, :])
+        weights = {}
+        for bonus in np.unique(effective):
+            weights[int(bonus)] = (effective == bonus).sum(axis=0) / self.bonuses.size
+        return weights
+
+    def _table(self, bonuses):
+        """Transition table for `bonuses`, extended to cover every known state"""
+        table = self.tables.get(bonuses)
+        if table is None:
+            table = self.tables[bonuses] = _TransitionTable(bonuses)
+        if table.covered == len(self.offsets):
+            return table
+
+        state_ids = np.arange(table.covered, len(self.offsets))
+        offsets = self.offsets[state_ids]
+        num_slots = offsets.shape[1]
+        offset_sums = offsets.sum(axis=1, dtype=np.int64)
+
+        # Slots sharing a value transition identically: keep the first of each run
+        rows, positions = np.nonzero(np.concatenate(
+            [np.ones((len(state_ids), 1), dtype=bool), offsets[:, 1:] != offsets[:, :-1]], axis=1))
+        slot_values = offsets[rows, positions]
+        weight = (offsets[rows] == slot_values[:, None]).sum(axis=1) / (num_slots * len(bonuses))
+
+        candidates, shifts, upgrade_weights = [], [], np.zeros(len(state_ids))
+        for bonus in bonuses:
+            upgraded = bonus > slot_values
+            candidate = offsets[rows].copy()
+            candidate[upgraded, positions[upgraded]] = bonus
+            # A gain that lifts the level sum past a multiple of 8 raises character level
+            shift = (offset_sums[rows] + np.where(upgraded, bonus - slot_values, 0)) // num_slots
+            candidate -= shift.astype(np.int16)[:, None]
+            candidate.sort(axis=1)
+            candidates.append(candidate)
+            shifts.append(shift)
+            upgrade_weights += np.bincount(rows[upgraded], weights=weight[upgraded], minlength=len(state_ids))
+
+        candidates = np.concatenate(candidates)
+        destinations = np.empty(len(candidates), dtype=np.int64)
+        new_states = []
+        for index, candidate in enumerate(candidates):
+            key = candidate.tobytes()
+            state_id = self.state_ids.get(key)
+            if state_id is None:
+                state_id = self.state_ids[key] = len(self.offsets) + len(new_states)
+                new_states.append(candidate)
+            destinations[index] = state_id
+        if new_states:
+            self.offsets = np.concatenate([self.offsets, np.array(new_states)])
+
+        table.extend(np.tile(state_ids[rows], len(bonuses)), destinations, np.concatenate(shifts),
+                     np.tile(weight, len(bonuses)), upgrade_weights)
+        table.covered = state_ids[-1] + 1
+        return table
+
+    def step(self):
+        """Apply one drop; returns the probability that it was an upgrade"""
+        bonus_weights = self._bonus_weights()
+        if bonus_weights is None:
+            # Every bonus applies unclipped in every column
+            applied = [(self._table(tuple(int(bonus) for bonus in self.bonuses)), None)]
+        else:
+            applied = [(self._table((bonus,)), column_weights) for bonus, column_weights in bonus_weights.items()]
+
+        width = self.probs.shape[1]
+        max_shift = max(group[0] for table, _ in applied for group in table.groups)
+        probs = np.zeros((len(self.offsets), width + max_shift))
+        source_probs = np.zeros((len(self.offsets), width))
+        source_probs[:len(self.probs)] = self.probs
+        upgrade_probability = 0.0
+        for table, column_weights in applied:
+            state_totals = source_probs[:table.covered]
+            if column_weights is not None:
+                state_totals = state_totals * column_weights
+            upgrade_probability += table.upgrade_weights @ state_totals.sum(axis=1)
+            for shift, sources, weights, destinations, starts in table.groups:
+                contribution = source_probs[sources] * weights
+                if column_weights is not None:
+                    contribution *= column_weights
+                probs[destinations, shift:shift + width] += np.add.reduceat(contribution, starts, axis=0)
+
+        pruned = probs < self.tolerance
+        self.truncated += probs[pruned].sum()
+        probs[pruned] = 0.0
+        columns = np.flatnonzero(probs.any(axis=0))
+        self.probs = probs[:, columns[0]:columns[-1] + 1]
+        self.first_column += int(columns[0])
+        return upgrade_probability
+
+    def level_pmf(self):
+        """Character level distribution, indexed from starting_gear_level"""
+        return self.first_column, self.probs.sum(axis=0)
+
+    def power_pmf(self):
+        """Total power distribution, indexed from 8 * starting_gear_level"""
+        num_slots = self.offsets.shape[1]
+        width = self.probs.shape[1]
+        offset_sums = self.offsets.sum(axis=1)
+        pmf = np.zeros(width * num_slots)
+        for offset_sum in np.unique(offset_sums):
+            pmf[offset_sum::num_slots][:width] += self.probs[offset_sums == offset_sum].sum(axis=0)
+        return self.first_column * num_slots, pmf
+
+    def slot_level_pmf(self):
+        """Level distribution of any one slot, indexed from starting_gear_level"""
+        num_slots = self.offsets.shape[1]
+        lowest = int(self.offsets.min())
+        pmf = np.zeros(self.probs.shape[1] - lowest + int(self.offsets.max()))
+        for offset in np.unique(self.offsets):
+            share = (self.offsets == offset).sum(axis=1) / num_slots
+            column_pmf = share @ self.probs
+            pmf[offset - lowest:offset - lowest + column_pmf.size] += column_pmf
+        first_level = self.first_column + lowest
+        if first_level < 0:
+            # Slot levels never fall below the starting level
+            return 0, pmf[-first_level:]
+        return first_level, pmf
+
+
+def exact_distribution(system_name, streak_bonuses=None, drop_ranges=None, total_time_hours=None,
+                       starting_gear_level=None, tolerance=DEFAULT_TOLERANCE, config=None):
+    """Exact session statistics in the format returned by DropSim.monte_carlo().
+
+    Upgrade metrics only carry their exact average: the upgrade count is not
+    part of the chain state. `truncated_probability` reports the mass pruned
+    below `tolerance`. Settings come from `config` (a DropSim.SimConfig), with
+    any explicit keyword settings taking precedence.
+    """
+    config = DropSim.resolve_config(config, streak_bonuses=streak_bonuses, drop_ranges=drop_ranges,
+                                    total_time_hours=total_time_hours, starting_gear_level=starting_gear_level)
+    total_time_hours = config.total_time_hours
+    starting_gear_level = config.starting_gear_level
+    streak_bonuses = config.streak_bonus_map
+    if starting_gear_level > MAX_LEVEL:
+        raise ValueError(f"starting_gear_level must be at most {MAX_LEVEL}")
+
+    plan = DropSim.compile_plan(system_name, config)
+    if plan.slot_sampler is not None:
+        raise ValueError("Exact distributions assume uniform slot picks; use Monte Carlo with slot rules")
+    if plan.tier_table is not None:
+        raise ValueError("Exact distributions do not track gear tiers; use Monte Carlo with tiers")
+    drops_pmf, activities_pmf = drop_count_pmf(system_name, total_time_hours, streak_bonuses)
+    max_achievable_streak = plan.max_achievable_streak
+    max_streak_pmf = np.zeros(max_achievable_streak + 1)
+    for activities, probability in enumerate(activities_pmf):
+        max_streak_pmf[min(activities, max_achievable_streak) if activities > 0 else 1] += probability
+
+    chain = _GearChain(starting_gear_level, plan.min_bonus, plan.max_bonus, tolerance)
+    num_slots = len(ALL_GEAR_SLOTS)
+    level_pmf = np.zeros(1)
+    power_pmf = np.zeros(1)
+    slot_pmf = np.zeros(1)
+    expected_upgrades = 0.0   # E[upgrades after n drops]
+    average_upgrades = 0.0
+    average_upgrade_rate = 0.0
+    for drops, probability in enumerate(drops_pmf):
+        if probability > 0:
+            offset, pmf = chain.level_pmf()
+            level_pmf = _shift_add(level_pmf, offset, probability * pmf)
+            offset, pmf = chain.power_pmf()
+            power_pmf = _shift_add(power_pmf, offset, probability * pmf)
+            offset, pmf = chain.slot_level_pmf()
+            slot_pmf = _shift_add(slot_pmf, offset, probability * pmf)
+            average_upgrades += probability * expected_upgrades
+            if drops > 0:
+                average_upgrade_rate += probability * expected_upgrades / drops
+        if drops < drops_pmf.size - 1:
+            expected_upgrades += chain.step()
+
+    slot_stats = _pmf_stats(slot_pmf, starting_gear_level)
+    average_drops = float((np.arange(drops_pmf.size) * drops_pmf).sum())
+    slot_summary = {
+        "avg_level": slot_stats["average"],
+        "max_level": slot_stats["max"],
+        "min_level": slot_stats["min"],
+        "avg_drops": average_drops / num_slots,
+        "95%_level": slot_stats["95%_tile"],
+        "percentiles": slot_stats["percentiles"],
+        "histogram": None,
+    }
+    unavailable = {"95%_tile": None, "min": None, "max": None, "percentiles": None, "histogram": None}
+    return {
+        "drops": _pmf_stats(drops_pmf),
+        "activities": _pmf_stats(activities_pmf),
+        "max_streak": _pmf_stats(max_streak_pmf),
+        "gear": {
+            "total_power": _pmf_stats(power_pmf, starting_gear_level * num_slots),
+            "character_level": _pmf_stats(level_pmf, starting_gear_level),
+            "character_level_gains": _pmf_stats(level_pmf),
+            "upgrade_rate": {"average": average_upgrade_rate, **unavailable},
+            "total_upgrades": {"average": average_upgrades, **unavailable},
+            "slots": {slot: dict(slot_summary) for slot in ALL_GEAR_SLOTS}
+        },
+        "method": "exact",
+        "percentile_method": PERCENTILE_METHOD,
+        "truncated_probability": float(chain.truncated),
+    }
+
+
+def print_validation(system_name, trials=100_000):
+    """Compare the exact solution against a Monte Carlo run of the batch engine"""
+    print(f"=== EXACT vs MONTE CARLO ({system_name.upper()}, {trials} trials) ===")
+    exact = exact_distribution(system_name)
+    sampled = DropSim.monte_carlo(system_name, trials=trials)
+    rows = [
+        ("Drops", exact["drops"], sampled["drops"]),
+        ("Activities", exact["activities"], sampled["activities"]),
+        ("Char Level", exact["gear"]["character_level"], sampled["gear"]["character_level"]),
+        ("Total Power", exact["gear"]["total_power"], sampled["gear"]["total_power"]),
+        ("Upgrade Rate", exact["gear"]["upgrade_rate"], sampled["gear"]["upgrade_rate"]),
+    ]
+    for label, exact_stats, sampled_stats in rows:
+        print(f"{label:13s} exact avg={exact_stats['average']:.4f}  monte carlo avg={sampled_stats['average']:.4f}")
+    print(f"Truncated probability: {exact['truncated_probability']:.2e}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    for name in sys.argv[1:] or ["solo", "fireteam", "pinnacle"]:
+        print_validation(name)
+        print()
@@ -1,7 +1,14 @@
-from flask import Flask, render_template, request, jsonify
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, Response, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 import os
-import json
-import numpy as np
+import gzip
+import hashlib
+import random
+import threading
+from itertools import zip_longest
 import sys
 
 # Import DropSim from the same directory
@@ -10,234 +17,1126 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
+# DropSim, and NumPy with it, is imported by load_dropsim() when a simulation
+# first needs it, so a cold start that only serves the page skips both
+DropSim = None
+_dropsim_lock = threading.Lock()
+_dropsim_unavailable = False
+
+from result_cache import ResultCache, make_key as make_cache_key, DEFAULT_DISK_DIR, DEFAULT_MAX_ENTRIES
+from jobs import JobManager, DEFAULT_MAX_WORKERS, DEFAULT_TTL_SECONDS
+from metrics import Metrics, PROMETHEUS_CONTENT_TYPE
+import numpy_json
+
+# Brotli is optional; without it responses fall back to gzip
 try:
-    from DropSim import ALL_GEAR_SLOTS, WEAPON_SLOTS, ARMOR_SLOTS
-    import DropSim
-except ImportError as e:
-    # Try alternative import for Vercel environment
-    try:
-        from .DropSim import ALL_GEAR_SLOTS, WEAPON_SLOTS, ARMOR_SLOTS
-        from . import DropSim
-    except ImportError as e2:
-        # If we still can't import, we'll define a minimal version
-        print(f"Warning: Could not import DropSim: {e}, {e2}")
-        ALL_GEAR_SLOTS = ["primary", "energy", "power", "helmet", "gloves", "chest", "legs", "class"]
-        WEAPON_SLOTS = ["primary", "energy", "power"]
-        ARMOR_SLOTS = ["helmet", "gloves", "chest", "legs", "class"]
-        DropSim = None
+    import brotli
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, encoding NumPy scalars and arrays in the same pass"""
+    @staticmethod
+    def default(obj):
+        try:
+            return numpy_json.default(obj)
+        except TypeError:
+            return DefaultJSONProvider.default(obj)
+
+app.json = NumpyJSONProvider(app)
+
 # Default configuration values
 DEFAULT_CONFIG = {
     'total_time_hours': 1.5,
     'starting_gear_level': 200
 }
 
-def convert_numpy_types(obj):
-    """Convert numpy types to Python native types for JSON serialization"""
-    if isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(item) for item in obj]
-    else:
-        return obj
+# Trials of back-to-back sessions used to estimate hours to max level for a single run
+SINGLE_RUN_TIME_TO_MAX_TRIALS = 200
+
+# Default Monte Carlo trials per system for /compare_systems
+COMPARE_TRIALS = 1000
+
+# Default trial cap per system when a request sets precision targets instead of trials
+ADAPTIVE_MAX_TRIALS = 20_000
+
+# Trial limit per system for /compare_systems, which runs within the request
+MAX_COMPARE_TRIALS = 100_000
+
+# Trials per Monte Carlo chunk in the API; also the granularity of job progress
+# and of streamed partial results
+API_CHUNK_SIZE = 100
+
+# Most character level checkpoints a request can ask for with "trajectory"
+MAX_TRAJECTORY_POINTS = 100
+
+# Longest session /exact_distribution solves; solve time grows quickly with session length
+# (about 3 s for all three systems at 4 hours)
+MAX_EXACT_HOURS = 4
+
+# Trial limit for POST /jobs, which is not bound by the request timeout
+MAX_JOB_TRIALS = 1_000_000
+
+# POST /sweep limits: grid points, and trials summed over the whole grid
+MAX_SWEEP_POINTS = 1000
+MAX_SWEEP_TOTAL_TRIALS = 10_000_000
+
+# POST /campaign limits: trials, and trials times the most session hours they can play
+CAMPAIGN_TRIALS = 2000
+MAX_CAMPAIGN_TRIALS = 100_000
+MAX_CAMPAIGN_TRIAL_HOURS = 20_000_000
+
+# POST /paired_comparison limits (it runs synchronously)
+MAX_PAIRED_CONFIGS = 8
+MAX_PAIRED_TRIALS = 100_000
+
+# JSON responses at least this large are compressed when the client accepts gzip or br
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Background warm-up after the first request: imports DropSim and compiles the
+# default config's plans. DROPSIM_WARMUP=0 turns it off.
+WARMUP_ENABLED = os.environ.get('DROPSIM_WARMUP', '1') != '0'
+WARMUP_TRIALS = 10
+_warm_up_lock = threading.Lock()
+_warm_up_scheduled = False
+
+# Precomputed surrogate tables (surrogate.py) answer unseeded requests inside
+# their grid by interpolation. DROPSIM_SURROGATE=0 turns them off.
+SURROGATE_ENABLED = os.environ.get('DROPSIM_SURROGATE', '1') != '0'
+
+# index.html body and ETag, loaded on the first request for /
+_index_page_cache = None
+
+# Worker processes a sweep job shards its chunks across
+SWEEP_WORKERS = int(os.environ.get('DROPSIM_SWEEP_WORKERS', 1))
+
+# Result cache: in-memory LRU plus JSON files under /tmp that warm serverless
+# instances can reuse. Set DROPSIM_CACHE_DIR to an empty string to disable the disk tier.
+result_cache = ResultCache(
+    max_entries=int(os.environ.get('DROPSIM_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+    disk_dir=os.environ.get('DROPSIM_CACHE_DIR', DEFAULT_DISK_DIR) or None,
+    json_default=numpy_json.default,
+)
+
+# Background executor for POST /jobs
+job_manager = JobManager(
+    max_workers=int(os.environ.get('DROPSIM_JOB_WORKERS', DEFAULT_MAX_WORKERS)),
+    ttl_seconds=int(os.environ.get('DROPSIM_JOB_TTL', DEFAULT_TTL_SECONDS)),
+)
+
+# Per-phase timers and counters for GET /metrics and the Server-Timing header.
+# DROPSIM_METRICS=0 turns them off and skips installing the request hooks.
+instrumentation = Metrics(enabled=os.environ.get('DROPSIM_METRICS', '1') != '0')
+
+if instrumentation.enabled:
+    class TimedJSONProvider(NumpyJSONProvider):
+        """Flask's JSON provider with encoding timed as the "encode" phase"""
+        def dumps(self, obj, **kwargs):
+            with instrumentation.phase('encode'):
+                return super().dumps(obj, **kwargs)
+    
+    app.json = TimedJSONProvider(app)
+    
+    @app.before_request
+    def start_request_timing():
+        instrumentation.start_request()
+    
+    @app.after_request
+    def add_server_timing(response):
+        server_timing = instrumentation.finish_request(request.endpoint, response.status_code)
+        if server_timing:
+            response.headers['Server-Timing'] = server_timing
+        return response
+
+@app.after_request
+def compress_response(response):
+    """gzip or Brotli-encode large JSON responses for clients that accept it"""
+    if (response.mimetype != 'application/json' or response.direct_passthrough
+            or response.status_code < 200 or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    accepted = request.accept_encodings
+    encoding = None
+    if brotli is not None and accepted['br']:
+        encoding = 'br'
+    elif accepted['gzip']:
+        encoding = 'gzip'
+    if encoding is None or response.content_length is None or response.content_length < COMPRESS_MIN_BYTES:
+        return response
+    
+    with instrumentation.phase('compress'):
+        body = response.get_data()
+        if encoding == 'br':
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def _parse_fields(data):
+    """The fields= selector from the query string or body, as (included, excluded) name sets.
+
+    "fields=drops,levels_per_hour" keeps only those fields of each result;
+    "fields=-statistical_ranges,-streak_info" drops those and keeps the rest.
+    """
+    fields = request.args.get('fields') or (data or {}).get('fields')
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    names = [name.strip() for name in fields if name.strip()]
+    included = {name for name in names if not name.startswith('-')}
+    excluded = {name[1:] for name in names if name.startswith('-')}
+    return included, excluded
+
+def _select_fields(result, fields):
+    """Copy of one result dict restricted by a _parse_fields selector"""
+    if fields is None or not isinstance(result, dict):
+        return result
+    included, excluded = fields
+    return {key: value for key, value in result.items()
+            if (not included or key in included or key == 'system_name') and key not in excluded}
+
+def _select_system_fields(results, fields):
+    """_select_fields applied to every system of a /compare_systems result"""
+    if fields is None or results is None:
+        return results
+    return {system_name: _select_fields(result, fields) for system_name, result in results.items()}
+
+def cache_lookup(cache_key):
+    """result_cache.get, timed as the "cache" phase"""
+    with instrumentation.phase('cache'):
+        return result_cache.get(cache_key)
+
+def load_dropsim():
+    """Import DropSim on first use; returns the module, or None if it is not available"""
+    global DropSim, _dropsim_unavailable
+    if DropSim is not None or _dropsim_unavailable:
+        return DropSim
+    with _dropsim_lock:
+        if DropSim is not None or _dropsim_unavailable:
+            return DropSim
+        started = time.perf_counter()
+        try:
+            import DropSim as module
+        except ImportError as e:
+            # Try alternative import for Vercel environment
+            try:
+                from . import DropSim as module
+            except ImportError as e2:
+                print(f"Warning: Could not import DropSim: {e}, {e2}")
+                _dropsim_unavailable = True
+                return None
+        if instrumentation.enabled:
+            module.instrumentation = instrumentation
+        startup_report['dropsim_import_seconds'] = time.perf_counter() - started
+        DropSim = module
+    return DropSim
+
+def _warm_up():
+    """Import DropSim and compile and exercise the default config's plans ahead of the first simulation"""
+    started = time.perf_counter()
+    module = load_dropsim()
+    if module is None:
+        return
+    import numpy as np
+    
+    sim_config = _parse_config({})
+    for system_name in module.DEFAULT_SYSTEMS:
+        module.compile_plan(system_name, sim_config)
+        module.simulate_batch(system_name, WARMUP_TRIALS, rng=np.random.default_rng(0), config=sim_config)
+    if SURROGATE_ENABLED:
+        import surrogate
+        surrogate.load_tables()
+    startup_report['warmup_seconds'] = time.perf_counter() - started
+
+@app.after_request
+def schedule_warm_up(response):
+    """Start the background warm-up once the first response has been sent"""
+    global _warm_up_scheduled
+    if not WARMUP_ENABLED or _warm_up_scheduled:
+        return response
+    with _warm_up_lock:
+        if _warm_up_scheduled:
+            return response
+        _warm_up_scheduled = True
+    response.call_on_close(lambda: threading.Thread(target=_warm_up, name='dropsim-warmup', daemon=True).start())
+    return response
+
+def _index_page():
+    """index.html and its ETag, read from disk once per instance"""
+    global _index_page_cache
+    if _index_page_cache is None:
+        html_path = os.path.join(os.path.dirname(__file__), '..', 'index.html')
+        with open(html_path, 'rb') as f:
+            body = f.read()
+        _index_page_cache = body, hashlib.sha256(body).hexdigest()[:32]
+    return _index_page_cache
 
 @app.route('/')
 def index():
-    """Serve the main HTML file"""
-    # Read and return the index.html file from the parent directory
-    html_path = os.path.join(os.path.dirname(__file__), '..', 'index.html')
+    """Serve the main HTML file from memory; browsers revalidate it with its ETag"""
     try:
-        with open(html_path, 'r') as f:
-            return f.read()
+        body, etag = _index_page()
     except FileNotFoundError:
         return "index.html not found", 404
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/startup', methods=['GET'])
+def startup():
+    """Cold-start report: seconds spent importing this module, importing DropSim and warming up"""
+    return jsonify({'success': True, 'startup': startup_report})
+
+def _parse_config(data):
+    """Build the immutable DropSim.SimConfig for a request body"""
+    config = data.get('config', DEFAULT_CONFIG)
+    return DropSim.SimConfig(
+        total_time_hours=float(config.get('total_time_hours', 1.5)),
+        starting_gear_level=int(config.get('starting_gear_level', 200)),
+        streak_bonuses=config.get('streak_bonuses'),
+        drop_ranges=config.get('drop_ranges'),
+        slot_rules=config.get('slot_rules'),
+        tiers=bool(config.get('tiers', False)),
+        tier_odds=config.get('tier_odds'),
+    )
+
+def _parse_trials(data, limit=MAX_COMPARE_TRIALS):
+    """Trial budget and precision targets from a request body.
+
+    With "precision" ({metric: relative 95% CI half-width}) trials run until
+    every target is met, up to "max_trials"; otherwise exactly "trials" run.
+    Budgets outside 1..limit, or a "max_trials" below "trials", raise ValueError.
+    """
+    trials = int(data.get('trials', COMPARE_TRIALS))
+    if not 1 <= trials <= limit:
+        raise ValueError(f'trials must be between 1 and {limit}')
+    targets = data.get('precision') or None
+    if targets is not None:
+        targets = {name: float(target) for name, target in targets.items()}
+        max_trials = int(data.get('max_trials', min(ADAPTIVE_MAX_TRIALS, limit)))
+        if not 1 <= max_trials <= limit:
+            raise ValueError(f'max_trials must be between 1 and {limit}')
+        if 'trials' in data and max_trials < trials:
+            raise ValueError('max_trials must be at least trials')
+        return max_trials, targets
+    return trials, None
+
+def _parse_trajectory(data, sim_config):
+    """Session hours at which to record character level bands, or None when not asked for.
+
+    "trajectory": true uses DropSim.TRAJECTORY_POINTS evenly spaced
+    checkpoints after the start; a number sets how many.
+    """
+    points = data.get('trajectory')
+    if not points:
+        return None
+    points = DropSim.TRAJECTORY_POINTS if points is True else int(points)
+    if not 1 <= points <= MAX_TRAJECTORY_POINTS:
+        raise ValueError(f'trajectory must be between 1 and {MAX_TRAJECTORY_POINTS} checkpoints')
+    return DropSim.session_checkpoints(sim_config.total_time_hours, points)
+
+def simulate_single(system_name, sim_config, seed=None, use_surrogate=True):
+    """Build the /run_simulation result for one system.
+
+    Unseeded runs on a surrogate table's grid take hours to max level from
+    the table instead of simulating back-to-back sessions.
+    """
+    # Run simulation
+    rng = random.Random(seed) if seed is not None else None
+    with instrumentation.phase('simulate'):
+        drops, activities, gear_tracker, max_streak, streak_info = DropSim.run_sim(system_name, rng=rng, config=sim_config)
+    instrumentation.count('trials', 1, system=system_name)
+    instrumentation.count('drops_simulated', drops, system=system_name)
+    with instrumentation.phase('summary'):
+        summary = gear_tracker.get_summary()
+    
+    # Calculate progression metrics using the current config values
+    levels_gained = summary['character_level'] - sim_config.starting_gear_level
+    total_time_hours = sim_config.total_time_hours
+    levels_per_hour = levels_gained / total_time_hours if total_time_hours > 0 else 0
+    
+    # Hours to max level come from playing back-to-back sessions until 450
+    lookup = surrogate_lookup(system_name, sim_config) if seed is None and use_surrogate else None
+    if lookup is not None and lookup['hours_to_max'] is not None:
+        hours_to_max = lookup['hours_to_max']['average']
+        hours_to_max_confidence = round(lookup['error_bounds']['hours_to_max'], 1)
+        hours_to_max_source = 'surrogate'
+    else:
+        with instrumentation.phase('time_to_max'):
+            time_to_max = DropSim.time_to_max(system_name, trials=SINGLE_RUN_TIME_TO_MAX_TRIALS, seed=seed, config=sim_config)
+        hours_to_max = time_to_max['hours']['average'] if time_to_max['hours'] else None
+        hours_to_max_confidence = None
+        hours_to_max_source = 'simulation'
+    
+    gear_levels = gear_tracker.gear_levels
+    return {
+        'type': 'single',
+        'system_name': system_name,
+        'drops': drops,
+        'activities': activities,
+        'max_streak': max_streak,
+        'character_level': summary['character_level'],
+        'levels_gained': levels_gained,
+        'levels_per_hour': levels_per_hour,
+        'hours_to_max': hours_to_max,
+        'hours_to_max_confidence': hours_to_max_confidence,
+        'hours_to_max_source': hours_to_max_source,
+        'upgrade_rate': summary['upgrade_rate'],
+        'total_upgrades': summary['total_upgrades'],
+        'gear_levels': {
+            'weapons': {slot: gear_levels[slot] for slot in DropSim.WEAPON_SLOTS},
+            'armor': {slot: gear_levels[slot] for slot in DropSim.ARMOR_SLOTS}
+        },
+        'gear_tiers': summary['gear_tiers'],
+        'drop_tiers': summary['drop_tiers'],
+        'streak_info': streak_info
+    }
+
+def _iter_system_monte_carlo(system_name, sim_config, trials, seed, targets=None, checkpoints=None):
+    """Running MonteCarloAccumulator for one system, one API-sized chunk at a time"""
+    return DropSim.iter_monte_carlo(system_name, trials=trials, seed=seed, chunk_size=API_CHUNK_SIZE,
+                                    targets=targets, config=sim_config, checkpoints=checkpoints)
+
+def run_monte_carlo(system_name, sim_config, trials, seed=None, job=None, targets=None, checkpoints=None):
+    """Raw Monte Carlo statistics for one system with a custom trial count or precision targets"""
+    accumulator = None
+    for accumulator in _iter_system_monte_carlo(system_name, sim_config, trials, seed, targets, checkpoints):
+        if job is not None:
+            job.report(system_name, trials_done=accumulator.trials, trials=trials, phase='monte_carlo')
+            job.check_cancelled()
+    
+    if job is not None:
+        job.report(system_name, phase='done')
+    with instrumentation.phase('summary'):
+        stats = accumulator.summary()
+    if targets:
+        stats['precision'] = accumulator.precision_report(targets)
+    return {'system_name': system_name, 'trials': trials, 'stats': stats}
+
+def _system_comparison(system_name, accumulator, hours_to_max, sim_config, trials, targets=None, distributions=True):
+    """One system's /compare_systems entry from its Monte Carlo accumulator and time-to-max hours"""
+    with instrumentation.phase('summary'):
+        stats = accumulator.summary(slots=False)
+    
+    # 95% confidence half-widths of the averages; they shrink as trials accumulate
+    metrics = accumulator.metrics
+    half_widths = {name: metrics[name].confidence_half_width()
+                   for name in ('drops', 'activities', 'character_level', 'character_level_gains', 'upgrade_rate')}
+    precision = accumulator.precision_report(targets) if targets else None
+    return _comparison_entry(system_name, stats, hours_to_max, half_widths, precision, sim_config, trials,
+                             accumulator.trials, 'simulation', distributions)
+
+def _trajectory(trajectory):
+    """Character level bands (average, 10th/50th/90th percentiles) at each checkpoint hour, rounded"""
+    if trajectory is None:
+        return None
+    return {
+        'hours': [round(hours, 3) for hours in trajectory['checkpoints']],
+        **{band: [round(level, 1) for level in trajectory[band]] for band in ('average', 'p10', 'p50', 'p90')},
+    }
+
+def _tiers(tiers):
+    """Gear tier shares (drops, slots, full sets) and average tiers, rounded"""
+    if tiers is None:
+        return None
+    return {
+        **{name: {tier: round(share, 4) for tier, share in tiers[name].items()}
+           for name in ('drop_shares', 'slot_shares', 'set_tier')},
+        'average_drop_tier': round(tiers['average_drop_tier'], 2) if tiers['average_drop_tier'] is not None else None,
+        'average_slot_tier': round(tiers['average_slot_tier'], 2) if tiers['average_slot_tier'] is not None else None,
+    }
+
+def _distribution(summary, digits):
+    """Percentiles (rounded to `digits`) and compact histogram of one metric's summary"""
+    percentiles = summary['percentiles']
+    return {
+        'percentiles': {name: round(value, digits) for name, value in percentiles.items()} if percentiles else None,
+        'histogram': summary['histogram'],
+    }
+
+def _comparison_entry(system_name, stats, hours_to_max, half_widths, precision, sim_config, trials, trials_done,
+                      source, distributions=True):
+    """Format one system's /compare_systems entry from monte_carlo()-style statistics.
+
+    `half_widths` maps metric names to the 95% half-width of their average;
+    `source` says whether the statistics were simulated or read from a surrogate table.
+    With `distributions`, the entry carries percentiles and histograms of the
+    main metrics ('histogram' is None where only percentiles are known).
+    'trajectory' holds character level bands over the session when the
+    statistics recorded them, and 'tiers' gear tier shares when the config tracks tiers.
+    """
+    total_time_hours = sim_config.total_time_hours
+    
+    # Calculate progression metrics from averaged stats
+    avg_character_level = stats['gear']['character_level']['average']
+    avg_level_gains = stats['gear']['character_level_gains']['average']
+    avg_upgrade_rate = stats['gear']['upgrade_rate']['average']
+    avg_total_upgrades = stats['gear']['total_upgrades']['average']
+    
+    levels_per_hour = avg_level_gains / total_time_hours if total_time_hours > 0 else 0
+    
+    confidence = {
+        'drops': round(half_widths['drops'], 2),
+        'activities': round(half_widths['activities'], 2),
+        'character_level': round(half_widths['character_level'], 2),
+        'levels_gained': round(half_widths['character_level_gains'], 2),
+        'upgrade_rate': round(half_widths['upgrade_rate'], 4),
+    }
+    if 'hours_to_max' in half_widths:
+        confidence['hours_to_max'] = round(half_widths['hours_to_max'], 1)
+    
+    # Compile comprehensive results
+    return {
+        # Core metrics (averaged over all trials)
+        'drops': round(stats['drops']['average'], 1),
+        'activities': round(stats['activities']['average'], 1),
+        'max_streak': round(stats['max_streak']['average'], 1),
+        'character_level': round(avg_character_level, 1),
+        'levels_gained': round(avg_level_gains, 1),
+        'levels_per_hour': round(levels_per_hour, 2),
+        'hours_to_max': round(hours_to_max['average'], 1) if hours_to_max else None,
+        'upgrade_rate': round(avg_upgrade_rate, 3),
+        'total_upgrades': round(avg_total_upgrades, 1),
+        
+        # Statistical ranges for main metrics
+        'statistical_ranges': {
+            'drops': {
+                'min': stats['drops']['min'], 
+                'max': stats['drops']['max'], 
+                '95th_percentile': round(stats['drops']['95%_tile'], 1)
+            },
+            'activities': {
+                'min': stats['activities']['min'], 
+                'max': stats['activities']['max'], 
+                '95th_percentile': round(stats['activities']['95%_tile'], 1)
+            },
+            'character_level': {
+                'min': round(stats['gear']['character_level']['min'], 1), 
+                'max': round(stats['gear']['character_level']['max'], 1), 
+                '95th_percentile': round(stats['gear']['character_level']['95%_tile'], 1)
+            },
+            'upgrade_rate': {
+                'min': round(stats['gear']['upgrade_rate']['min'], 3), 
+                'max': round(stats['gear']['upgrade_rate']['max'], 3), 
+                '95th_percentile': round(stats['gear']['upgrade_rate']['95%_tile'], 3)
+            },
+            'hours_to_max': {
+                'min': round(hours_to_max['min'], 1), 
+                'max': round(hours_to_max['max'], 1), 
+                '95th_percentile': round(hours_to_max['95%_tile'], 1)
+            } if hours_to_max else None
+        },
+        'confidence': confidence,
+        'precision': precision,
+        
+        # Percentiles and histograms for drawing the distributions
+        'distributions': {
+            'drops': _distribution(stats['drops'], 1),
+            'activities': _distribution(stats['activities'], 1),
+            'character_level': _distribution(stats['gear']['character_level'], 1),
+            'levels_gained': _distribution(stats['gear']['character_level_gains'], 1),
+            'upgrade_rate': _distribution(stats['gear']['upgrade_rate'], 4),
+            'hours_to_max': _distribution(hours_to_max, 1) if hours_to_max else None,
+        } if distributions else None,
+        'trajectory': _trajectory(stats.get('trajectory')),
+        'tiers': _tiers(stats.get('tiers')),
+        
+        # Analysis metadata
+        'trials': trials,
+        'trials_done': trials_done,
+        'analysis_type': 'comprehensive',
+        'source': source,
+        'streak_info': DropSim.get_streak_info(system_name, total_time_hours)
+    }
+
+def iter_compare_systems(sim_config, trials=COMPARE_TRIALS, seed=None, targets=None, checkpoints=None):
+    """Incremental /compare_systems: yields (phase, system_name, results) as work completes.
+
+    Phase 'monte_carlo' follows each round of one chunk per system (system_name
+    is None); phase 'time_to_max' follows each system's time-to-max run. The
+    last results yielded are the final comparison. Hours to max and
+    distributions stay None until their system's time-to-max run finishes.
+
+    With precision `targets`, each system stops sampling once its targets are
+    met, so systems can finish with different trial counts ('trials_done');
+    time to max then uses the same number of trials as that system.
+    With `checkpoints` (session hours), entries carry character level bands.
+    """
+    systems = ['solo', 'fireteam', 'pinnacle']
+    
+    # Use ordered dictionary to ensure correct system order: solo, fireteam, pinnacle
+    from collections import OrderedDict
+    results = OrderedDict()
+    accumulators = {}
+    hours_to_max = {system_name: None for system_name in systems}
+    
+    # Round-robin the Monte Carlo chunks so every system has an early estimate;
+    # a system whose precision targets are met drops out and keeps its last estimate
+    streams = [_iter_system_monte_carlo(system_name, sim_config, trials, seed, targets, checkpoints)
+               for system_name in systems]
+    for round_accumulators in zip_longest(*streams):
+        for system_name, accumulator in zip(systems, round_accumulators):
+            if accumulator is None:
+                continue
+            accumulators[system_name] = accumulator
+            results[system_name] = _system_comparison(system_name, accumulator, None, sim_config, trials, targets,
+                                                      distributions=False)
+        yield 'monte_carlo', None, OrderedDict(results)
+    
+    # Hours to max level come from playing back-to-back sessions until 450
+    for system_name in systems:
+        with instrumentation.phase('time_to_max'):
+            time_to_max = DropSim.time_to_max(system_name, trials=accumulators[system_name].trials, seed=seed,
+                                              config=sim_config)
+        hours_to_max[system_name] = time_to_max['hours']
+        results[system_name] = _system_comparison(system_name, accumulators[system_name],
+                                                  hours_to_max[system_name], sim_config, trials, targets)
+        yield 'time_to_max', system_name, OrderedDict(results)
+
+def compare_all_systems(sim_config, trials=COMPARE_TRIALS, seed=None, job=None, targets=None, checkpoints=None):
+    """Build the /compare_systems results: Monte Carlo statistics for every system.
+
+    With a `job`, progress is reported per system and cancellation is checked
+    after every chunk of trials.
+    """
+    results = None
+    for phase, system_name, results in iter_compare_systems(sim_config, trials, seed, targets, checkpoints):
+        if job is None:
+            continue
+        if phase == 'monte_carlo':
+            for name, result in results.items():
+                job.report(name, trials_done=result['trials_done'], trials=trials, phase='monte_carlo')
+        else:
+            job.report(system_name, phase='done')
+        job.check_cancelled()
+    return results
+
+def surrogate_lookup(system_name, sim_config):
+    """Interpolated statistics for one system from the surrogate tables, or None off their grid"""
+    if not SURROGATE_ENABLED:
+        return None
+    import surrogate
+    with instrumentation.phase('surrogate'):
+        table = surrogate.find(system_name, sim_config)
+        return table.lookup(system_name, sim_config) if table is not None else None
+
+def surrogate_comparison(sim_config, trials=COMPARE_TRIALS, targets=None):
+    """/compare_systems results interpolated from the surrogate tables.
+
+    None unless every system is on a table's grid and the table is at least
+    as precise as the request asks: each precision target is met by the
+    metric's error bound or, without targets, the table simulated at least
+    `trials` trials per grid node. Error bounds are reported as 'confidence'.
+    Unknown precision metrics raise ValueError, as they do when simulating.
+    """
+    from collections import OrderedDict
+    if targets:
+        DropSim._validate_targets(targets)
+    results = OrderedDict()
+    for system_name in ['solo', 'fireteam', 'pinnacle']:
+        lookup = surrogate_lookup(system_name, sim_config)
+        if lookup is None:
+            return None
+        stats, bounds = lookup['stats'], lookup['error_bounds']
+        precision = None
+        if targets:
+            precision = {}
+            for name, target in targets.items():
+                if name not in bounds:
+                    return None
+                average = abs((stats[name] if name in stats else stats['gear'][name])['average'])
+                achieved = bounds[name] / average if average else (0.0 if bounds[name] == 0 else float('inf'))
+                if achieved > target:
+                    return None
+                precision[name] = {'target': target, 'achieved': achieved, 'met': True}
+        elif trials > lookup['trials']:
+            return None
+        results[system_name] = _comparison_entry(system_name, stats, lookup['hours_to_max'], bounds, precision,
+                                                 sim_config, trials, lookup['trials'], 'surrogate')
+    return results
+
+def _sse_event(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {numpy_json.dumps(data)}\n\n"
 
 @app.route('/run_simulation', methods=['POST'])
 def run_simulation():
     """Run simulation with user-provided parameters"""
-    if DropSim is None:
+    if load_dropsim() is None:
         return jsonify({'success': False, 'error': 'DropSim module not available'})
     
     try:
         # Get parameters from request
         data = request.json
         system_name = data.get('system_name', 'solo')
-        config = data.get('config', DEFAULT_CONFIG)
-        
-        # Extract configuration values
-        total_time_hours = float(config.get('total_time_hours', 1.5))
-        starting_gear_level = int(config.get('starting_gear_level', 200))
-        streak_bonuses = config.get('streak_bonuses')
-        drop_ranges = config.get('drop_ranges')
-        
-        # Thread-safe approach: temporarily set globals with a lock
-        import threading
-        lock = threading.Lock()
-        
-        with lock:
-            # Store original values
-            original_total_time = DropSim.TOTAL_TIME_HOURS
-            original_starting_level = DropSim.STARTING_GEAR_LEVEL
-            
-            try:
-                # Set new values
-                DropSim.TOTAL_TIME_HOURS = total_time_hours
-                DropSim.STARTING_GEAR_LEVEL = starting_gear_level
-                
-                # Run simulation
-                drops, activities, gear_tracker, max_streak, streak_info = DropSim.run_sim(system_name, streak_bonuses, drop_ranges)
-                summary = gear_tracker.get_summary()
-                
-                # Calculate progression metrics using the current config values
-                levels_gained = summary['character_level'] - starting_gear_level
-                levels_per_hour = levels_gained / total_time_hours if total_time_hours > 0 else 0
-                levels_needed = 450 - summary['character_level']
-                hours_to_max = levels_needed / levels_per_hour if levels_per_hour > 0 else float('inf')
-                
-            finally:
-                # Always restore original values
-                DropSim.TOTAL_TIME_HOURS = original_total_time
-                DropSim.STARTING_GEAR_LEVEL = original_starting_level
-        
-        result = {
-            'type': 'single',
-            'system_name': system_name,
-            'drops': drops,
-            'activities': activities,
-            'max_streak': max_streak,
-            'character_level': summary['character_level'],
-            'levels_gained': levels_gained,
-            'levels_per_hour': levels_per_hour,
-            'hours_to_max': hours_to_max if hours_to_max != float('inf') else None,
-            'upgrade_rate': summary['upgrade_rate'],
-            'total_upgrades': summary['total_upgrades'],
-            'gear_levels': {
-                'weapons': {slot: gear_tracker.gear_levels[slot] for slot in WEAPON_SLOTS},
-                'armor': {slot: gear_tracker.gear_levels[slot] for slot in ARMOR_SLOTS}
-            },
-            'streak_info': streak_info
-        }
+        sim_config = _parse_config(data)
+        seed = data.get('seed')
+        fields = _parse_fields(data)
+        
+        # A single run is only repeatable, and therefore cacheable, when seeded
+        cache_key = None
+        if seed is not None:
+            cache_key = make_cache_key(endpoint='run_simulation', system_name=system_name, seed=seed, **sim_config.to_dict())
+            cached = cache_lookup(cache_key)
+            if cached is not None:
+                return jsonify({'success': True, 'result': _select_fields(cached, fields), 'cached': True})
         
-        return jsonify({'success': True, 'result': result})
+        result = simulate_single(system_name, sim_config, seed, use_surrogate=data.get('surrogate', True))
+        if cache_key is not None:
+            result_cache.put(cache_key, result)
         
+        return jsonify({'success': True, 'result': _select_fields(result, fields), 'cached': False})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/compare_systems', methods=['POST'])
 def compare_systems():
     """Compare all three systems with comprehensive analysis matching single run detail level"""
-    if DropSim is None:
+    if load_dropsim() is None:
         return jsonify({'success': False, 'error': 'DropSim module not available'})
     
     try:
         data = request.json
-        config = data.get('config', DEFAULT_CONFIG)
+        sim_config = _parse_config(data)
+        trials, targets = _parse_trials(data)
+        seed = data.get('seed')
+        fields = _parse_fields(data)
+        checkpoints = _parse_trajectory(data, sim_config)
+        
+        # Unseeded requests on a surrogate table's grid are answered by interpolation;
+        # the tables hold end-of-session statistics only, so trajectories are simulated
+        if seed is None and checkpoints is None and data.get('surrogate', True):
+            results = surrogate_comparison(sim_config, trials, targets)
+            if results is not None:
+                return jsonify({'success': True, 'results': _select_system_fields(results, fields), 'cached': False})
         
-        # Extract configuration values
-        total_time_hours = float(config.get('total_time_hours', 1.5))
-        starting_gear_level = int(config.get('starting_gear_level', 200))
-        streak_bonuses = config.get('streak_bonuses')
-        drop_ranges = config.get('drop_ranges')
+        cache_key = make_cache_key(endpoint='compare_systems', trials=trials, seed=seed, precision=targets,
+                                   trajectory=checkpoints, **sim_config.to_dict())
+        cached = cache_lookup(cache_key)
+        if cached is not None:
+            return jsonify({'success': True, 'results': _select_system_fields(cached, fields), 'cached': True})
         
-        # Thread-safe approach: temporarily set globals with a lock
-        import threading
-        lock = threading.Lock()
+        results = compare_all_systems(sim_config, trials, seed, targets=targets, checkpoints=checkpoints)
+        result_cache.put(cache_key, results)
+        
+        return jsonify({'success': True, 'results': _select_system_fields(results, fields), 'cached': False})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/compare_systems/stream', methods=['POST'])
+def compare_systems_stream():
+    """/compare_systems as Server-Sent Events: 'partial' results after every
+    round of trials, then the final 'result'. Closing the connection stops
+    the simulation after its current chunk.
+    """
+    if load_dropsim() is None:
+        return jsonify({'success': False, 'error': 'DropSim module not available'})
+    
+    try:
+        data = request.json
+        sim_config = _parse_config(data)
+        trials, targets = _parse_trials(data)
+        seed = data.get('seed')
+        fields = _parse_fields(data)
+        checkpoints = _parse_trajectory(data, sim_config)
+        use_surrogate = seed is None and checkpoints is None and data.get('surrogate', True)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    cache_key = make_cache_key(endpoint='compare_systems', trials=trials, seed=seed, precision=targets,
+                               trajectory=checkpoints, **sim_config.to_dict())
+    
+    def generate():
+        # Interpolated answers are final at once, so they skip the partial events
+        results = surrogate_comparison(sim_config, trials, targets) if use_surrogate else None
+        if results is not None:
+            yield _sse_event('result', {'success': True, 'results': _select_system_fields(results, fields), 'cached': False})
+            return
+        cached = cache_lookup(cache_key)
+        if cached is not None:
+            yield _sse_event('result', {'success': True, 'results': _select_system_fields(cached, fields), 'cached': True})
+            return
+        try:
+            results = None
+            # The server closes this generator when the client disconnects,
+            # which stops iter_compare_systems before its next chunk
+            for phase, system_name, results in iter_compare_systems(sim_config, trials, seed, targets, checkpoints):
+                yield _sse_event('partial', {'phase': phase, 'system_name': system_name,
+                                             'results': _select_system_fields(results, fields)})
+            result_cache.put(cache_key, results)
+            yield _sse_event('result', {'success': True, 'results': _select_system_fields(results, fields), 'cached': False})
+        except Exception as e:
+            yield _sse_event('result', {'success': False, 'error': str(e)})
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Result cache and compiled-plan cache hit/miss counters for sizing the caches"""
+    plans = DropSim.plan_cache_info() if DropSim is not None else None
+    return jsonify({'success': True, 'cache': result_cache.stats(), 'plans': plans})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Phase timings and counters in the Prometheus text format"""
+    if not instrumentation.enabled:
+        return jsonify({'success': False, 'error': 'Metrics are disabled (DROPSIM_METRICS=0)'}), 404
+    
+    cache = result_cache.stats()
+    families = [
+        ('result_cache_lookups_total', 'counter', 'Result cache lookups by outcome',
+         {(('result', 'hit'),): cache['hits'], (('result', 'disk_hit'),): cache['disk_hits'],
+          (('result', 'miss'),): cache['misses']}),
+        ('result_cache_evictions_total', 'counter', 'Results evicted from the in-memory cache',
+         {(): cache['evictions']}),
+        ('result_cache_entries', 'gauge', 'Results held in the in-memory cache', {(): cache['entries']}),
+    ]
+    families.append(('startup_seconds', 'gauge', 'Cold-start time by stage',
+                     {(('stage', stage.replace('_seconds', '')),): seconds
+                      for stage, seconds in startup_report.items() if seconds is not None}))
+    if DropSim is not None:
+        plans = DropSim.plan_cache_info()
+        families.append(('plan_cache_lookups_total', 'counter', 'Compiled-plan cache lookups by outcome',
+                         {(('result', 'hit'),): plans['hits'], (('result', 'miss'),): plans['misses']}))
+    return Response(instrumentation.render(families), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue a simulation on the background executor and return its job id.
+
+    Body: {"type": "single" | "compare" | "monte_carlo", "config": {...},
+    "system_name": ..., "trials": ..., "seed": ...}; "precision" and
+    "max_trials" replace "trials" for precision-driven runs, and "trajectory"
+    adds character level bands to compare and monte_carlo results. Results already in the
+    result cache come back as a finished job.
+    """
+    if load_dropsim() is None:
+        return jsonify({'success': False, 'error': 'DropSim module not available'})
+    
+    try:
+        data = request.json or {}
+        job_type = data.get('type', 'compare')
+        system_name = data.get('system_name', 'solo')
+        sim_config = _parse_config(data)
+        seed = data.get('seed')
+        trials, targets = _parse_trials(data, MAX_JOB_TRIALS)
+        checkpoints = _parse_trajectory(data, sim_config)
+        
+        if job_type not in ('single', 'compare', 'monte_carlo'):
+            return jsonify({'success': False, 'error': f"Unknown job type '{job_type}'"}), 400
+        if job_type != 'compare' and system_name not in DropSim.DEFAULT_SYSTEMS:
+            return jsonify({'success': False, 'error': f"Unknown system '{system_name}'"}), 400
+        
+        if job_type == 'single':
+            cache_key = None
+            if seed is not None:
+                cache_key = make_cache_key(endpoint='run_simulation', system_name=system_name, seed=seed, **sim_config.to_dict())
+            run = lambda job: simulate_single(system_name, sim_config, seed)
+        elif job_type == 'compare':
+            cache_key = make_cache_key(endpoint='compare_systems', trials=trials, seed=seed, precision=targets,
+                                       trajectory=checkpoints, **sim_config.to_dict())
+            run = lambda job: compare_all_systems(sim_config, trials, seed, job, targets, checkpoints)
+        else:
+            cache_key = make_cache_key(endpoint='monte_carlo', system_name=system_name, trials=trials, seed=seed,
+                                       precision=targets, trajectory=checkpoints, **sim_config.to_dict())
+            run = lambda job: run_monte_carlo(system_name, sim_config, trials, seed, job, targets, checkpoints)
+        
+        cached = cache_lookup(cache_key) if cache_key is not None else None
+        if cached is not None:
+            job = job_manager.completed(job_type, cached)
+        else:
+            def run_and_cache(job):
+                result = run(job)
+                if cache_key is not None:
+                    result_cache.put(cache_key, result)
+                return result
+            job = job_manager.submit(job_type, run_and_cache)
+        
+        return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status, per-system progress and, once finished, the result (fields= applies to
+    single and compare results)"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    job_dict = job.to_dict()
+    fields = _parse_fields(None)
+    if job.kind == 'single':
+        job_dict['result'] = _select_fields(job_dict['result'], fields)
+    elif job.kind == 'compare':
+        job_dict['result'] = _select_system_fields(job_dict['result'], fields)
+    return jsonify({'success': True, 'job': job_dict})
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job; it stops after its current chunk of trials"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job_id': job.id, 'status': job.status})
+
+@app.route('/sweep', methods=['POST'])
+def create_sweep():
+    """Queue a parameter sweep as one background job and return its job id.
+
+    Body: {"axes": {"starting_gear_level": [200, 250], "total_time_hours": [1, 2], ...},
+    "config": {...}, "trials": ..., "seed": ...}. Axes may be system_name,
+    starting_gear_level, total_time_hours, drop_ranges, streak_bonuses and slot_rules;
+    settings not swept come from "config". The finished job's result is a
+    table with one row per grid point.
+    """
+    if load_dropsim() is None:
+        return jsonify({'success': False, 'error': 'DropSim module not available'})
+    
+    try:
+        import sweep
+        
+        data = request.json or {}
+        axes = data.get('axes') or {}
+        base = _parse_config(data)
+        trials = int(data.get('trials', COMPARE_TRIALS))
+        seed = data.get('seed')
+        
+        grid = sweep.expand_grid(axes, base)
+        if len(grid) > MAX_SWEEP_POINTS:
+            return jsonify({'success': False, 'error': f'Sweep has {len(grid)} grid points; the limit is {MAX_SWEEP_POINTS}'}), 400
+        if trials < 1 or len(grid) * trials > MAX_SWEEP_TOTAL_TRIALS:
+            return jsonify({'success': False, 'error': f'Sweeps are limited to {MAX_SWEEP_TOTAL_TRIALS} trials in total'}), 400
+        
+        cache_key = make_cache_key(endpoint='sweep', axes=axes, trials=trials, seed=seed, **base.to_dict())
+        cached = cache_lookup(cache_key)
+        if cached is not None:
+            job = job_manager.completed('sweep', cached)
+            return jsonify({'success': True, 'job_id': job.id, 'status': job.status, 'points': len(grid)}), 202
+        
+        def run(job):
+            def progress(points_done, points):
+                job.report('sweep', points_done=points_done, points=points)
+                job.check_cancelled()
+            
+            rows = sweep.run_sweep(axes, trials=trials, seed=seed, base=base, workers=SWEEP_WORKERS,
+                                   progress=progress)
+            result = {'columns': sweep.columns(rows), 'rows': rows, 'trials': trials}
+            result_cache.put(cache_key, result)
+            return result
+        
+        job = job_manager.submit('sweep', run)
+        return jsonify({'success': True, 'job_id': job.id, 'status': job.status, 'points': len(grid)}), 202
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/campaign', methods=['POST'])
+def create_campaign():
+    """Queue a multi-session campaign as a background job and return its job id.
+
+    Body: {"schedule": [{"system_name": ..., "total_time_hours": ..., "sessions": ...,
+    "until_level": ...}, ...], "branches": {name: schedule, ...}, "config": {...},
+    "trials": ..., "seed": ...}. Gear carries over between sessions and streaks
+    reset. Each branch continues from the state the schedule ends in, with the
+    same random draws. The finished job's result holds campaign statistics for
+    the schedule and for every branch.
+    """
+    if load_dropsim() is None:
+        return jsonify({'success': False, 'error': 'DropSim module not available'})
+    
+    try:
+        import campaign
+        
+        data = request.json or {}
+        schedule = data.get('schedule') or []
+        branches = data.get('branches') or {}
+        sim_config = _parse_config(data)
+        trials = int(data.get('trials', CAMPAIGN_TRIALS))
+        seed = data.get('seed')
+        
+        if not 1 <= trials <= MAX_CAMPAIGN_TRIALS:
+            return jsonify({'success': False, 'error': f'trials must be between 1 and {MAX_CAMPAIGN_TRIALS}'}), 400
+        hours = campaign.schedule_hours(schedule, sim_config) + sum(
+            campaign.schedule_hours(branch, sim_config) for branch in branches.values())
+        if trials * hours > MAX_CAMPAIGN_TRIAL_HOURS:
+            return jsonify({'success': False, 'error': f'Campaigns are limited to {MAX_CAMPAIGN_TRIAL_HOURS} trial-hours; '
+                                                       'lower trials or cap until_level steps with sessions'}), 400
+        
+        cache_key = make_cache_key(endpoint='campaign', schedule=schedule, branches=branches, trials=trials, seed=seed,
+                                   **sim_config.to_dict())
+        cached = cache_lookup(cache_key)
+        if cached is not None:
+            job = job_manager.completed('campaign', cached)
+            return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
+        
+        def run(job):
+            def progress(name, steps_done, steps):
+                job.report(name, steps_done=steps_done, steps=steps)
+                job.check_cancelled()
+            
+            with instrumentation.phase('simulate'):
+                state = campaign.run_campaign(schedule, trials, seed, sim_config,
+                                              progress=lambda steps_done, steps: progress('campaign', steps_done, steps))
+                outcomes = campaign.run_branches(state, branches, progress)
+            with instrumentation.phase('summary'):
+                result = {
+                    'campaign': state.summary(),
+                    'branches': {name: outcome.summary() for name, outcome in outcomes.items()},
+                    'trials': trials,
+                }
+            result_cache.put(cache_key, result)
+            return result
+        
+        job = job_manager.submit('campaign', run)
+        return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/solve', methods=['POST'])
+def solve_target():
+    """Search one system's streak bonuses and drop range for a target hours to max level.
+
+    Body: {"system_name": "pinnacle", "target_hours": 40, "tolerance": 2,
+    "tune": ["streak_bonuses", "drop_ranges"], "radius": 2, "config": {...},
+    "seed": ...}. Values move at most "radius" from the system's current
+    rules in "config". Returns the best candidates, each with its estimated
+    hours to max, 95% half-width and whether it meets the target.
+    """
+    if load_dropsim() is None:
+        return jsonify({'success': False, 'error': 'DropSim module not available'})
+    
+    try:
+        import solver
+        
+        data = request.json or {}
+        system_name = data.get('system_name', 'pinnacle')
+        target_hours = float(data['target_hours'])
+        tolerance = float(data.get('tolerance', 2.0))
+        tune = tuple(data.get('tune') or solver.TUNABLE)
+        radius = int(data.get('radius', solver.DEFAULT_RADIUS))
+        results = int(data.get('results', 5))
+        sim_config = _parse_config(data)
+        seed = data.get('seed')
+        
+        cache_key = make_cache_key(endpoint='solve', system_name=system_name, target_hours=target_hours,
+                                   tolerance=tolerance, tune=sorted(tune), radius=radius, results=results, seed=seed,
+                                   **sim_config.to_dict())
+        cached = cache_lookup(cache_key)
+        if cached is not None:
+            return jsonify({'success': True, 'result': cached, 'cached': True})
+        
+        with instrumentation.phase('simulate'):
+            result = solver.solve(system_name, target_hours, tolerance, sim_config, tune, radius, seed,
+                                  results=results)
+        result_cache.put(cache_key, result)
+        return jsonify({'success': True, 'result': result, 'cached': False})
+        
+    except (KeyError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Missing {e}' if isinstance(e, KeyError) else str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/paired_comparison', methods=['POST'])
+def paired_comparison():
+    """Compare two or more configs on common random numbers.
+
+    Body: {"configs": [{"label": ..., "system_name": ..., "total_time_hours": ...,
+    "starting_gear_level": ..., "streak_bonuses": {...}, "drop_ranges": {...}, "slot_rules": {...}}, ...],
+    "config": {...}, "trials": ..., "seed": ...}. Fields a config leaves out
+    come from "config". Returns per-config means and every pairwise
+    difference with its confidence interval.
+    """
+    if load_dropsim() is None:
+        return jsonify({'success': False, 'error': 'DropSim module not available'})
+    
+    try:
+        data = request.json or {}
+        base = _parse_config(data)
+        configs = [dict(base.to_dict(), **config) for config in data.get('configs', [])]
+        trials = int(data.get('trials', DropSim.MONTE_CARLO_CHUNK_SIZE))
+        seed = data.get('seed')
+        
+        if not 2 <= len(configs) <= MAX_PAIRED_CONFIGS:
+            return jsonify({'success': False, 'error': f'Give between 2 and {MAX_PAIRED_CONFIGS} configs'}), 400
+        if not 1 <= trials <= MAX_PAIRED_TRIALS:
+            return jsonify({'success': False, 'error': f'trials must be between 1 and {MAX_PAIRED_TRIALS}'}), 400
+        
+        cache_key = make_cache_key(endpoint='paired_comparison', configs=configs, trials=trials, seed=seed)
+        cached = cache_lookup(cache_key)
+        if cached is not None:
+            return jsonify({'success': True, 'result': cached, 'cached': True})
+        
+        with instrumentation.phase('simulate'):
+            result = DropSim.paired_comparison(configs, trials=trials, seed=seed)
+        result_cache.put(cache_key, result)
+        return jsonify({'success': True, 'result': result, 'cached': False})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/exact_distribution', methods=['POST'])
+def exact_distribution():
+    """Exact (sampling-free) statistics for all three systems from the Markov-chain solver"""
+    if load_dropsim() is None:
+        return jsonify({'success': False, 'error': 'DropSim module not available'})
+    
+    try:
+        import exact
+        
+        data = request.json
+        sim_config = _parse_config(data)
+        if sim_config.total_time_hours > MAX_EXACT_HOURS:
+            return jsonify({'success': False, 'error': f'Exact distributions are limited to sessions of up to '
+                                                        f'{MAX_EXACT_HOURS} hours; use /compare_systems or /jobs '
+                                                        f'for longer sessions'}), 400
         
-        # Use ordered dictionary to ensure correct system order: solo, fireteam, ,pinnacle
         from collections import OrderedDict
         results = OrderedDict()
+        for system_name in ['solo', 'fireteam', 'pinnacle']:
+            with instrumentation.phase('exact'):
+                results[system_name] = exact.exact_distribution(system_name, config=sim_config)
         
-        with lock:
-            # Store original values
-            original_total_time = DropSim.TOTAL_TIME_HOURS
-            original_starting_level = DropSim.STARTING_GEAR_LEVEL
-            
-            try:
-                # Set new values
-                DropSim.TOTAL_TIME_HOURS = total_time_hours
-                DropSim.STARTING_GEAR_LEVEL = starting_gear_level
-                
-                # Process systems in the desired order with comprehensive analysis
-                for system_name in ['solo', 'fireteam', 'pinnacle']:
-                    # Run statistical analysis with 1000 trials for precision
-                    stats = DropSim.monte_carlo(system_name, trials=1000, streak_bonuses=streak_bonuses, drop_ranges=drop_ranges)
-                    
-                    # Run a representative single simulation for detailed breakdown
-                    drops, activities, gear_tracker, max_streak, streak_info = DropSim.run_sim(system_name, streak_bonuses, drop_ranges)
-                    summary = gear_tracker.get_summary()
-                    
-                    # Calculate progression metrics from averaged stats
-                    avg_character_level = stats['gear']['character_level']['average']
-                    avg_level_gains = stats['gear']['character_level_gains']['average']
-                    avg_upgrade_rate = stats['gear']['upgrade_rate']['average']
-                    avg_total_upgrades = stats['gear']['total_upgrades']['average']
-                    
-                    levels_per_hour = avg_level_gains / total_time_hours if total_time_hours > 0 else 0
-                    levels_needed = 450 - avg_character_level
-                    hours_to_max = levels_needed / levels_per_hour if levels_per_hour > 0 else float('inf')
-                    
-                    # Compile comprehensive results
-                    results[system_name] = {
-                        # Core metrics (averaged from 1000 runs)
-                        'drops': round(stats['drops']['average'], 1),
-                        'activities': round(stats['activities']['average'], 1),
-                        'max_streak': round(stats['max_streak']['average'], 1),
-                        'character_level': round(avg_character_level, 1),
-                        'levels_gained': round(avg_level_gains, 1),
-                        'levels_per_hour': round(levels_per_hour, 2),
-                        'hours_to_max': round(hours_to_max, 1) if hours_to_max != float('inf') else None,
-                        'upgrade_rate': round(avg_upgrade_rate, 3),
-                        'total_upgrades': round(avg_total_upgrades, 1),
-                        
-                        # Statistical ranges for main metrics
-                        'statistical_ranges': {
-                            'drops': {
-                                'min': stats['drops']['min'], 
-                                'max': stats['drops']['max'], 
-                                '95th_percentile': round(stats['drops']['95%_tile'], 1)
-                            },
-                            'activities': {
-                                'min': stats['activities']['min'], 
-                                'max': stats['activities']['max'], 
-                                '95th_percentile': round(stats['activities']['95%_tile'], 1)
-                            },
-                            'character_level': {
-                                'min': round(stats['gear']['character_level']['min'], 1), 
-                                'max': round(stats['gear']['character_level']['max'], 1), 
-                                '95th_percentile': round(stats['gear']['character_level']['95%_tile'], 1)
-                            },
-                            'upgrade_rate': {
-                                'min': round(stats['gear']['upgrade_rate']['min'], 3), 
-                                'max': round(stats['gear']['upgrade_rate']['max'], 3), 
-                                '95th_percentile': round(stats['gear']['upgrade_rate']['95%_tile'], 3)
-                            }
-                        },
-                        
-                        # Analysis metadata
-                        'trials': 1000,
-                        'analysis_type': 'comprehensive',
-                        'streak_info': streak_info
-                    }
-                
-            finally:
-                # Always restore original values
-                DropSim.TOTAL_TIME_HOURS = original_total_time
-                DropSim.STARTING_GEAR_LEVEL = original_starting_level
-        
-        return jsonify({'success': True, 'results': convert_numpy_types(results)})
+        return jsonify({'success': True, 'results': results})
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 # For Vercel serverless deployment
 # The app variable is automatically used by Vercel's Python runtime
+startup_report = {
+    'import_seconds': time.perf_counter() - _IMPORT_STARTED,
+    'dropsim_import_seconds': None,
+    'warmup_seconds': None,
+}
+
 if __name__ == '__main__':
     app.run(debug=True)
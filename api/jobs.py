@@ -0,0 +1,144 @@
+"""Background simulation jobs with progress reporting and cancellation.
+
+A JobManager runs job functions on a small thread pool so long simulations
+do not hold a request thread. Each job function receives its Job and calls
+`job.report(...)` as work completes and `job.check_cancelled()` between
+units of work; a DELETE sets the cancel flag and the job stops at its next
+check. Finished jobs are kept for `ttl_seconds` so clients can poll results.
+
+Jobs live in process memory: on a serverless platform they are only visible
+to requests served by the same warm instance.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_TTL_SECONDS = 600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job has been cancelled"""
+
+
+class Job:
+    """State of one background job; progress is a dict of named counters"""
+
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._future = None
+
+    def report(self, key, **values):
+        """Update the progress entry `key` (e.g. a system name) with new counters"""
+        with self._lock:
+            self.progress.setdefault(key, {}).update(values)
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": {key: dict(values) for key, values in self.progress.items()},
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+
+
+class JobManager:
+    """Runs job functions on a thread pool and tracks their state by id"""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dropsim-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, params=None):
+        """Queue `fn(job)` and return its Job; the return value becomes job.result"""
+        job = Job(kind, params)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job._future = self._executor.submit(self._run, job, fn)
+        return job
+
+    def completed(self, kind, result, params=None):
+        """Register a job whose result is already known (e.g. served from cache)"""
+        job = Job(kind, params)
+        job._finish(DONE, result=result)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Request cancellation; returns the Job, or None if the id is unknown"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job._cancel_event.set()
+        if job._future is not None and job._future.cancel():
+            job._finish(CANCELLED)  # Never started
+        return job
+
+    def _run(self, job, fn):
+        if job.cancelled:
+            job._finish(CANCELLED)
+            return
+        with job._lock:
+            job.status = RUNNING
+        try:
+            result = fn(job)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(FAILED, error=str(e))
+        else:
+            job._finish(DONE, result=result)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.status in FINISHED_STATES and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,144 @@
+"""Per-phase timing and counters for the simulation API.
+
+Code marks a hot-path phase with `with metrics.phase("simulate"):` and bumps
+counters with `metrics.count("trials", n, system="solo")`. Totals since
+start-up are rendered in the Prometheus text format for GET /metrics, and
+the phases timed while serving a request become its Server-Timing header.
+
+A disabled Metrics hands out one shared no-op context manager and ignores
+counts, and the API does not install its request hooks at all, so turning
+metrics off (DROPSIM_METRICS=0) leaves nothing on the hot path.
+"""
+import threading
+import time
+from collections import defaultdict
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _NullPhase:
+    """Context manager that does nothing; shared by every disabled phase"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics._record_phase(self._name, time.perf_counter() - self._start)
+        return False
+
+
+def _value(value):
+    return repr(float(value))
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Metrics:
+    """Thread-safe phase timers and labelled counters with per-request timings"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._phase_seconds = defaultdict(float)
+        self._phase_calls = defaultdict(int)
+        self._counters = defaultdict(float)  # (name, sorted label pairs) -> value
+        self._request = threading.local()
+
+    def phase(self, name):
+        """Context manager timing one occurrence of phase `name`"""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def count(self, name, value=1, **labels):
+        """Add `value` to the counter `name` with the given labels"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def _record_phase(self, name, seconds):
+        with self._lock:
+            self._phase_seconds[name] += seconds
+            self._phase_calls[name] += 1
+        timings = getattr(self._request, "timings", None)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+    def start_request(self):
+        """Begin collecting this thread's phase timings for one request"""
+        self._request.timings = {}
+        self._request.start = time.perf_counter()
+
+    def finish_request(self, endpoint, status):
+        """Count the request and return its Server-Timing header value"""
+        timings = getattr(self._request, "timings", None)
+        if timings is None:
+            return None
+        total = time.perf_counter() - self._request.start
+        self._request.timings = None
+        self.count("requests", 1, endpoint=endpoint or "unknown", status=status)
+        self.count("request_seconds", total, endpoint=endpoint or "unknown")
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+    def render(self, families=()):
+        """Prometheus text exposition of every phase and counter.
+
+        `families` adds (name, type, help, {labels tuple: value}) metrics
+        sampled at scrape time, e.g. cache sizes and hit counts kept elsewhere.
+        """
+        with self._lock:
+            phase_seconds = dict(self._phase_seconds)
+            phase_calls = dict(self._phase_calls)
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP dropsim_phase_seconds_total Wall time spent in each instrumented phase",
+            "# TYPE dropsim_phase_seconds_total counter",
+        ]
+        lines += [f'dropsim_phase_seconds_total{{phase="{name}"}} {seconds:.6f}'
+                  for name, seconds in sorted(phase_seconds.items())]
+        lines += [
+            "# HELP dropsim_phase_calls_total Times each instrumented phase ran",
+            "# TYPE dropsim_phase_calls_total counter",
+        ]
+        lines += [f'dropsim_phase_calls_total{{phase="{name}"}} {calls}'
+                  for name, calls in sorted(phase_calls.items())]
+
+        counter_families = defaultdict(list)
+        for (name, labels), value in counters.items():
+            counter_families[name].append((labels, value))
+        for name, samples in sorted(counter_families.items()):
+            lines += [f"# TYPE dropsim_{name}_total counter"]
+            lines += [f"dropsim_{name}_total{_labels(labels)} {_value(value)}" for labels, value in sorted(samples)]
+
+        for name, metric_type, help_text, samples in families:
+            lines += [f"# HELP dropsim_{name} {help_text}", f"# TYPE dropsim_{name} {metric_type}"]
+            lines += [f"dropsim_{name}{_labels(labels)} {_value(value)}" for labels, value in samples.items()]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,31 @@
+"""JSON encoding that understands NumPy scalars and arrays.
+
+The json encoder only calls `default` for values it cannot encode itself, so
+NumPy integers, booleans and arrays are converted during the single
+encoding pass instead of by rebuilding the whole result beforehand. NumPy
+floats subclass float and are encoded natively. NumPy itself is never
+imported here: if nothing has imported it yet, no value can be a NumPy one.
+"""
+import json
+import sys
+
+
+def default(obj):
+    """json `default` hook for NumPy values"""
+    np = sys.modules.get("numpy")
+    if np is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, **kwargs):
+    """json.dumps with NumPy support"""
+    return json.dumps(obj, default=default, **kwargs)
@@ -0,0 +1,309 @@
+"""Target-seeking solver: streak bonuses and drop ranges that hit an hours-to-max goal.
+
+Given a target such as "pinnacle reaches 450 in 40 +/- 2 hours", the solver
+searches the integer space of one system's streak bonuses (drops at streak
+1..3) and drop range (min and max level bonus) around its current values.
+
+Candidates are not simulated one Monte Carlo run at a time. The batch
+engine's cost is dominated by its per-drop Python loop, not by the number
+of rows, so a whole generation of candidates is played as rows of one
+back-to-back-sessions batch (candidates x trials). Every candidate's trial
+i takes the same efficiency factors, pinnacle variations, slot picks and
+bonus draws (common random numbers), so candidates are compared on the
+same luck. The search is successive halving, a form of stochastic
+root-finding: every candidate is screened with a few trials, then the ones
+still plausibly on target are re-run with more trials until the survivors'
+confidence intervals settle.
+
+Usage:
+    python solver.py --system pinnacle --target 40 --tolerance 2 --seed 1
+    python solver.py --system fireteam --target 60 --tune drop_ranges --radius 3
+"""
+import itertools
+import json
+from dataclasses import replace
+
+import numpy as np
+
+import DropSim
+
+TUNABLE = ("streak_bonuses", "drop_ranges")
+DEFAULT_RADIUS = 2                    # how far each value may move from the current config
+ROUND_TRIALS = (16, 64, 256)          # trials per candidate in each successive-halving round
+MAX_SURVIVORS = 32                    # candidates carried into each later round
+MAX_CANDIDATES = 5000                 # largest search space evaluated
+HORIZON_FACTOR = 2                    # trials stop playing at this multiple of the target's upper bound
+MAX_STREAK_DROPS = 20
+MAX_LEVEL_BONUS = 20
+
+
+# ------------------------------
+# Search space
+# ------------------------------
+def current_rules(system_name, config):
+    """(drops at streak 1..3, (min_bonus, max_bonus)) of `system_name` under `config`"""
+    rules = DropSim.create_systems_from_config(config.streak_bonus_map)[system_name]
+    min_bonus, max_bonus = DropSim.get_drop_bonus_range(system_name, config.drop_range_map)
+    return tuple(int(rules[level]()) for level in (1, 2, 3)), (int(min_bonus), int(max_bonus))
+
+
+def candidate_space(system_name, config, tune=TUNABLE, radius=DEFAULT_RADIUS):
+    """Every (streak drops, drop range) candidate within `radius` of the current rules.
+
+    Streak drops never decrease with the streak level and stay within
+    1..MAX_STREAK_DROPS. Bonus ranges have 0 <= min <= max <= MAX_LEVEL_BONUS.
+    Streak levels a session is too short to reach keep their current drops,
+    since they cannot change the result.
+    """
+    unknown = set(tune) - set(TUNABLE)
+    if unknown or not tune:
+        raise ValueError(f"Tune one or more of {', '.join(TUNABLE)}")
+    if radius < 0:
+        raise ValueError("radius must be at least 0")
+    streak_drops, drop_range = current_rules(system_name, config)
+
+    streak_options = [streak_drops]
+    if "streak_bonuses" in tune:
+        reachable = DropSim.calculate_max_achievable_streak(system_name, config.total_time_hours)
+        ranges = [range(max(1, drops - radius), min(MAX_STREAK_DROPS, drops + radius) + 1)
+                  for drops in streak_drops[:reachable]]
+        streak_options = [options + streak_drops[reachable:] for options in itertools.product(*ranges)
+                          if all(a <= b for a, b in zip(options, options[1:]))]
+    range_options = [drop_range]
+    if "drop_ranges" in tune:
+        low, high = drop_range
+        range_options = [(a, b)
+                         for a in range(max(0, low - radius), min(MAX_LEVEL_BONUS, low + radius) + 1)
+                         for b in range(max(0, high - radius), min(MAX_LEVEL_BONUS, high + radius) + 1) if a <= b]
+    return [(drops, bonus_range) for drops in streak_options for bonus_range in range_options]
+
+
+def candidate_config(system_name, config, candidate):
+    """`config` with `system_name`'s streak bonuses and drop range replaced by `candidate`'s"""
+    streak_drops, (min_bonus, max_bonus) = candidate
+    streak_bonuses = dict(config.streak_bonus_map or {})
+    streak_bonuses[system_name] = dict(zip((1, 2, 3), streak_drops))
+    drop_ranges = dict(config.drop_range_map or {})
+    drop_ranges[system_name] = (min_bonus, max_bonus)
+    return replace(config, streak_bonuses=streak_bonuses, drop_ranges=drop_ranges)
+
+
+# ------------------------------
+# Batched evaluation
+# ------------------------------
+class _CandidateDraws:
+    """CommonRandomNumbers seen through a candidates x trials batch.
+
+    Batch row r is trial r % trials of candidate r // trials: drops come
+    from that trial's draws.
+    """
+    def __init__(self, draws, trial_of_row):
+        self.draws = draws
+        self.trial_of_row = trial_of_row
+
+    def drop_uniforms(self, rows, drop_index):
+        return self.draws.drop_uniforms(self.trial_of_row[rows], drop_index)
+
+    def protection_uniforms(self, rows, drop_index):
+        return self.draws.protection_uniforms(self.trial_of_row[rows], drop_index)
+
+
+def hours_to_max_batch(system_name, candidates, trials, config=None, seed=None,
+                       max_hours=DropSim.MAX_PROGRESSION_HOURS):
+    """Hours each candidate's trials take to reach level 450: a candidates x trials matrix.
+
+    Follows simulate_until_max() (back-to-back sessions, streaks reset,
+    gear carried over) for every candidate in one batch, with common random
+    numbers across candidates. Slots follow `config`'s slot rules, which
+    every candidate shares. Trials short of 450 after max_hours are NaN.
+    """
+    config = config if config is not None else DropSim.default_config()
+    if not config.total_time_hours > 0:
+        raise ValueError("Session length must be positive to reach max level")
+    plan = DropSim.compile_plan(system_name, config)
+    num_slots = len(DropSim.ALL_GEAR_SLOTS)
+    num_candidates = len(candidates)
+    rows_total = num_candidates * trials
+    candidate_of_row = np.repeat(np.arange(num_candidates), trials)
+    trial_of_row = np.tile(np.arange(trials), num_candidates)
+
+    # activity_drops[c, a]: base drops of candidate c's a-th activity, as in the compiled plans
+    streak_drops = np.array([drops for drops, _ in candidates], dtype=np.int64)
+    streak_levels = np.minimum(np.arange(len(plan.activity_drops)), plan.max_achievable_streak)
+    activity_drops = np.hstack([np.zeros((num_candidates, 1), dtype=np.int64), streak_drops])[:, streak_levels]
+    bonus_ranges = np.array([bonus_range for _, bonus_range in candidates], dtype=np.int64)
+
+    min_bonus, max_bonus = bonus_ranges[candidate_of_row, 0], bonus_ranges[candidate_of_row, 1]
+
+    efficiency_seed, variation_seed, drop_seed, focus_seed = np.random.SeedSequence(seed).spawn(4)
+    efficiency_rng = np.random.default_rng(efficiency_seed)
+    variation_rng = np.random.default_rng(variation_seed)
+    focus_rng = np.random.default_rng(focus_seed)
+    draws = _CandidateDraws(DropSim.CommonRandomNumbers(trials, drop_seed), trial_of_row)
+    slot_sampler = plan.slot_sampler
+
+    gear_levels = np.full((rows_total, num_slots), config.starting_gear_level, dtype=np.int16)
+    level_sums = np.full(rows_total, config.starting_gear_level * num_slots, dtype=np.int64)
+    drops_done = np.zeros(rows_total, dtype=np.int64)
+    hours_to_max = np.full(rows_total, np.nan)
+    playing = np.ones(rows_total, dtype=bool)
+    if config.starting_gear_level >= 450:
+        hours_to_max[:] = 0
+        playing[:] = False
+
+    total_time_hours = config.total_time_hours
+    for session in DropSim.progression_sessions(total_time_hours, max_hours):
+        if not playing.any():
+            break
+        # One efficiency factor and one row of pinnacle variations per trial and session
+        efficiency_factors = plan.min_efficiency + (plan.max_efficiency - plan.min_efficiency) * efficiency_rng.random(trials)
+        avg_activity_times = (plan.base_time_per_activity * efficiency_factors)[trial_of_row]
+        session_activities = (total_time_hours * 60 / avg_activity_times).astype(np.int64)
+        variations = variation_rng.integers(-1, 2, (trials, plan.max_activities + 2)) if plan.drop_variation else None
+        focus_rows = None if slot_sampler is None else slot_sampler.session_rows(trials, focus_rng)
+        if focus_rows is not None:
+            focus_rows = focus_rows[trial_of_row]
+        reached = np.zeros(rows_total, dtype=bool)
+
+        for activity_num in range(1, int(session_activities[playing].max(initial=0)) + 1):
+            num_drops = activity_drops[candidate_of_row, min(activity_num, activity_drops.shape[1] - 1)]
+            if variations is not None:
+                num_drops = np.maximum(0, num_drops + variations[trial_of_row, activity_num - 1])
+            num_drops[(session_activities < activity_num) | ~playing] = 0
+
+            for drop_num in range(int(num_drops.max(initial=0))):
+                rows = np.flatnonzero(num_drops > drop_num)
+                DropSim._apply_batch_drops(gear_levels, level_sums, rows, None, min_bonus[rows], max_bonus[rows],
+                                           draws=draws, drop_index=drops_done[rows] + drop_num,
+                                           slot_sampler=slot_sampler, focus_rows=focus_rows)
+                reached[rows] |= level_sums[rows] // num_slots >= 450
+
+            drops_done += num_drops
+            finished = playing & reached
+            if finished.any():
+                hours_to_max[finished] = ((session - 1) * total_time_hours
+                                          + activity_num * avg_activity_times[finished] / 60)
+                playing &= ~finished
+
+    return hours_to_max.reshape(num_candidates, trials)
+
+
+# ------------------------------
+# Search
+# ------------------------------
+def _estimates(hours, max_hours):
+    """Mean hours to max and its 95% half-width per candidate; unfinished trials count as max_hours.
+
+    max_hours is a multiple of the target, so only candidates far off the
+    target have unfinished trials, and counting those trials low cannot
+    bring them onto it.
+    """
+    hours = np.where(np.isnan(hours), max_hours, hours)
+    trials = hours.shape[1]
+    half_widths = 1.96 * hours.std(axis=1, ddof=1) / np.sqrt(trials) if trials > 1 else np.full(len(hours), np.inf)
+    return hours.mean(axis=1), half_widths
+
+
+def _distance(candidate, current):
+    """How far a candidate moves from the current rules: the sum of absolute changes"""
+    (drops, bonus_range), (current_drops, current_range) = candidate, current
+    return sum(abs(a - b) for a, b in zip(drops + bonus_range, current_drops + current_range))
+
+
+def solve(system_name, target_hours, tolerance=2.0, config=None, tune=TUNABLE, radius=DEFAULT_RADIUS,
+          seed=None, round_trials=ROUND_TRIALS, max_survivors=MAX_SURVIVORS, results=5):
+    """Streak bonuses and drop ranges for `system_name` whose mean hours to max is target_hours +/- tolerance.
+
+    Every candidate in candidate_space() is screened with round_trials[0]
+    trials. Each later round re-runs the candidates still plausibly on
+    target (|mean - target| <= tolerance + half-width), at most
+    max_survivors of them, with more trials. Trials stop playing at
+    HORIZON_FACTOR times target_hours + tolerance. A candidate is "met"
+    when its whole 95% interval lies inside the target band. Returns the
+    best `results` candidates of the last round: met ones first, then the
+    fewest changes from the current rules, then the closest to the target.
+    """
+    if system_name not in DropSim.DEFAULT_SYSTEMS:
+        raise ValueError(f"Unknown system '{system_name}'")
+    if not target_hours > 0 or not tolerance > 0:
+        raise ValueError("target_hours and tolerance must be positive")
+    if results < 1:
+        raise ValueError("results must be at least 1")
+    config = config if config is not None else DropSim.default_config()
+    current = current_rules(system_name, config)
+    candidates = candidate_space(system_name, config, tune, radius)
+    max_hours = min(DropSim.MAX_PROGRESSION_HOURS, HORIZON_FACTOR * (target_hours + tolerance))
+    if len(candidates) > MAX_CANDIDATES:
+        raise ValueError(f"Search space has {len(candidates)} candidates; the limit is {MAX_CANDIDATES}. "
+                         f"Lower the radius or tune fewer settings")
+
+    rounds = []
+    rows_simulated = 0
+    for round_index, trials in enumerate(round_trials):
+        means, half_widths = _estimates(
+            hours_to_max_batch(system_name, candidates, trials, config, seed, max_hours), max_hours)
+        rows_simulated += len(candidates) * trials
+        misses = np.abs(means - target_hours)
+        rounds.append({"trials": trials, "candidates": len(candidates)})
+        if round_index == len(round_trials) - 1:
+            break
+        order = sorted(range(len(candidates)), key=lambda i: (misses[i], _distance(candidates[i], current)))
+        plausible = [i for i in order if misses[i] <= tolerance + half_widths[i]]
+        # Nothing plausible yet: keep the closest candidates and let more trials sort them out
+        keep = (plausible or order)[:max_survivors]
+        candidates = [candidates[i] for i in keep]
+
+    met = misses + half_widths <= tolerance
+    order = sorted(range(len(candidates)), key=lambda i: (not met[i], _distance(candidates[i], current), misses[i]))
+    best = []
+    for i in order[:results]:
+        drops, (min_bonus, max_bonus) = candidates[i]
+        best.append({
+            "streak_bonuses": dict(zip((1, 2, 3), drops)),
+            "drop_range": [min_bonus, max_bonus],
+            "hours_to_max": float(means[i]),
+            "ci_half_width": float(half_widths[i]),
+            "met": bool(met[i]),
+            "changes": _distance(candidates[i], current),
+        })
+    return {
+        "system_name": system_name,
+        "target_hours": target_hours,
+        "tolerance": tolerance,
+        "current": {"streak_bonuses": dict(zip((1, 2, 3), current[0])), "drop_range": list(current[1])},
+        "candidates": best,
+        "rounds": rounds,
+        "rows_simulated": rows_simulated,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Find streak bonuses and drop ranges that hit an hours-to-max target.")
+    parser.add_argument("--system", dest="system_name", required=True, choices=sorted(DropSim.DEFAULT_SYSTEMS))
+    parser.add_argument("--target", type=float, required=True, help="hours to reach level 450")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="allowed miss in hours (default 2)")
+    parser.add_argument("--tune", nargs="+", default=list(TUNABLE), choices=TUNABLE)
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS, help="largest change per value")
+    parser.add_argument("--total-time-hours", type=float, default=DropSim.TOTAL_TIME_HOURS)
+    parser.add_argument("--starting-gear-level", type=int, default=DropSim.STARTING_GEAR_LEVEL)
+    parser.add_argument("--streak-bonuses", type=json.loads, help="current streak bonuses as JSON")
+    parser.add_argument("--drop-ranges", type=json.loads, help="current drop ranges as JSON")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--results", type=int, default=5)
+    args = parser.parse_args()
+
+    config = DropSim.SimConfig(args.total_time_hours, args.starting_gear_level, args.streak_bonuses, args.drop_ranges)
+    start = time.perf_counter()
+    result = solve(args.system_name, args.target, args.tolerance, config, args.tune, args.radius, args.seed,
+                   results=args.results)
+    print(f"Searched {result['rounds'][0]['candidates']} candidates ({result['rows_simulated']:,} simulated trials) "
+          f"in {time.perf_counter() - start:.1f}s")
+    current = result["current"]
+    print(f"Current: streaks {current['streak_bonuses']} range {current['drop_range']}")
+    for candidate in result["candidates"]:
+        print(f"{'✅' if candidate['met'] else '  '} streaks {candidate['streak_bonuses']} "
+              f"range {candidate['drop_range']}: {candidate['hours_to_max']:.1f} ± {candidate['ci_half_width']:.1f} h "
+              f"({candidate['changes']} change{'s' if candidate['changes'] != 1 else ''})")
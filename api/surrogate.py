@@ -0,0 +1,315 @@
+"""Precomputed surrogate tables: instant statistics for common configs.
+
+Most requests only move the session length and starting level sliders and
+keep the default streak bonuses and drop ranges. An offline build runs
+high-trial Monte Carlo and time-to-max simulations over a grid of
+(total_time_hours, starting_gear_level) for each system and saves the
+results as a compressed .npz table. At runtime a request inside the grid,
+whose system rules match the table, is answered by bilinear interpolation
+in well under a millisecond, with a stated 95% error bound per metric: the interpolated
+Monte Carlo confidence half-width plus an interpolation error estimated
+from each grid node's neighbours. Everything else falls back to live
+simulation.
+
+Tables describe a system by its per-streak drop counts and drop bonus range
+only; a config that changes any other rule must not be answered from them.
+
+Usage:
+    python surrogate.py --workers 0          # rebuild surrogates/ui_defaults.npz
+"""
+import glob
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import DropSim
+
+SURROGATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "surrogates")
+
+# Grid and trial counts of the default build: every half hour the UI offers up to 12 hours, and every 10 levels near the 450 cap
+# where progress bends, so common requests land on a grid node
+DEFAULT_HOURS = tuple(hours / 2 for hours in range(1, 25)) + (16, 20, 24)
+DEFAULT_LEVELS = tuple(range(100, 300, 25)) + tuple(range(300, 401, 10))
+DEFAULT_MC_TRIALS = 20_000
+DEFAULT_TIME_TO_MAX_TRIALS = 2_000
+DEFAULT_SEED = 0
+
+# Streak bonuses and drop ranges the web UI sends until a user edits them (see index.html)
+UI_DEFAULT_STREAK_BONUSES = {
+    "solo": {1: 1, 2: 1, 3: 1},
+    "fireteam": {1: 1, 2: 2, 3: 3},
+    "pinnacle": {1: 2, 2: 3, 3: 4},
+}
+UI_DEFAULT_DROP_RANGES = {"solo": (1, 3), "fireteam": (1, 3), "pinnacle": (1, 3)}
+
+# Metrics kept per grid node and their statistics; "ci" is the 95% CI half-width of the mean
+METRICS = ("drops", "activities", "max_streak", "character_level", "character_level_gains",
+           "upgrade_rate", "total_upgrades", "hours_to_max")
+PERCENTILE_STATS = tuple(f"p{q}" for q in DropSim.SUMMARY_PERCENTILES)
+STATS = ("mean",) + PERCENTILE_STATS + ("min", "max", "ci")
+COLUMNS = tuple(f"{metric}_{stat}" for metric in METRICS for stat in STATS)
+# Share of time-to-max trials that reached 450 within MAX_PROGRESSION_HOURS
+REACHED_MAX_COLUMN = "hours_to_max_reached"
+ALL_COLUMNS = COLUMNS + (REACHED_MAX_COLUMN,)
+# Interpolated values are rounded to this many decimals to drop floating-point residue
+LOOKUP_DECIMALS = 6
+
+
+def system_rules(system_name, config):
+    """(drops at streak 1..3, min_bonus, max_bonus): what a table must match for `system_name`"""
+    rules = DropSim.create_systems_from_config(config.streak_bonus_map)[system_name]
+    min_bonus, max_bonus = DropSim.get_drop_bonus_range(system_name, config.drop_range_map)
+    return tuple(int(rules[level]()) for level in (1, 2, 3)) + (int(min_bonus), int(max_bonus))
+
+
+# ------------------------------
+# Offline build
+# ------------------------------
+def _build_node(task):
+    """Summary statistics of one (system, hours, level) grid node, in ALL_COLUMNS order"""
+    system_name, config, mc_trials, time_to_max_trials, seed = task
+    accumulator = None
+    for accumulator in DropSim.iter_monte_carlo(system_name, mc_trials, seed=seed, config=config):
+        pass
+    row = {}
+    for metric in METRICS:
+        if metric == "hours_to_max":
+            continue
+        values = accumulator.metrics[metric]
+        percentiles = values.percentiles(DropSim.SUMMARY_PERCENTILES)
+        row.update({f"{metric}_{stat}": value for stat, value in zip(PERCENTILE_STATS, percentiles)})
+        row.update({
+            f"{metric}_mean": values.mean(),
+            f"{metric}_min": values.minimum,
+            f"{metric}_max": values.maximum,
+            f"{metric}_ci": values.confidence_half_width(),
+        })
+
+    result = DropSim.simulate_until_max(system_name, time_to_max_trials, rng=np.random.default_rng(seed),
+                                        config=config)
+    hours = result["hours"][result["reached_max"]]
+    row[REACHED_MAX_COLUMN] = hours.size / time_to_max_trials
+    if hours.size:
+        percentiles = np.percentile(hours, DropSim.SUMMARY_PERCENTILES)
+        row.update({f"hours_to_max_{stat}": value for stat, value in zip(PERCENTILE_STATS, percentiles)})
+        row.update({
+            "hours_to_max_mean": hours.mean(),
+            "hours_to_max_min": hours.min(),
+            "hours_to_max_max": hours.max(),
+            "hours_to_max_ci": 1.96 * hours.std(ddof=1) / np.sqrt(hours.size) if hours.size > 1 else 0.0,
+        })
+    else:
+        row.update({f"hours_to_max_{stat}": np.nan for stat in STATS})
+    return [float(row[column]) for column in ALL_COLUMNS]
+
+
+def _interpolation_error(values, grid, axis):
+    """Per-node estimate of the error of interpolating along one grid axis.
+
+    Each interior node is predicted by linear interpolation from its two
+    neighbours along `axis`; the miss bounds the error of interpolating over
+    the narrower cells on either side of it. Edge nodes take the estimate
+    of their inner neighbour.
+    """
+    grid = np.asarray(grid, dtype=float)
+    if grid.size < 3:
+        return np.zeros_like(values)
+    low = np.take(values, range(0, grid.size - 2), axis=axis)
+    mid = np.take(values, range(1, grid.size - 1), axis=axis)
+    high = np.take(values, range(2, grid.size), axis=axis)
+    shape = [1] * values.ndim
+    shape[axis] = grid.size - 2
+    weight = ((grid[1:-1] - grid[:-2]) / (grid[2:] - grid[:-2])).reshape(shape)
+    miss = np.abs(mid - (low + weight * (high - low)))
+    return np.concatenate([np.take(miss, [0], axis=axis), miss, np.take(miss, [-1], axis=axis)], axis=axis)
+
+
+def build_table(path, hours=DEFAULT_HOURS, levels=DEFAULT_LEVELS, mc_trials=DEFAULT_MC_TRIALS,
+                time_to_max_trials=DEFAULT_TIME_TO_MAX_TRIALS, streak_bonuses=None, drop_ranges=None,
+                seed=DEFAULT_SEED, workers=1, progress=None):
+    """Simulate every grid node for every system and save the table to `path`.
+
+    Every node reuses the same seed, so neighbouring nodes share their random
+    draws and the surface stays smooth between them. `progress(done, total)`
+    is called as nodes complete; workers=None uses every CPU.
+    """
+    streak_bonuses = UI_DEFAULT_STREAK_BONUSES if streak_bonuses is None else streak_bonuses
+    drop_ranges = UI_DEFAULT_DROP_RANGES if drop_ranges is None else drop_ranges
+    systems = list(DropSim.DEFAULT_SYSTEMS)
+    base = DropSim.SimConfig(streak_bonuses=streak_bonuses, drop_ranges=drop_ranges)
+    tasks = [
+        (system_name, DropSim.SimConfig(hours_value, level, base.streak_bonuses, base.drop_ranges),
+         mc_trials, time_to_max_trials, seed)
+        for system_name in systems for hours_value in hours for level in levels
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        rows = []
+        for row in (pool.map(_build_node, tasks) if pool is not None else map(_build_node, tasks)):
+            rows.append(row)
+            if progress is not None:
+                progress(len(rows), len(tasks))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    # (systems, columns, hours, levels)
+    values = np.array(rows).reshape(len(systems), len(hours), len(levels), len(ALL_COLUMNS)).transpose(0, 3, 1, 2)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez_compressed(
+        path,
+        systems=np.array(systems),
+        rules=np.array([system_rules(system_name, base) for system_name in systems], dtype=np.int32),
+        hours=np.asarray(hours, dtype=np.float64),
+        levels=np.asarray(levels, dtype=np.float64),
+        columns=np.array(ALL_COLUMNS),
+        values=values,
+        hours_error=_interpolation_error(values, hours, axis=2),
+        levels_error=_interpolation_error(values, levels, axis=3),
+        trials=np.array([mc_trials, time_to_max_trials], dtype=np.int64),
+    )
+    return path
+
+
+# ------------------------------
+# Runtime lookup
+# ------------------------------
+class SurrogateTable:
+    """One loaded .npz table: every system's grid for one set of base rules"""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.path = path
+            self.systems = [str(system_name) for system_name in data["systems"]]
+            self.rules = {system_name: tuple(int(value) for value in rules)
+                          for system_name, rules in zip(self.systems, data["rules"])}
+            self.hours = data["hours"]
+            self.levels = data["levels"]
+            self.columns = {str(column): index for index, column in enumerate(data["columns"])}
+            self.values = data["values"]
+            self.hours_error = data["hours_error"]
+            self.levels_error = data["levels_error"]
+            self.mc_trials, self.time_to_max_trials = (int(value) for value in data["trials"])
+
+    def covers(self, system_name, config):
+        """Whether `config` is inside the grid and uses this table's rules for `system_name`"""
+        return (system_name in self.rules
+                and self.hours[0] <= config.total_time_hours <= self.hours[-1]
+                and self.levels[0] <= config.starting_gear_level <= self.levels[-1]
+                and self.rules[system_name] == system_rules(system_name, config)
+                and config.slot_sampler(system_name) is None
+                and not config.tiers)
+
+    def lookup(self, system_name, config):
+        """Interpolated statistics for a covered config.
+
+        Returns {"stats": monte_carlo()-style summary, "hours_to_max":
+        time_to_max()-style hours statistics or None, "error_bounds": 95%
+        bound per metric mean, "trials": Monte Carlo trials per node}.
+        Percentiles are interpolated like the other statistics; tables keep no histograms.
+        """
+        hours_index, hours_weight = _bracket(self.hours, config.total_time_hours)
+        level_index, level_weight = _bracket(self.levels, config.starting_gear_level)
+        weights = np.array([[(1 - hours_weight) * (1 - level_weight), (1 - hours_weight) * level_weight],
+                            [hours_weight * (1 - level_weight), hours_weight * level_weight]])
+        cell = (self.systems.index(system_name), slice(None),
+                slice(hours_index, hours_index + 2), slice(level_index, level_index + 2))
+        values = (self.values[cell] * weights).sum(axis=(1, 2))
+        # Only an axis the config falls between nodes on adds interpolation error
+        interpolation_error = np.zeros(len(self.columns))
+        if hours_weight not in (0.0, 1.0):
+            interpolation_error += np.nanmax(self.hours_error[cell], axis=(1, 2))
+        if level_weight not in (0.0, 1.0):
+            interpolation_error += np.nanmax(self.levels_error[cell], axis=(1, 2))
+
+        def value(column):
+            return round(float(values[self.columns[column]]), LOOKUP_DECIMALS)
+
+        def bound(metric):
+            column = self.columns[f"{metric}_mean"]
+            return value(f"{metric}_ci") + float(interpolation_error[column])
+
+        def summary(metric):
+            return {"average": value(f"{metric}_mean"), "95%_tile": value(f"{metric}_p95"),
+                    "min": value(f"{metric}_min"), "max": value(f"{metric}_max"),
+                    "percentiles": {stat: value(f"{metric}_{stat}") for stat in PERCENTILE_STATS},
+                    "histogram": None}
+
+        hours_to_max = None
+        if value(REACHED_MAX_COLUMN) >= 1 and not np.isnan(value("hours_to_max_mean")):
+            hours_to_max = summary("hours_to_max")
+        return {
+            "stats": {
+                "trials": self.mc_trials,
+                "drops": summary("drops"),
+                "activities": summary("activities"),
+                "max_streak": summary("max_streak"),
+                "gear": {metric: summary(metric) for metric in
+                         ("character_level", "character_level_gains", "upgrade_rate", "total_upgrades")},
+            },
+            "hours_to_max": hours_to_max,
+            "error_bounds": {metric: bound(metric) for metric in METRICS
+                             if metric != "hours_to_max" or hours_to_max is not None},
+            "trials": self.mc_trials,
+        }
+
+
+def _bracket(grid, value):
+    """Index of the grid cell holding `value` and the weight of its upper node"""
+    index = int(np.clip(np.searchsorted(grid, value, side="right") - 1, 0, grid.size - 2))
+    weight = (value - grid[index]) / (grid[index + 1] - grid[index])
+    return index, float(min(max(weight, 0.0), 1.0))
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def load_tables(directory=SURROGATE_DIR):
+    """Every table under `directory`, loaded once per process"""
+    global _tables
+    if _tables is None:
+        with _tables_lock:
+            if _tables is None:
+                _tables = [SurrogateTable(path) for path in sorted(glob.glob(os.path.join(directory, "*.npz")))]
+    return _tables
+
+
+def find(system_name, config):
+    """The first loaded table covering `config` for `system_name`, or None"""
+    for table in load_tables():
+        if table.covers(system_name, config):
+            return table
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Build a DropSim surrogate table.")
+    parser.add_argument("--out", default=os.path.join(SURROGATE_DIR, "ui_defaults.npz"))
+    parser.add_argument("--hours", nargs="+", type=float, default=list(DEFAULT_HOURS))
+    parser.add_argument("--levels", nargs="+", type=int, default=list(DEFAULT_LEVELS))
+    parser.add_argument("--trials", type=int, default=DEFAULT_MC_TRIALS, help="Monte Carlo trials per node")
+    parser.add_argument("--time-to-max-trials", type=int, default=DEFAULT_TIME_TO_MAX_TRIALS)
+    parser.add_argument("--streak-bonuses", type=json.loads, help="JSON; defaults to the web UI's values")
+    parser.add_argument("--drop-ranges", type=json.loads, help="JSON; defaults to the web UI's values")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = every CPU)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    build_table(args.out, hours=args.hours, levels=args.levels, mc_trials=args.trials,
+                time_to_max_trials=args.time_to_max_trials, streak_bonuses=args.streak_bonuses,
+                drop_ranges=args.drop_ranges, seed=args.seed, workers=args.workers or None,
+                progress=lambda done, total: print(f"\r{done}/{total} grid nodes", end="", file=sys.stderr))
+    print(f"\nBuilt {args.out} in {time.perf_counter() - start:.0f}s ({os.path.getsize(args.out)} bytes)",
+          file=sys.stderr)
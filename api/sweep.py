@@ -0,0 +1,178 @@
+"""Parameter sweeps: Monte Carlo statistics over a grid of configurations.
+
+A sweep takes axis definitions, e.g.
+
+    {"system_name": ["solo", "pinnacle"],
+     "starting_gear_level": [200, 250, 300],
+     "total_time_hours": [1, 2, 4]}
+
+and runs every combination. The whole grid is scheduled as one list of
+chunk tasks, so a single worker pool serves every grid point. Every point
+reuses the same chunk seeds (common random numbers), so differences between
+neighbouring points are not drowned out by sampling noise. The result is a
+tidy table with one row per grid point.
+
+Usage:
+    python sweep.py --system solo fireteam --starting-gear-level 200 250 300 \
+        --total-time-hours 1 2 4 --trials 2000 --seed 1 --out sweep.csv
+"""
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import DropSim
+
+AXES = ("system_name", "starting_gear_level", "total_time_hours", "drop_ranges", "streak_bonuses", "slot_rules",
+        "tiers", "tier_odds")
+CONFIG_AXES = AXES[1:]
+SUMMARY_METRICS = ("drops", "activities", "max_streak", "character_level",
+                   "character_level_gains", "upgrade_rate", "total_upgrades")
+
+
+def expand_grid(axes, base=None):
+    """Every combination of the axis values, as a list of complete grid points.
+
+    Axes not listed take their value from `base` (a DropSim.SimConfig or a
+    dict of settings, optionally with system_name), then from the defaults.
+    """
+    unknown = set(axes) - set(AXES)
+    if unknown:
+        raise ValueError(f"Unknown sweep axis(es): {', '.join(sorted(unknown))}; expected one of {', '.join(AXES)}")
+    for name, values in axes.items():
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f"Sweep axis {name} needs a non-empty list of values")
+
+    if isinstance(base, DropSim.SimConfig):
+        base = base.to_dict()
+    point = dict(DropSim.default_config().to_dict(), system_name="solo")
+    point.update(base or {})
+    names = list(axes)
+    grid = []
+    for values in itertools.product(*(axes[name] for name in names)):
+        grid_point = dict(point, **dict(zip(names, values)))
+        if grid_point["system_name"] not in DropSim.DEFAULT_SYSTEMS:
+            raise ValueError(f"Unknown system '{grid_point['system_name']}'")
+        grid_point["config"] = DropSim.SimConfig(**{name: grid_point[name] for name in CONFIG_AXES})
+        grid.append(grid_point)
+    return grid
+
+
+def _row(point, accumulator):
+    """One tidy table row: the grid point's settings followed by its statistics"""
+    row = {"system_name": point["system_name"], **point["config"].to_dict()}
+    row["trials"] = accumulator.trials
+    for name in SUMMARY_METRICS:
+        metric = accumulator.metrics[name]
+        row[f"{name}_mean"] = float(metric.mean())
+        for q, value in zip(DropSim.SUMMARY_PERCENTILES, metric.percentiles(DropSim.SUMMARY_PERCENTILES)):
+            row[f"{name}_p{q}"] = float(value)
+        row[f"{name}_ci"] = float(metric.confidence_half_width())
+        row[f"{name}_min"] = float(metric.minimum)
+        row[f"{name}_max"] = float(metric.maximum)
+    if accumulator.tiers is not None:
+        tiers = accumulator.tiers.summary()
+        row["average_slot_tier"] = tiers["average_slot_tier"]
+        row.update({f"set_tier_{tier}": share for tier, share in tiers["set_tier"].items()})
+    return row
+
+
+def run_sweep(axes, trials=1000, seed=None, base=None, chunk_size=DropSim.MONTE_CARLO_CHUNK_SIZE,
+              workers=1, progress=None):
+    """Monte Carlo statistics for every point of the grid defined by `axes`.
+
+    Returns a list of row dicts (see _row). `progress(points_done, points)`
+    is called as grid points complete; an exception raised by it stops the
+    sweep. workers=None uses every CPU.
+    """
+    grid = expand_grid(axes, base)
+    num_chunks = -(-trials // chunk_size)
+    chunk_seeds = np.random.SeedSequence(seed).spawn(num_chunks)
+    tasks = [
+        (point["system_name"], min(chunk_size, trials - chunk_index * chunk_size), point["config"], chunk_seed, None, "hours")
+        for point in grid
+        for chunk_index, chunk_seed in enumerate(chunk_seeds)
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(tasks) > 1 else None
+    try:
+        if pool is None:
+            results = map(DropSim._simulate_chunk, tasks)
+        else:
+            # Batch several small tasks per inter-process round trip
+            results = pool.map(DropSim._simulate_chunk, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+
+        rows = []
+        for point in grid:
+            accumulator = DropSim.MonteCarloAccumulator(point["config"].starting_gear_level, tiers=point["config"].tiers)
+            for _ in range(num_chunks):
+                chunk_accumulator = next(results)
+                DropSim._count_chunk(point["system_name"], chunk_accumulator)
+                accumulator.merge(chunk_accumulator)
+            rows.append(_row(point, accumulator))
+            if progress is not None:
+                progress(len(rows), len(grid))
+        return rows
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def columns(rows):
+    """Column order of a sweep table: every column any row has, in first-seen order"""
+    return list(dict.fromkeys(column for row in rows for column in row)) if rows else list(AXES)
+
+
+def write_csv(rows, path):
+    """Write a sweep table as CSV; dict-valued settings are JSON-encoded"""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns(rows))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: json.dumps(value) if isinstance(value, (dict, list)) or value is None else value
+                             for key, value in row.items()})
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Run DropSim Monte Carlo over a grid of configurations.")
+    parser.add_argument("--system", nargs="+", dest="system_name", help="systems: solo fireteam pinnacle")
+    parser.add_argument("--starting-gear-level", nargs="+", type=int)
+    parser.add_argument("--total-time-hours", nargs="+", type=float)
+    parser.add_argument("--drop-ranges", nargs="+", type=json.loads,
+                        help='JSON objects, e.g. \'{"solo": [1, 3]}\'')
+    parser.add_argument("--streak-bonuses", nargs="+", type=json.loads,
+                        help='JSON objects, e.g. \'{"fireteam": {"1": 2, "2": 3, "3": 4}}\'')
+    parser.add_argument("--slot-rules", nargs="+", type=json.loads,
+                        help='JSON objects, e.g. \'{"solo": {"focus_slot": "rotating", "focus_weight": 1}}\'')
+    parser.add_argument("--tiers", action="store_const", const=[True], help="track gear tiers")
+    parser.add_argument("--tier-odds", nargs="+", type=json.loads,
+                        help='JSON objects, e.g. \'{"pinnacle": {"400": {"4": 0.5, "5": 0.5}}}\'')
+    parser.add_argument("--axes", type=json.loads, help="all axes as one JSON object")
+    parser.add_argument("--trials", type=int, default=1000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = every CPU)")
+    parser.add_argument("--out", help="CSV file to write (default: stdout)")
+    args = parser.parse_args()
+
+    axes = dict(args.axes or {})
+    for name in AXES:
+        if getattr(args, name) is not None:
+            axes[name] = getattr(args, name)
+    if not axes:
+        parser.error("give at least one axis")
+
+    start = time.perf_counter()
+    rows = run_sweep(axes, trials=args.trials, seed=args.seed, workers=args.workers or None,
+                     progress=lambda done, total: print(f"\r{done}/{total} grid points", end="", file=sys.stderr))
+    print(f"\nSwept {len(rows)} grid points x {args.trials} trials in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+    write_csv(rows, args.out or "/dev/stdout")
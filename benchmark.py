@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the D2 Loot Sim engine and API handlers
+
+Times run_sim, GearTracker.apply_drop, monte_carlo, the /run_simulation
+and /compare_systems handlers (through Flask's test client, simulated and
+answered from the surrogate tables) and cold starts
+of the API in a fresh interpreter, recording the median and best wall time
+of several repeats and the peak RSS of each benchmark. Scaling
+curves cover trials, session hours and worker processes. Results are compared
+with a stored baseline JSON, and the run fails when any benchmark's median
+is slower (or its peak RSS larger) than the baseline's by more than the
+threshold. Runs with fewer repeats than the baseline are not compared.
+
+Usage:
+    python benchmark.py                       # compare with benchmark_baseline.json
+    python benchmark.py --save-baseline       # record a new baseline on this machine
+    python benchmark.py --quick --only monte_carlo --threshold 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+import numpy as np
+
+import DropSim
+import surrogate
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+# Fail when 25% slower or larger than the baseline. The committed baseline comes from a
+# 1-CPU Linux container (see its "machine" entry); re-record it on the machine you compare on
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5              # medians of fewer runs swing too much for the threshold
+MIN_REGRESSION_SECONDS = 0.005  # ignore slowdowns smaller than timer noise
+MIN_REGRESSION_RSS_MB = 10      # ignore peak RSS growth smaller than allocator noise
+
+RUN_SIM_RUNS = 200
+APPLY_DROP_DROPS = 100_000
+BENCH_SYSTEM = 'pinnacle'       # pinnacle exercises every code path, including drop variation
+
+TRIALS_CURVE = (1_000, 10_000, 100_000)
+HOURS_CURVE = (1, 2, 4, 8)
+WORKERS_CURVE = (1, 2, 4)
+HOURS_CURVE_TRIALS = 10_000
+WORKERS_CURVE_TRIALS = 100_000
+QUICK_TRIALS_LIMIT = 10_000     # --quick skips trial counts above this
+QUICK_WORKERS_CURVE_TRIALS = 20_000
+
+
+# ------------------------------
+# Peak RSS
+# ------------------------------
+def _reset_peak_rss():
+    """Reset the kernel's peak RSS counter (Linux); elsewhere peaks only grow"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process since the last reset, in MB (worker processes excluded)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# Appended to subprocess benchmarks so the child prints its own peak RSS in MB.
+# VmHWM is per address space; on Linux ru_maxrss also counts the parent's RSS at fork
+PRINT_PEAK_RSS_SCRIPT = """
+import resource
+try:
+    with open('/proc/self/status') as f:
+        print(next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1024)
+except (OSError, StopIteration):
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024)
+"""
+
+
+# ------------------------------
+# Benchmarks
+# ------------------------------
+def bench_run_sim():
+    rng = random.Random(1)
+    for _ in range(RUN_SIM_RUNS):
+        DropSim.run_sim(BENCH_SYSTEM, rng=rng)
+    return RUN_SIM_RUNS
+
+
+def bench_apply_drop():
+    gear_tracker = DropSim.GearTracker(rng=random.Random(1))
+    for _ in range(APPLY_DROP_DROPS):
+        gear_tracker.apply_drop(BENCH_SYSTEM)
+    return APPLY_DROP_DROPS
+
+
+def bench_monte_carlo(trials, total_time_hours=None, workers=1):
+    def run():
+        DropSim.monte_carlo(BENCH_SYSTEM, trials=trials, seed=1, total_time_hours=total_time_hours,
+                            workers=workers)
+        return trials
+    return run
+
+
+def _test_client():
+    # Every request must run the simulation, so switch the result cache off
+    os.environ['DROPSIM_CACHE_SIZE'] = '0'
+    os.environ['DROPSIM_CACHE_DIR'] = ''
+    import index
+    return index.app.test_client()
+
+
+def bench_endpoint(path, payload):
+    def run():
+        response = _test_client().post(path, json=payload)
+        if not response.get_json().get('success'):
+            raise RuntimeError(f"{path} failed: {response.get_json().get('error')}")
+        return 1
+    return run
+
+
+def bench_cold_start(first_request=None):
+    """A fresh interpreter importing the API (and optionally serving one request).
+
+    The interpreter prints its own peak RSS, which is reported instead of
+    this process's: the harness's footprint says nothing about a cold start.
+    """
+    script = f"import sys; sys.path.insert(0, {API_DIR!r}); import index\n"
+    if first_request is not None:
+        path, payload = first_request
+        script += f"assert index.app.test_client().post({path!r}, json={payload!r}).get_json()['success']\n"
+    script += PRINT_PEAK_RSS_SCRIPT
+    env = dict(os.environ, DROPSIM_WARMUP='0', DROPSIM_CACHE_DIR='')
+
+    def run():
+        child = subprocess.run([sys.executable, '-c', script], check=True, env=env, capture_output=True, text=True)
+        return 1, float(child.stdout.split()[-1])
+    return run
+
+
+def benchmarks(quick=False):
+    """(name, function, unit) of every benchmark, plus the scaling curves over them"""
+    trials_curve = [trials for trials in TRIALS_CURVE if not quick or trials <= QUICK_TRIALS_LIMIT]
+    workers_trials = QUICK_WORKERS_CURVE_TRIALS if quick else WORKERS_CURVE_TRIALS
+
+    suite = [
+        ('run_sim', bench_run_sim, 'runs'),
+        ('apply_drop', bench_apply_drop, 'drops'),
+    ]
+    curves = {'trials': [], 'session_hours': [], 'workers': []}
+    for trials in trials_curve:
+        name = f'monte_carlo.trials={trials}'
+        suite.append((name, bench_monte_carlo(trials), 'trials'))
+        curves['trials'].append((trials, name))
+    for hours in HOURS_CURVE:
+        name = f'monte_carlo.session_hours={hours}'
+        suite.append((name, bench_monte_carlo(HOURS_CURVE_TRIALS, total_time_hours=hours), 'trials'))
+        curves['session_hours'].append((hours, name))
+    for workers in WORKERS_CURVE:
+        name = f'monte_carlo.workers={workers}'
+        suite.append((name, bench_monte_carlo(workers_trials, workers=workers), 'trials'))
+        curves['workers'].append((workers, name))
+    suite += [
+        ('api.run_simulation', bench_endpoint('/run_simulation', {'system_name': BENCH_SYSTEM}), 'requests'),
+        ('api.compare_systems', bench_endpoint('/compare_systems', {'trials': 1000, 'seed': 1}), 'requests'),
+        ('api.compare_systems.surrogate', bench_endpoint('/compare_systems', {'config': {
+            'streak_bonuses': surrogate.UI_DEFAULT_STREAK_BONUSES,
+            'drop_ranges': surrogate.UI_DEFAULT_DROP_RANGES}}), 'requests'),
+        ('cold_start.import', bench_cold_start(), 'starts'),
+        ('cold_start.first_simulation',
+         bench_cold_start(('/run_simulation', {'system_name': BENCH_SYSTEM, 'seed': 1})), 'starts'),
+    ]
+    return suite, curves
+
+
+def measure(function):
+    """Wall time, operation count and peak RSS in MB of one run of `function`.
+
+    `function` returns its operation count, or (operations, peak RSS in MB)
+    when the work runs in another process.
+    """
+    _reset_peak_rss()
+    start = time.perf_counter()
+    ops = function()
+    seconds = time.perf_counter() - start
+    if isinstance(ops, tuple):
+        return seconds, ops[0], ops[1]
+    return seconds, ops, _peak_rss_mb()
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_suite(quick=False, repeat=DEFAULT_REPEAT, only=None):
+    """Median and best wall time and peak RSS of every benchmark over `repeat` runs.
+
+    Runs go in rounds of one run per benchmark, so a slow spell of the
+    machine lands on one run of several benchmarks rather than on every run
+    of one, and the medians stay put.
+    """
+    suite, curves = benchmarks(quick)
+    suite = [(name, function, unit) for name, function, unit in suite
+             if not only or any(pattern in name for pattern in only)]
+    for _, function, _ in suite:
+        function()  # Warm-up: imports, compiled plans, first-touch allocations
+    runs = {name: [] for name, _, _ in suite}
+    for _ in range(repeat):
+        for name, function, _ in suite:
+            runs[name].append(measure(function))
+
+    results = {}
+    for name, _, unit in suite:
+        times, ops, peaks = zip(*runs[name])
+        seconds = float(np.median(times))
+        results[name] = {'seconds': seconds, 'best_seconds': min(times), 'peak_rss_mb': max(peaks),
+                         'ops_per_second': ops[0] / seconds, 'unit': unit}
+        print(f"{name:<34} {seconds * 1000:>10.1f} ms "
+              f"{results[name]['ops_per_second']:>14,.0f} {unit}/s {results[name]['peak_rss_mb']:>8.1f} MB")
+
+    curve_results = {}
+    for curve, points in curves.items():
+        points = [(x, name) for x, name in points if name in results]
+        if points:
+            curve_results[curve] = {
+                'x': [x for x, _ in points],
+                'seconds': [results[name]['seconds'] for _, name in points],
+                'peak_rss_mb': [results[name]['peak_rss_mb'] for _, name in points],
+            }
+    return {'machine': machine_info(), 'quick': quick, 'repeat': repeat, 'benchmarks': results,
+            'curves': curve_results}
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Benchmarks whose median time or peak RSS regressed beyond `threshold` (fractional) against the baseline"""
+    regressions = []
+    for name, result in report['benchmarks'].items():
+        previous = baseline['benchmarks'].get(name)
+        if previous is None:
+            continue
+        seconds_ratio = result['seconds'] / previous['seconds']
+        if (seconds_ratio > 1 + threshold
+                and result['seconds'] - previous['seconds'] > MIN_REGRESSION_SECONDS):
+            regressions.append(f"{name}: {previous['seconds'] * 1000:.1f} ms -> "
+                               f"{result['seconds'] * 1000:.1f} ms ({seconds_ratio:.2f}x)")
+        rss_ratio = result['peak_rss_mb'] / previous['peak_rss_mb']
+        if (rss_ratio > 1 + threshold
+                and result['peak_rss_mb'] - previous['peak_rss_mb'] > MIN_REGRESSION_RSS_MB):
+            regressions.append(f"{name}: peak RSS {previous['peak_rss_mb']:.1f} MB -> "
+                               f"{result['peak_rss_mb']:.1f} MB ({rss_ratio:.2f}x)")
+    return regressions
+
+
+def print_curves(report):
+    for curve, points in report['curves'].items():
+        print(f"\n{curve} scaling:")
+        first = points['seconds'][0]
+        for x, seconds in zip(points['x'], points['seconds']):
+            print(f"  {f'{curve}={x}':<24} {seconds * 1000:>10.1f} ms  ({seconds / first:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the D2 Loot Sim engine and API handlers.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare with or save')
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed fractional slowdown before failing (default 0.25)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='runs per benchmark; the median counts (at least the baseline\'s when comparing)')
+    parser.add_argument('--quick', action='store_true', help='skip the 100k-trial benchmarks')
+    parser.add_argument('--only', nargs='+', help='run only benchmarks whose name contains one of these')
+    parser.add_argument('--out', help='also write this run as JSON here')
+    args = parser.parse_args()
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        # Medians of fewer runs are noisier than the baseline's, so they would fail on noise
+        baseline_repeat = baseline.get('repeat', DEFAULT_REPEAT)
+        if args.repeat < baseline_repeat:
+            print(f"❌ {args.baseline} was recorded with --repeat {baseline_repeat}; "
+                  f"compare with at least as many repeats, or pass --save-baseline")
+            return 2
+
+    report = run_suite(quick=args.quick, repeat=args.repeat, only=args.only)
+    print_curves(report)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    machine = baseline.get('machine', {})
+    print(f"\nBaseline machine: {machine.get('platform')}, {machine.get('cpus')} CPU(s), "
+          f"Python {machine.get('python')}, NumPy {machine.get('numpy')}")
+    if machine != report['machine']:
+        print("⚠️  Baseline was recorded on a different machine or environment; timings may not be comparable")
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
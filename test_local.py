@@ -1,27 +1,482 @@
 #!/usr/bin/env python3
 """
 Quick test script to verify D2 Loot Sim setup
+
+Runs a few simulations, then one behavior check per engine and API feature.
+Any failed check exits non-zero.
 """
 import sys
 import os
 sys.path.append('api')
 
+SYSTEMS = ['solo', 'fireteam', 'pinnacle']
+
+
+def _client():
+    """Flask test client of the API, without the disk cache or background warm-up"""
+    os.environ.setdefault('DROPSIM_CACHE_DIR', '')
+    os.environ.setdefault('DROPSIM_WARMUP', '0')
+    import index
+    return index.app.test_client()
+
+
+def check_starting_level_bounds():
+    """Starting levels outside the gear level range are refused before any storage dtype sees them"""
+    client = _client()
+    for level in (-5, 451, 40000):
+        for path in ('/run_simulation', '/compare_systems'):
+            response = client.post(path, json={'config': {'starting_gear_level': level}, 'trials': 10})
+            assert response.status_code == 400, f"{path} with starting level {level}: {response.status_code}"
+            assert 'starting_gear_level' in response.get_json()['error']
+    print("✅ Out-of-range starting levels are a 400")
+
+
+def check_worker_determinism():
+    """A seed gives the same Monte Carlo results for any worker count"""
+    single = DropSim.monte_carlo('fireteam', trials=4000, seed=7, chunk_size=1000, workers=1)
+    sharded = DropSim.monte_carlo('fireteam', trials=4000, seed=7, chunk_size=1000, workers=2)
+    assert single == sharded, "monte_carlo results differ between workers=1 and workers=2"
+    print("✅ Seeded Monte Carlo identical with 1 and 2 workers")
+
+
+def check_exact_solver():
+    """The exact solver agrees with a large Monte Carlo run, and its endpoint refuses long sessions"""
+    import exact
+    exact_stats = exact.exact_distribution('pinnacle')
+    sampled = DropSim.monte_carlo('pinnacle', trials=20000, seed=1)
+    for metric, exact_average, sampled_average in [
+            ('drops', exact_stats['drops']['average'], sampled['drops']['average']),
+            ('character_level', exact_stats['gear']['character_level']['average'],
+             sampled['gear']['character_level']['average'])]:
+        assert abs(exact_average - sampled_average) <= 0.005 * exact_average, \
+            f"exact {metric} {exact_average:.2f} vs Monte Carlo {sampled_average:.2f}"
+    assert exact_stats['percentile_method'] == 'inverse_cdf'
+    client = _client()
+    assert client.post('/exact_distribution', json={'config': {'total_time_hours': 8}}).status_code == 400
+    response = client.post('/exact_distribution', json={'config': {'slot_rules': {'solo': {'weights': {'power': 2}}}}})
+    assert response.status_code == 400, "configs the solver refuses should be a 400"
+    print(f"✅ Exact solver matches Monte Carlo: character level {exact_stats['gear']['character_level']['average']:.2f}")
+
+
+def check_time_to_max_unreached():
+    """Sessions without play time never reach max instead of looping forever"""
+    for system in SYSTEMS:
+        assert DropSim.time_to_max(system, trials=10, total_time_hours=0)['hours'] is None
+    print("✅ Time to max with zero-hour sessions reports max as unreached")
+
+
+def check_result_cache():
+    """The result cache serves repeats, evicts the least recently used entry and counts both"""
+    from result_cache import ResultCache
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None, "the least recently used entry should be evicted"
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (3, 1, 1, 2), stats
+    client = _client()
+    body = {'trials': 200, 'seed': 11, 'surrogate': False}
+    first = client.post('/compare_systems', json=body).get_json()
+    second = client.post('/compare_systems', json=body).get_json()
+    assert not first['cached'] and second['cached'] and first['results'] == second['results']
+    print("✅ Result cache hits, misses and LRU eviction")
+
+
+def check_job_cancel():
+    """A cancelled job stops after its current chunk and reports itself cancelled"""
+    import time
+    client = _client()
+    response = client.post('/jobs', json={'type': 'monte_carlo', 'system_name': 'solo', 'trials': 1_000_000})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert client.delete(f'/jobs/{job_id}').get_json()['success']
+    deadline = time.time() + 10
+    while True:
+        job = client.get(f'/jobs/{job_id}').get_json()['job']
+        if job['status'] in ('done', 'failed', 'cancelled') or time.time() > deadline:
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'cancelled', f"job status {job['status']}"
+    assert job['result'] is None
+    trials_done = job['progress'].get('solo', {}).get('trials_done', 0)
+    assert trials_done < 1_000_000, f"cancelled job ran {trials_done} trials"
+    print(f"✅ Cancelled job stopped after {trials_done} of 1,000,000 trials")
+
+
+def check_compare_stream():
+    """The compare stream sends growing partial estimates, then a result matching /compare_systems"""
+    import json
+    client = _client()
+    body = {'trials': 300, 'seed': 5, 'surrogate': False}
+    response = client.post('/compare_systems/stream', json=body)
+    assert response.content_type.startswith('text/event-stream')
+    events = []
+    for message in response.get_data(as_text=True).strip().split('\n\n'):
+        event, data = message.split('\n', 1)
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    names = [event for event, _ in events]
+    assert names[-1] == 'result' and set(names[:-1]) == {'partial'}, names
+    phases = [data['phase'] for _, data in events[:-1]]
+    assert phases == ['monte_carlo'] * 3 + ['time_to_max'] * 3, phases
+    trials_done = [data['results']['solo']['trials_done'] for _, data in events[:3]]
+    assert trials_done == [100, 200, 300], trials_done
+    import index
+    import numpy_json
+    expected = index.compare_all_systems(index._parse_config(body), trials=300, seed=5)
+    final = events[-1][1]
+    assert final['success'] and final['results'] == json.loads(numpy_json.dumps(expected))
+    print(f"✅ Compare stream: {len(events) - 1} partial events, then the final result")
+
+
+def check_precision_early_stop():
+    """Precision targets stop sampling once met, and tighter targets take more trials"""
+    loose = DropSim.monte_carlo('pinnacle', trials=50000, seed=1, targets={'character_level_gains': 0.02})
+    tight = DropSim.monte_carlo('pinnacle', trials=50000, seed=1, targets={'character_level_gains': 0.005})
+    for result in (loose, tight):
+        report = result['precision']['character_level_gains']
+        assert report['met'] and report['achieved'] <= report['target'], report
+    assert loose['trials'] < tight['trials'] < 50000, (loose['trials'], tight['trials'])
+    client = _client()
+    for body in ({'max_trials': 0}, {'max_trials': 10**9}, {'max_trials': 100, 'trials': 500}):
+        body['precision'] = {'drops': 0.01}
+        assert client.post('/compare_systems', json=body).status_code == 400, body
+    print(f"✅ Precision targets stop early: ±2% after {loose['trials']} trials, ±0.5% after {tight['trials']}")
+
+
+def check_sweep_rows():
+    """A sweep has one row per grid point, each matching a plain Monte Carlo run of that point"""
+    import sweep
+    rows = sweep.run_sweep({'system_name': ['solo', 'pinnacle'], 'starting_gear_level': [200, 300]},
+                           trials=500, seed=1)
+    assert [(row['system_name'], row['starting_gear_level']) for row in rows] == \
+        [('solo', 200), ('solo', 300), ('pinnacle', 200), ('pinnacle', 300)]
+    for row in rows:
+        expected = DropSim.monte_carlo(row['system_name'], trials=500, seed=1,
+                                       starting_gear_level=row['starting_gear_level'])
+        assert row['trials'] == 500
+        assert row['character_level_mean'] == expected['gear']['character_level']['average'], row
+        assert row['drops_p5'] <= row['drops_p50'] <= row['drops_p95']
+    assert set(sweep.columns(rows)) == set(rows[0])
+    print(f"✅ Sweep returns {len(rows)} rows matching per-point Monte Carlo runs")
+
+
+def check_paired_variance_reduction():
+    """Common random numbers cancel shared luck out of paired differences"""
+    configs = [{'system_name': 'pinnacle'},
+               {'system_name': 'pinnacle', 'drop_ranges': {'pinnacle': (1, 4)}, 'label': 'wider'}]
+    result = DropSim.paired_comparison(configs, trials=2000, seed=1)
+    differences = result['comparisons'][0]['differences']
+    # Only the drop range changed, so drop counts see identical luck
+    assert differences['drops']['mean_difference'] == 0 and differences['drops']['ci_half_width'] == 0
+    level = differences['character_level']
+    assert level['mean_difference'] > 0
+    assert level['variance_reduction'] > 3, level
+    assert level['ci_half_width'] < level['independent_ci_half_width']
+    print(f"✅ Paired comparison: {level['variance_reduction']:.1f}x less variance than independent runs")
+
+
+def check_plan_memoization():
+    """Equal configs share one compiled plan, and plans do not grow with session length"""
+    first = DropSim.compile_plan('fireteam', DropSim.SimConfig(total_time_hours=3, starting_gear_level=250))
+    before = DropSim.plan_cache_info()
+    second = DropSim.compile_plan('fireteam', DropSim.SimConfig(total_time_hours=3.0, starting_gear_level=250))
+    after = DropSim.plan_cache_info()
+    assert second is first and after['hits'] == before['hits'] + 1 and after['misses'] == before['misses']
+    long_plan = DropSim.compile_plan('pinnacle', DropSim.SimConfig(total_time_hours=2000))
+    assert len(long_plan.activity_drops) == long_plan.max_achievable_streak + 1
+    assert long_plan.base_drops(long_plan.max_activities) == long_plan.activity_drops[-1]
+    print("✅ Compiled plans are memoized by config and sized by streak, not session length")
+
+
+def check_metrics_counts():
+    """/metrics counts every simulated trial and drop, including those run in worker processes"""
+    import index
+    client = _client()
+    index.load_dropsim()
+
+    def counter(name):
+        prefix = f'dropsim_{name}_total{{system="fireteam"}} '
+        text = client.get('/metrics').get_data(as_text=True)
+        return sum(float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix))
+
+    trials_before, drops_before = counter('trials'), counter('drops_simulated')
+    result = DropSim.monte_carlo('fireteam', trials=4000, seed=3, chunk_size=1000, workers=2)
+    assert counter('trials') - trials_before == 4000
+    assert counter('drops_simulated') - drops_before == round(result['drops']['average'] * 4000)
+    print("✅ /metrics counts trials and drops simulated in worker processes")
+
+
+def check_fields_and_compression():
+    """fields= trims each result, and gzip-encoded responses decode to the same JSON"""
+    import gzip
+    import json
+    client = _client()
+    body = {'trials': 200, 'seed': 13, 'surrogate': False}
+    full = client.post('/compare_systems', json=body).get_json()['results']
+    kept = client.post('/compare_systems?fields=drops,levels_per_hour', json=body).get_json()['results']
+    dropped = client.post('/compare_systems', json=dict(body, fields=['-distributions', '-trajectory'])).get_json()['results']
+    for system, result in full.items():
+        assert set(kept[system]) == {'drops', 'levels_per_hour'}
+        assert kept[system]['drops'] == result['drops']
+        assert set(dropped[system]) == set(result) - {'distributions', 'trajectory'}
+
+    plain = client.post('/compare_systems', json=body)
+    compressed = client.post('/compare_systems', json=body, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip' and 'Accept-Encoding' in compressed.headers['Vary']
+    assert len(compressed.get_data()) < len(plain.get_data())
+    assert json.loads(gzip.decompress(compressed.get_data())) == plain.get_json()
+    print("✅ fields= selects result fields and gzip responses decode to the same JSON")
+
+
+def check_index_etag():
+    """The index page revalidates with its ETag: a matching If-None-Match is a bodyless 304"""
+    client = _client()
+    first = client.get('/')
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+    repeat = client.get('/', headers={'If-None-Match': etag})
+    assert repeat.status_code == 304 and repeat.get_data() == b''
+    assert client.get('/', headers={'If-None-Match': '"stale"'}).get_data() == first.get_data()
+    print(f"✅ Index page served with ETag {etag} and revalidated with a 304")
+
+
+def check_surrogate_grid():
+    """Configs on the surrogate grid are interpolated from the table; anything outside it is simulated"""
+    import json
+    import index
+    import surrogate
+    client = _client()
+    config = json.loads(json.dumps({'total_time_hours': 1.5, 'starting_gear_level': 200,
+                                    'streak_bonuses': surrogate.UI_DEFAULT_STREAK_BONUSES,
+                                    'drop_ranges': surrogate.UI_DEFAULT_DROP_RANGES}))
+
+    def sources(body):
+        response = client.post('/compare_systems', json=body)
+        assert response.status_code == 200, response.get_json()
+        return {result['source'] for result in response.get_json()['results'].values()}
+
+    results = client.post('/compare_systems', json={'config': config}).get_json()['results']
+    sampled = DropSim.monte_carlo('pinnacle', trials=20000, seed=1, config=index._parse_config({'config': config}))
+    pinnacle = results['pinnacle']
+    assert pinnacle['source'] == 'surrogate'
+    for metric, average in (('drops', sampled['drops']['average']),
+                            ('character_level', sampled['gear']['character_level']['average'])):
+        assert abs(pinnacle[metric] - average) <= 0.05 + 2 * pinnacle['confidence'][metric], (metric, pinnacle[metric], average)
+
+    assert sources({'config': dict(config, total_time_hours=13)}) == {'surrogate'}
+    assert sources({'config': config, 'precision': {'drops': 0.05}}) == {'surrogate'}
+    for body in ({'config': dict(config, starting_gear_level=420)}, {'config': dict(config, total_time_hours=30)},
+                 {'config': config, 'trials': 50000}, {'config': config, 'precision': {'drops': 1e-4}, 'max_trials': 2000},
+                 {'config': config, 'surrogate': False}):
+        assert sources(body) == {'simulation'}, body
+    response = client.post('/compare_systems', json={'config': config, 'precision': {'hours_to_max': 0.5}})
+    assert response.status_code == 400 and 'hours_to_max' in response.get_json()['error']
+    print("✅ Surrogate answers on its grid, matches Monte Carlo there and falls back to simulation off it")
+
+
+def check_histogram_percentiles():
+    """Histogram percentiles of merged accumulators match np.percentile on the raw values"""
+    import numpy as np
+    rng = np.random.default_rng(4)
+    blocks = [rng.integers(low, low + 40, size=size) for low, size in ((0, 1), (10, 999), (-5, 2500), (25, 7))]
+    merged = DropSim.MetricAccumulator()
+    for block in blocks:
+        part = DropSim.MetricAccumulator()
+        part.update(block)
+        merged.merge(part)
+    values = np.concatenate(blocks)
+    qs = [0, 1, 5, 25, 33.3, 50, 75, 95, 99, 100]
+    assert np.allclose(merged.percentiles(qs), np.percentile(values, qs), rtol=0, atol=1e-9)
+    summary = merged.summary()
+    assert summary['min'] == values.min() and summary['max'] == values.max()
+    assert sum(summary['histogram']['counts']) == values.size
+
+    rates = rng.random(5000)
+    scaled = DropSim.MetricAccumulator(scale=DropSim.UPGRADE_RATE_RESOLUTION)
+    scaled.update(rates)
+    assert np.allclose(scaled.percentiles(qs), np.percentile(rates, qs), rtol=0,
+                       atol=1 / DropSim.UPGRADE_RATE_RESOLUTION)
+    print("✅ Histogram percentiles match np.percentile")
+
+
+def check_trajectory_bands():
+    """Trajectory bands are ordered and rise through the session to the end-of-session level"""
+    checkpoints = DropSim.session_checkpoints(3)
+    result = DropSim.monte_carlo('fireteam', trials=3000, seed=2, total_time_hours=3, starting_gear_level=250,
+                                 checkpoints=checkpoints)
+    trajectory = result['trajectory']
+    assert trajectory['checkpoints'] == list(checkpoints)
+    for p10, p50, p90 in zip(trajectory['p10'], trajectory['p50'], trajectory['p90']):
+        assert p10 <= p50 <= p90
+    for band in ('average', 'p10', 'p50', 'p90'):
+        assert all(a <= b for a, b in zip(trajectory[band], trajectory[band][1:])), band
+    assert trajectory['average'][0] == 250
+    level = result['gear']['character_level']
+    assert abs(trajectory['average'][-1] - level['average']) < 1e-9
+    assert trajectory['p50'][-1] == level['percentiles']['p50']
+    client = _client()
+    results = client.post('/compare_systems', json={'trials': 200, 'seed': 3, 'trajectory': 4}).get_json()['results']
+    assert all(len(result['trajectory']['p50']) == 5 for result in results.values())
+    print(f"✅ Trajectory bands ordered and rising from 250 to {trajectory['average'][-1]:.1f}")
+
+
+def check_campaign_resume():
+    """A campaign saved and resumed matches the uninterrupted run, and endless steps are refused"""
+    import tempfile
+    import numpy as np
+    import campaign
+    first = [{"system_name": "fireteam", "total_time_hours": 2, "until_level": 260}]
+    second = [{"system_name": "pinnacle", "total_time_hours": 1.5, "sessions": 3}]
+    uninterrupted = campaign.run_campaign(first + second, trials=500, seed=3)
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, 'campaign.npz')
+        campaign.run_campaign(first, trials=500, seed=3).save(snapshot)
+        resumed = campaign.run_campaign(second, state=campaign.CampaignState.load(snapshot))
+    for name in uninterrupted.arrays:
+        assert np.array_equal(getattr(uninterrupted, name), getattr(resumed, name)), name
+    client = _client()
+    for step in ({'system_name': 'solo', 'total_time_hours': 0.0001, 'until_level': 450},
+                 {'system_name': 'solo', 'total_time_hours': 1, 'sessions': campaign.MAX_STEP_SESSIONS + 1}):
+        response = client.post('/campaign', json={'schedule': [step], 'trials': 1})
+        assert response.status_code == 400 and 'sessions' in response.get_json()['error'], step
+    print("✅ Resumed campaign identical to the uninterrupted run")
+
+
+def check_solver_convergence():
+    """The solver narrows its candidates round by round, and what it calls met hits the target when re-simulated"""
+    import solver
+    config = DropSim.SimConfig(total_time_hours=2, starting_gear_level=300)
+    result = solver.solve('pinnacle', 20, 1.0, config, radius=1, seed=1)
+    rounds = result['rounds']
+    assert [r['trials'] for r in rounds] == sorted(r['trials'] for r in rounds)
+    assert all(later['candidates'] <= earlier['candidates'] for earlier, later in zip(rounds, rounds[1:]))
+    best = result['candidates'][0]
+    assert best['met'] and abs(best['hours_to_max'] - 20) + best['ci_half_width'] <= 1.0, best
+    candidate = (tuple(best['streak_bonuses'].values()), tuple(best['drop_range']))
+    check = DropSim.time_to_max('pinnacle', trials=2000, seed=9,
+                                config=solver.candidate_config('pinnacle', config, candidate))
+    assert abs(check['hours']['average'] - 20) <= 1.0, check['hours']['average']
+    client = _client()
+    for body in ({'radius': -1}, {'results': 0}, {'tune': ['nothing']}):
+        response = client.post('/solve', json=dict(body, system_name='pinnacle', target_hours=20))
+        assert response.status_code == 400, (body, response.get_json())
+    print(f"✅ Solver converged in {len(rounds)} rounds on {best['hours_to_max']:.2f}h "
+          f"(re-simulated: {check['hours']['average']:.2f}h)")
+
+
+def check_alias_sampler():
+    """Alias tables encode the slot weights exactly, and picks follow them"""
+    import random
+    import numpy as np
+    slots = DropSim.ALL_GEAR_SLOTS
+    weights = {slots[0]: 4, slots[1]: 0, slots[2]: 0.5}
+    sampler = DropSim.slot_sampler(DropSim.SlotRules(weights=weights, focus_slot=slots[3], focus_weight=2))
+    base = np.array([weights.get(slot, 1.0) for slot in slots])
+    num_slots = len(slots)
+    for row in range(num_slots + 1):
+        expected = base.copy()
+        if row < num_slots:
+            expected[row] += 2
+        expected /= expected.sum()
+        # Column i keeps itself with prob[i] and gives the rest to alias[i]
+        implied = sampler.prob[row] / num_slots
+        np.add.at(implied, sampler.alias[row], (1 - sampler.prob[row]) / num_slots)
+        assert np.allclose(implied, expected, rtol=0, atol=1e-12), row
+
+    draws = 400_000
+    expected = base.copy()
+    expected[3] += 2
+    expected /= expected.sum()
+    counts = np.bincount(sampler.pick(np.random.default_rng(5).random(draws)), minlength=num_slots)
+    rng = random.Random(5)
+    one_by_one = np.bincount([sampler.pick_one(rng, sampler.fixed_row, [0] * num_slots) for _ in range(draws // 4)],
+                             minlength=num_slots)
+    for observed, picks in ((counts, draws), (one_by_one, draws // 4)):
+        sigma = np.sqrt(picks * expected * (1 - expected))
+        assert np.all(np.abs(observed - picks * expected) <= 5 * sigma + 1e-9), observed
+    assert counts[1] == 0
+    print("✅ Alias sampler reproduces the slot weights")
+
+
+def check_tier_shares():
+    """Tier shares sum to one, follow the drop odds, and a set is never above any of its slots"""
+    import numpy as np
+    result = DropSim.monte_carlo('pinnacle', trials=3000, seed=2,
+                                 config=DropSim.SimConfig(tiers=True, total_time_hours=3))
+    tiers = result['tiers']
+    for name in ('drop_shares', 'slot_shares', 'set_tier'):
+        assert abs(sum(tiers[name].values()) - 1) < 1e-9, name
+    # Every drop falls in the level 200 band: T2 with 67%, else T3
+    drops = result['drops']['average'] * result['trials']
+    sigma = np.sqrt(0.67 * 0.33 / drops)
+    assert abs(tiers['drop_shares']['T2'] - 0.67) <= 5 * sigma, tiers['drop_shares']
+    assert abs(tiers['drop_shares']['T2'] + tiers['drop_shares']['T3'] - 1) < 1e-9
+    set_below = slot_below = 0.0
+    for tier in range(1, DropSim.NUM_TIERS + 1):
+        set_below += tiers['set_tier'][f'T{tier}']
+        slot_below += tiers['slot_shares'][f'T{tier}']
+        assert set_below >= slot_below - 1e-12, tier
+    set_average = sum(tier * tiers['set_tier'][f'T{tier}'] for tier in range(1, DropSim.NUM_TIERS + 1))
+    assert all(set_average <= average for average in tiers['slots'].values())
+
+    # A set's tier is its lowest slot tier
+    accumulator = DropSim.TierAccumulator()
+    accumulator.update(np.array([[3] * 7 + [1], [4] * 8]), np.array([0, 2, 5, 1, 0]))
+    summary = accumulator.summary()
+    assert summary['set_tier'] == {'T1': 0.5, 'T2': 0.0, 'T3': 0.0, 'T4': 0.5, 'T5': 0.0}
+    assert summary['drop_shares']['T3'] == 0.625
+    print(f"✅ Tier shares: {tiers['drop_shares']['T2']:.1%} T2 drops, set tier never above a slot")
+
+
+CHECKS = [
+    check_starting_level_bounds,
+    check_worker_determinism,
+    check_exact_solver,
+    check_time_to_max_unreached,
+    check_result_cache,
+    check_job_cancel,
+    check_compare_stream,
+    check_precision_early_stop,
+    check_sweep_rows,
+    check_paired_variance_reduction,
+    check_plan_memoization,
+    check_metrics_counts,
+    check_fields_and_compression,
+    check_index_etag,
+    check_surrogate_grid,
+    check_histogram_percentiles,
+    check_trajectory_bands,
+    check_campaign_resume,
+    check_solver_convergence,
+    check_alias_sampler,
+    check_tier_shares,
+]
+
 try:
     import DropSim
     print("✅ DropSim module imported successfully")
-    
+
     # Test basic simulation
     drops, activities, gear_tracker, max_streak, streak_info = DropSim.run_sim('solo')
     print(f"✅ Solo simulation: {drops} drops, {activities} activities")
-    
+
     # Test all systems
-    for system in ['solo', 'fireteam', 'pinnacle']:
+    for system in SYSTEMS:
         result = DropSim.run_sim(system)
         print(f"✅ {system.capitalize()}: {result[0]} drops, {result[1]} activities, max streak: {result[3]}")
-    
+
+    for check in CHECKS:
+        check()
+
     print("\n🎉 All tests passed! Your D2 Loot Sim is ready to deploy!")
-    
+
 except ImportError as e:
     print(f"❌ Import error: {e}")
+    sys.exit(1)
 except Exception as e:
-    print(f"❌ Test failed: {e}")
+    print(f"❌ Test failed: {type(e).__name__}: {e}")
+    sys.exit(1)